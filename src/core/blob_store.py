@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+from core.config import *
+
+
+def text_digest(data):
+    """返回文本（或其 UTF-8 字节）的 SHA-1 十六进制摘要，用作大文本的去重键与存储文件名。"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+class BlobStore:
+    """
+    剪贴板大文本的外置存储：每段文本按内容摘要保存为目录下的一个文件，相同内容只存一份。
+    历史日志中只保留预览与摘要引用，完整文本在粘贴时才读取。
+    digests 记录目录中现有的摘要，由 prune 按历史中仍被引用的摘要清理。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.digests = set()
+        try:
+            self.digests = {
+                name[:-4] for name in os.listdir(directory)
+                if name.endswith('.txt')
+            }
+        except OSError:
+            pass
+
+    def __len__(self):
+        return len(self.digests)
+
+    def _path_for(self, digest):
+        return os.path.join(self.directory, digest + '.txt')
+
+    def put(self, data, digest=None):
+        """保存 UTF-8 字节 data，返回摘要；写入失败时返回 None。"""
+        if digest is None:
+            digest = text_digest(data)
+        if digest in self.digests:
+            return digest
+
+        temp_path = self._path_for(digest) + '.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path_for(digest))
+        except OSError as e:
+            log(f"保存剪贴板大文本失败: {e}")
+            return None
+        self.digests.add(digest)
+        return digest
+
+    def get(self, digest):
+        """读取摘要对应的完整文本；文件已丢失时返回 None。"""
+        try:
+            with open(self._path_for(digest), 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            log(f"读取剪贴板大文本 {digest} 失败: {e}")
+            return None
+
+    def discard(self, digest):
+        if digest not in self.digests:
+            return
+        self.digests.discard(digest)
+        try:
+            os.remove(self._path_for(digest))
+        except OSError as e:
+            log(f"删除剪贴板大文本 {digest} 失败: {e}")
+
+    def prune(self, referenced_digests):
+        """删除不再被引用的文本，返回删除的个数。"""
+        stale = self.digests - set(referenced_digests)
+        for digest in stale:
+            self.discard(digest)
+        if stale:
+            log(f"已清理 {len(stale)} 个不再被剪贴板历史引用的大文本。")
+        return len(stale)
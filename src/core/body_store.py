@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import io
+import mmap
+import threading
+from collections import OrderedDict
+
+from core.config import *
+
+
+def split_body_lines(text):
+    """按 WordSource 的规则把一段原文切成各行（保留原换行符切分，再去掉每行行尾空白）。"""
+    return [line.rstrip() for line in io.StringIO(text, newline='').readlines()]
+
+
+class BodyStore:
+    """
+    惰性正文模式下的词条正文读取器。
+    词条只保留 (来源文件, 字节偏移, 字节长度)，需要显示或上屏时再从词库文件中取出原文；
+    最近使用的正文保存在一个小型 LRU 中，键为 (路径, 偏移, 长度)，文件变化后偏移随之变化，旧条目自然不会再被命中。
+    每次读取都临时映射文件并立即关闭：长期持有映射在 Windows 上会让编辑器无法保存词库文件。
+    搜索线程、快捷码监听线程与界面线程都可能读取，LRU 由 lock 串行化。
+    文件已被修改、等待重载期间字节位置失效，需要重新解析整个文件按内容查找正文；
+    解析结果按 (路径, stat 签名) 保存在 reparsed 中，同一页结果的多个词条只解析一次文件，新数据发布时随 clear 一并丢弃。
+    """
+
+    def __init__(self, max_entries=BODY_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.reparsed = {} # 路径 -> (stat 签名, 重新解析得到的 {查找键: 正文})
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.reparsed.clear()
+
+    def reparsed_bodies(self, file_path, signature, parse):
+        """
+        返回 parse(file_path) 的结果；文件的 stat 签名未变时直接复用上次的解析结果。
+        签名为 None（文件不存在）时不缓存。解析在锁外进行，并发的两次解析结果相同，后写入者覆盖即可。
+        """
+        if signature is not None:
+            with self.lock:
+                cached = self.reparsed.get(file_path)
+                if cached is not None and cached[0] == signature:
+                    return cached[1]
+
+        bodies = parse(file_path)
+        if signature is not None:
+            with self.lock:
+                self.reparsed[file_path] = (signature, bodies)
+        return bodies
+
+    def discard(self, file_path, offset, length):
+        with self.lock:
+            self.entries.pop((file_path, offset, length), None)
+
+    def read(self, file_path, offset, length):
+        """返回指定字节范围解码后的文本；文件已不存在或范围越界时返回 None。"""
+        key = (file_path, offset, length)
+        with self.lock:
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+                return text
+
+        text = self._read_range(file_path, offset, length)
+        if text is None or self.max_entries <= 0:
+            return text
+
+        with self.lock:
+            self.entries[key] = text
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return text
+
+    @staticmethod
+    def _read_range(file_path, offset, length):
+        if length <= 0:
+            return ""
+        try:
+            with open(file_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if offset + length > len(mapped):
+                        return None
+                    data = mapped[offset:offset + length]
+            return data.decode('utf-8')
+        except (OSError, ValueError) as e:
+            log(f"读取词条正文失败 ({file_path}@{offset}): {e}")
+            return None
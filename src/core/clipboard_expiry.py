@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import heapq
+import os
+
+from core.config import *
+
+
+def _content_digest(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class ClipboardExpiry:
+    """
+    剪贴板定时清除的到期调度。
+    内存中记录 完整内容 -> 记录时间，并用最小堆按时间排列，随时能以 O(1) 得到最早到期的条目，
+    到期时只弹出真正过期的那几个，不再每分钟扫描全部时间戳。
+    时间被更新或条目被删除后，堆中的旧记录不立即删除，弹出时与 times 核对后跳过（惰性删除）。
+    记录时间保存在只追加的文本文件中，每行为“内容的 SHA-1 摘要 记录时间”，同一摘要以最后一行为准；
+    每次复制只追加一行，全量对齐（启动、清空、历史被外部修改后重新加载）时整体重写文件，
+    重启后条目仍按最初的记录时间过期。已不在历史中的行无害，下次重写时自然去掉；
+    长时间没有全量对齐时，文件行数超过跟踪条目数的 COMPACT_RATIO 倍也会重写一次（压缩），文件大小始终有界。
+    """
+
+    COMPACT_RATIO = 2
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.times = {} # 完整内容 -> 记录时间（time.time() 秒数）
+        self.heap = [] # (记录时间, 完整内容)，可能含已失效的旧记录
+        self.persisted = {} # 从文件读到、尚未与当前历史对齐的 摘要 -> 记录时间
+        self.file_lines = 0 # 文件中的行数，包含同一摘要的旧行与已不在历史中的行
+        self.load()
+
+    def __len__(self):
+        return len(self.times)
+
+    def load(self):
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self.file_lines += 1
+                    parts = line.split()
+                    if len(parts) != 2:
+                        continue
+                    try:
+                        self.persisted[parts[0]] = float(parts[1])
+                    except ValueError:
+                        continue
+            log(f"已加载 {len(self.persisted)} 条剪贴板记录时间。")
+        except (OSError, UnicodeDecodeError) as e:
+            self.persisted = {}
+            log(f"加载剪贴板记录时间失败，将按当前时间重新计时: {e}")
+
+    @staticmethod
+    def _format_line(content, timestamp):
+        return f"{_content_digest(content)} {timestamp!r}\n"
+
+    def _rewrite(self):
+        """按当前的 times（以及尚未对齐的 persisted）整体重写文件（先写临时文件再替换）。"""
+        temp_path = self.file_path + ".tmp"
+        lines = [self._format_line(content, timestamp) for content, timestamp in self.times.items()]
+        lines.extend(f"{digest} {timestamp!r}\n" for digest, timestamp in self.persisted.items())
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("".join(lines))
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            log(f"保存剪贴板记录时间失败: {e}")
+            return
+        self.file_lines = len(lines)
+
+    def _push(self, content, timestamp):
+        self.times[content] = timestamp
+        heapq.heappush(self.heap, (timestamp, content))
+
+    def _drop_stale_top(self):
+        while self.heap:
+            timestamp, content = self.heap[0]
+            if self.times.get(content) == timestamp:
+                return
+            heapq.heappop(self.heap)
+
+    def _rebuild_heap_if_bloated(self):
+        # 失效记录过多时重建堆，防止堆无限增长
+        if len(self.heap) > 2 * len(self.times) + 64:
+            self.heap = [(timestamp, content) for content, timestamp in self.times.items()]
+            heapq.heapify(self.heap)
+
+    def record(self, content, timestamp):
+        """记录一个新条目：入堆并在文件末尾追加一行，耗时与历史条数无关（压缩时除外，均摊后仍为常数）。"""
+        self._push(content, timestamp)
+        self._rebuild_heap_if_bloated()
+        if self.file_lines >= self.COMPACT_RATIO * (len(self.times) + len(self.persisted)):
+            self._rewrite()
+            return
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(self._format_line(content, timestamp))
+        except OSError as e:
+            log(f"追加剪贴板记录时间失败: {e}")
+            return
+        self.file_lines += 1
+
+    def discard(self, contents):
+        """不再跟踪这些条目（堆中的旧记录留待惰性删除，文件中的旧行留待下次重写）。"""
+        for content in contents:
+            self.times.pop(content, None)
+
+    def sync(self, contents, current_time):
+        """
+        与当前剪贴板历史全量对齐并重写文件：已记录的条目保留原时间，新条目优先沿用文件中保存的时间，
+        否则记为 current_time；已不在历史中的条目被移除。只在启动、清空与重新加载历史时调用。
+        """
+        contents = set(contents)
+        for content in [content for content in self.times if content not in contents]:
+            del self.times[content]
+        for content in contents:
+            if content not in self.times:
+                timestamp = self.persisted.pop(_content_digest(content), None) if self.persisted else None
+                self._push(content, current_time if timestamp is None else timestamp)
+        self.persisted = {}
+        self._rebuild_heap_if_bloated()
+        self._rewrite()
+
+    def pop_expired(self, current_time, max_age):
+        """弹出并返回记录时间早于 current_time - max_age 的全部条目内容（从旧到新）。"""
+        expired = []
+        deadline = current_time - max_age
+        self._drop_stale_top()
+        while self.heap and self.heap[0][0] <= deadline:
+            _, content = heapq.heappop(self.heap)
+            del self.times[content]
+            expired.append(content)
+            self._drop_stale_top()
+        return expired
+
+    def next_expiry(self, max_age):
+        """返回最早一个条目的到期时间；没有条目时返回 None。"""
+        self._drop_stale_top()
+        if not self.heap:
+            return None
+        return self.heap[0][0] + max_age
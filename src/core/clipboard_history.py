@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import threading
+from collections import deque
+from itertools import islice
+
+from core.config import *
+from core.word_source import parse_word_blocks
+from core.search_index import ClipboardIndex
+
+
+class ClipboardHistory:
+    """
+    剪贴板历史：内存中的环形缓冲区 + 只追加的日志文件（即剪贴板词库 md 文件，格式与普通词库相同）。
+    记录新条目只在文件末尾追加一段并解析这一段；缓冲区满时最旧的条目直接被挤出，
+    文件中留下的旧记录等到日志条目数超过容量的 COMPACT_RATIO 倍时整体重写（压缩）掉。
+    启动时按文件顺序解析，只保留最后 capacity 条，因此压缩前后看到的历史一致。
+    删除与清空很少发生，直接按缓冲区内容重写文件。
+    每次写入后记下文件的 stat 签名，据此区分自身写入触发的文件监控事件与外部修改。
+    缓冲区之外另维护完整内容 -> 词条的字典（去重与按内容查找为 O(1)）和增量倒排表 index，
+    二者随条目进出同步增删，历史容量可以放大到上万条。
+    新词条先交给 prepare_block 预处理（建立字符映射表）再进入倒排表；条目离开历史时调用 release_block（例如清理外置的大文本）。
+    搜索线程会读取倒排表，所有修改与查询由 lock 串行化。
+    """
+
+    COMPACT_RATIO = 2
+
+    def __init__(self, file_path, capacity, prepare_block=None, release_block=None):
+        self.file_path = sys.intern(file_path)
+        self.capacity = max(1, capacity)
+        self.prepare_block = prepare_block
+        self.release_block = release_block
+        self.entries = deque() # 从旧到新，长度不超过 capacity
+        self.by_content = {} # 完整内容 -> 词条
+        self.index = ClipboardIndex()
+        self.lock = threading.Lock()
+        self.journal_count = 0 # 日志文件中的条目数，包含已被挤出缓冲区的旧记录
+        self.file_size = 0
+        self.stat_signature = None
+        self.loaded = False
+        self.load_generation = 0 # 每次从文件重建缓冲区时递增，调用方据此判断是否需要全量对齐派生状态
+
+    def _read_stat(self):
+        try:
+            stat_result = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def _remember_stat(self):
+        self.stat_signature = self._read_stat()
+        self.file_size = self.stat_signature[0] if self.stat_signature else 0
+
+    def changed_on_disk(self):
+        """文件自上次读写以来是否被外部修改（尚未加载过时视为已修改）。"""
+        return not self.loaded or self._read_stat() != self.stat_signature
+
+    def load(self):
+        """从日志文件重建缓冲区，返回缓冲区中的词条（从旧到新）。"""
+        if not os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, 'w', encoding='utf-8') as f:
+                    f.write("")
+                log(f"已创建剪贴板历史文件: {self.file_path}")
+            except OSError as e:
+                log(f"创建剪贴板历史文件失败: {e}")
+
+        lines = []
+        try:
+            with open(self.file_path, 'r', encoding='utf-8', newline='') as f:
+                lines = f.readlines()
+        except (OSError, UnicodeDecodeError) as e:
+            log(f"读取剪贴板历史文件失败: {e}")
+
+        blocks = parse_word_blocks(lines, self.file_path, allow_blob_refs=True)
+        self._reset_entries(blocks[-self.capacity:])
+        self.journal_count = len(blocks)
+        self.loaded = True
+        self.load_generation += 1
+        self._remember_stat()
+        return list(self.entries)
+
+    def _reset_entries(self, blocks):
+        self._prepare(blocks)
+        with self.lock:
+            self.entries = deque()
+            self.by_content = {}
+            self.index.clear()
+            self._push_entries(blocks)
+
+    def _prepare(self, blocks):
+        # 预处理较慢（需要查拼音），放在锁外进行，不阻塞搜索线程
+        if self.prepare_block is not None:
+            for block in blocks:
+                self.prepare_block(block)
+
+    def _push_entries(self, blocks):
+        """把预处理过的新词条放进缓冲区末尾，超出容量时挤出最旧的条目；调用方需持有 lock。"""
+        for block in blocks:
+            self.entries.append(block)
+            self.by_content[block.full_content] = block
+            self.index.add_block(block)
+        self._evict_overflow()
+
+    def _evict_overflow(self):
+        while len(self.entries) > self.capacity:
+            self._forget(self.entries.popleft())
+
+    def _forget(self, block):
+        # 文件被外部编辑后可能出现内容重复的条目，字典只指向其中最新的一个
+        if self.by_content.get(block.full_content) is block:
+            del self.by_content[block.full_content]
+        self.index.remove_block(block)
+        if self.release_block is not None:
+            self.release_block(block)
+
+    def find(self, content):
+        """按完整内容查找历史中的词条，找不到时返回 None。"""
+        return self.by_content.get(content)
+
+    def newest(self, limit=None):
+        """返回最新的 limit 个词条（从新到旧）；limit 为 None 时返回全部。只遍历需要的部分，不复制整个缓冲区。"""
+        with self.lock:
+            return list(islice(reversed(self.entries), limit))
+
+    def candidates(self, keywords, pinyin_search_enabled=False):
+        """返回可能命中所有关键词的剪贴板词条（从新到旧），供搜索线程调用。"""
+        with self.lock:
+            return self.index.candidates(keywords, pinyin_search_enabled)
+
+    def append(self, content):
+        """
+        在日志末尾追加一个条目（写入格式同 WordSource.add_entry），只解析追加的这一段。
+        返回新解析出的词条列表（内容中含以 "- " 开头的行时可能不止一个）；写入失败时返回 None。
+        """
+        text = '\n' + content
+        try:
+            with open(self.file_path, 'a', encoding='utf-8', newline='') as f:
+                f.write(text)
+        except OSError as e:
+            log(f"追加剪贴板历史失败: {e}")
+            return None
+
+        blocks = parse_word_blocks(io.StringIO(text, newline='').readlines(), self.file_path, self.file_size, allow_blob_refs=True)
+        self._prepare(blocks)
+        with self.lock:
+            self._push_entries(blocks)
+        self.journal_count += len(blocks)
+        self._remember_stat()
+        if self.journal_count > self.capacity * self.COMPACT_RATIO:
+            self.compact()
+        return blocks
+
+    def compact(self):
+        """把日志重写为缓冲区中的条目，清掉已被挤出的旧记录。"""
+        return self._rewrite(list(self.entries))
+
+    def _rewrite(self, blocks):
+        """用 blocks 整体替换日志文件和缓冲区；写入失败时两者都保持不变。"""
+        temp_path = self.file_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write('\n'.join(block.full_content for block in blocks))
+            os.replace(temp_path, self.file_path)
+        except OSError as e:
+            log(f"重写剪贴板历史文件失败: {e}")
+            return False
+        log(f"剪贴板历史日志已重写: {self.journal_count} -> {len(blocks)} 条。")
+        kept = set(blocks)
+        with self.lock:
+            for block in self.entries:
+                if block not in kept:
+                    self._forget(block)
+            self.entries = deque(blocks)
+        self.journal_count = len(blocks)
+        self._remember_stat()
+        return True
+
+    def remove(self, contents):
+        """从历史中删除完整内容在 contents 中的条目，返回删除的条数。"""
+        contents = set(contents)
+        kept = [block for block in self.entries if block.full_content not in contents]
+        removed_count = len(self.entries) - len(kept)
+        if removed_count and not self._rewrite(kept):
+            return 0
+        return removed_count
+
+    def clear(self):
+        return self._rewrite([])
+
+    def set_capacity(self, capacity):
+        """调整容量；缩小时立即丢弃最旧的条目，文件中的记录留待下次压缩。"""
+        self.capacity = max(1, capacity)
+        with self.lock:
+            self._evict_overflow()
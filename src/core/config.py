@@ -1,41 +1,8 @@
 # -*- coding: utf-8 -*-
-import sys
 import os
-import webbrowser
-import configparser
 import hashlib
-import json
 import subprocess
-import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+from PySide6.QtCore import Qt
 
 
 from utils.paths import get_base_path, resource_path
@@ -94,8 +61,12 @@ AUTO_LOAD_DIR = os.path.join(BASE_PATH, "MD词库-需自动载入的请放入")
 WORD_FILE = os.path.join(AUTO_LOAD_DIR, "词库.md")
 CONFIG_FILE = os.path.join(USER_DATA_DIR, "config.ini")
 CLIPBOARD_HISTORY_FILE = os.path.join(AUTO_LOAD_DIR, "剪贴板词库-勿删.md")
-CACHE_FILE = os.path.join(USER_DATA_DIR, "cache.json")
+CACHE_FILE = os.path.join(USER_DATA_DIR, "cache.json") # 仅在开启调试导出时写入
+CACHE_BIN_FILE = os.path.join(USER_DATA_DIR, "cache.bin")
 RANKING_STATE_FILE = os.path.join(USER_DATA_DIR, "ranking_state.json")
+CLIPBOARD_TIMESTAMPS_FILE = os.path.join(USER_DATA_DIR, "clipboard_timestamps.txt") # 剪贴板条目的记录时间，用于定时清除
+CLIPBOARD_BLOB_DIR = os.path.join(USER_DATA_DIR, "clipboard_blobs") # 剪贴板大文本的外置存储
+PINYIN_TABLE_FILE = os.path.join(USER_DATA_DIR, "pinyin_initials.bin")
 
 ICON_PATH = resource_path("icon.png")
 
@@ -111,6 +82,35 @@ SUPPORTED_PASTE_MODES = {
     PASTE_MODE_TYPING,
 }
 
+MATCHER_ENGINE_CLASSIC = "classic"
+MATCHER_ENGINE_BITPARALLEL = "bitparallel"
+SUPPORTED_MATCHER_ENGINES = {
+    MATCHER_ENGINE_CLASSIC,
+    MATCHER_ENGINE_BITPARALLEL,
+}
+
+# 收藏与最近使用记录的持久化方式：sync 每条记录立即写入并落盘，batched 由后台线程攒批写入
+RANKING_DURABILITY_SYNC = "sync"
+RANKING_DURABILITY_BATCHED = "batched"
+SUPPORTED_RANKING_DURABILITY = {
+    RANKING_DURABILITY_SYNC,
+    RANKING_DURABILITY_BATCHED,
+}
+
+# 列表项中保存本次查询高亮分组的数据角色（词条本身通过 Qt.UserRole 保存）
+HIGHLIGHT_GROUPS_ROLE = Qt.UserRole + 1
+
+# 惰性正文模式：正文字节数不小于该值的词条只在需要时从词库文件回读
+LAZY_BODY_MIN_BYTES = 512
+# 惰性正文模式下常驻内存的最近使用正文条数
+BODY_CACHE_ENTRIES = 64
+# 分片搜索等待工作进程回复时检查取消状态的间隔（秒）
+SHARD_CANCEL_POLL_SECONDS = 0.01
+# 剪贴板记忆条数上限（历史由环形缓冲区与增量倒排表维护，上万条也只按条目增删）
+CLIPBOARD_HISTORY_MAX_COUNT = 20000
+# 剪贴板大文本在历史中保留的预览字符数
+CLIPBOARD_PREVIEW_CHARS = 200
+
 def log(message):
     if DEBUG_MODE:
         print(f"[LOG] {message}")
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import json
+import struct
+from array import array
+
+from core.config import *
+from core.word_block import WordBlock, CharInfo, intern_char_info
+
+CACHE_MAGIC = b"QKVC"
+CACHE_FORMAT_VERSION = 1
+# 字符掩码中的特殊位：该字符的搜索键无法由规则还原，需查 exceptions 表
+KEY_EXCEPTION_BIT = 1 << 31
+
+# 由预处理派生、会在解码时重建的字段，以及不应进入缓存的排序元数据
+DERIVED_BLOCK_FIELDS = {
+    'parent_lower', 'char_map', 'char_masks', 'alias_search_entries',
+    'entry_id', 'is_favorite', 'usage_meta',
+}
+PACKED_BLOCK_FIELDS = ('parent', 'full_content', 'shortcut_code', 'exclude_parent', 'is_clipboard', 'aliases')
+
+
+def _is_cjk(char):
+    return '\u4e00' <= char <= '\u9fa5'
+
+
+def _rule_keys(char_lower, cjk, mask):
+    """按 _build_char_map 的规则由位掩码还原搜索键。"""
+    if not cjk:
+        return (char_lower,)
+    letters = [chr(97 + bit) for bit in range(26) if mask >> bit & 1]
+    return tuple(sorted(set([char_lower] + letters)))
+
+
+def _encode_char_map(char_map, masks, exceptions):
+    for char_info in char_map:
+        char = char_info.char
+        char_lower = char.lower()
+        keys = char_info.keys
+        cjk = _is_cjk(char)
+        mask = 0
+        if cjk:
+            for key in keys:
+                if len(key) == 1 and 'a' <= key <= 'z':
+                    mask |= 1 << (ord(key) - 97)
+        if _rule_keys(char_lower, cjk, mask) != keys:
+            exceptions.append([len(masks), list(keys)])
+            mask = KEY_EXCEPTION_BIT
+        masks.append(mask)
+
+
+def _export_default(value):
+    """调试导出时把词条与字符映射项转换为 JSON 结构。"""
+    if isinstance(value, WordBlock):
+        return value.assigned_fields()
+    if isinstance(value, CharInfo):
+        return {'char': value.char, 'keys': value.keys}
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def encode_blocks(blocks, source_path):
+    """
+    将一个词库文件预处理后的词条编码为二进制负载：
+    u32 元数据长度 + 紧凑 JSON（词条的字符串字段、别名、例外搜索键）+ 全部文本逐字符的首字母位掩码（array('I')）。
+    char_map 只保存位掩码，字符本身由文本还原。
+    """
+    packed_blocks = []
+    masks = array('I')
+    exceptions = []
+    for block in blocks:
+        extra = {
+            key: value for key, value in block.assigned_fields().items()
+            if key not in DERIVED_BLOCK_FIELDS and key not in PACKED_BLOCK_FIELDS and key != 'source_path'
+            and value is not None
+        }
+        if block.source_path != source_path:
+            extra['source_path'] = block.source_path
+        packed_blocks.append([getattr(block, field) for field in PACKED_BLOCK_FIELDS] + [extra])
+
+        _encode_char_map(block.char_map, masks, exceptions)
+        for alias_entry in block.alias_search_entries:
+            _encode_char_map(alias_entry.get('char_map', ()), masks, exceptions)
+
+    meta = json.dumps(
+        {'source_path': source_path, 'blocks': packed_blocks, 'exceptions': exceptions},
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+    return struct.pack('<I', len(meta)) + meta + masks.tobytes()
+
+
+class _CharMapDecoder:
+    """解码时复用相同 (字符, 掩码) 的共享 CharInfo，减少对象分配。"""
+
+    def __init__(self, masks, exceptions):
+        self.masks = masks
+        self.exceptions = exceptions
+        self.offset = 0
+        self.info_cache = {}
+
+    def _resolve(self, char, mask, position):
+        if mask & KEY_EXCEPTION_BIT:
+            return intern_char_info(char, self.exceptions[position])
+        info = intern_char_info(char, _rule_keys(char.lower(), _is_cjk(char), mask))
+        self.info_cache[(char, mask)] = info
+        return info
+
+    def decode(self, text):
+        offset = self.offset
+        end = offset + len(text)
+        info_get = self.info_cache.get
+        resolve = self._resolve
+        char_map = tuple(
+            info_get((char, mask)) or resolve(char, mask, offset + index)
+            for index, (char, mask) in enumerate(zip(text, self.masks[offset:end]))
+        )
+        self.offset = end
+        return char_map
+
+
+def decode_blocks(payload):
+    """
+    还原 encode_blocks 写入的词条：字符串字段、parent_lower、char_map 与别名的 char_map。
+    char_masks 依赖当前匹配引擎，由调用方补齐。
+    """
+    (meta_length,) = struct.unpack_from('<I', payload, 0)
+    meta = json.loads(payload[4:4 + meta_length].decode('utf-8'))
+    masks = array('I')
+    masks.frombytes(payload[4 + meta_length:])
+    decoder = _CharMapDecoder(masks, {offset: keys for offset, keys in meta['exceptions']})
+
+    source_path = sys.intern(meta['source_path']) if meta['source_path'] else meta['source_path']
+    blocks = []
+    for packed in meta['blocks']:
+        fields = dict(zip(PACKED_BLOCK_FIELDS, packed))
+        fields['source_path'] = source_path
+        fields.update(packed[len(PACKED_BLOCK_FIELDS)])
+        block = WordBlock.from_fields(fields)
+        block.parent_lower = block.parent.lower()
+        block.char_map = decoder.decode(block.parent)
+        block.alias_search_entries = [
+            {'text': alias, 'char_map': decoder.decode(alias)}
+            for alias in block.aliases
+        ]
+        blocks.append(block)
+
+    if decoder.offset != len(masks):
+        raise ValueError("字符掩码数量与词条文本长度不一致")
+    return blocks
+
+
+class LibraryCache:
+    """
+    词库二进制缓存文件（cache.bin）。
+    文件头之后每个词库文件占一条长度前缀记录：u32 头长度 + 头部 JSON（路径键与哈希等元数据）+ u32 负载长度 + 负载。
+    打开时只读取各条记录的头部并记下负载偏移，真正用到某个文件时才读取并解码它的负载。
+    文件按追加方式更新：变化的词库追加一条新记录，只改元数据时追加无负载的元数据记录，
+    移除的词库追加删除标记，读取时以最后一条为准；失效数据超过有效数据时才整体重写压缩。
+    """
+
+    # 失效字节超过有效字节与此余量之和时，保存时整体重写
+    COMPACT_SLACK_BYTES = 64 * 1024
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.records = {}
+        self.dirty_keys = set()
+        self.removed_keys = set()
+        self.file_size = 0 # 已加载文件中有效数据的末尾偏移，0 表示下次保存需要整体重写
+
+    def load(self):
+        """读取记录目录；文件不存在、损坏或版本不兼容时得到空缓存。"""
+        self.records = {}
+        self.dirty_keys = set()
+        self.removed_keys = set()
+        self.file_size = 0
+        if not os.path.exists(self.file_path):
+            log("缓存文件不存在，将跳过加载。")
+            return
+        try:
+            with open(self.file_path, 'rb') as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    log("缓存文件格式错误：文件头不匹配。将创建新缓存。")
+                    return
+                format_version, version_length = struct.unpack('<HH', f.read(4))
+                app_version = f.read(version_length).decode('utf-8')
+                if format_version != CACHE_FORMAT_VERSION or app_version != VERSION:
+                    log(f"缓存版本不兼容 (需要 {VERSION}/{CACHE_FORMAT_VERSION}，但发现 {app_version}/{format_version})，将创建新缓存。")
+                    return
+
+                total_size = os.fstat(f.fileno()).st_size
+                records = {}
+                valid_end = f.tell()
+                while True:
+                    length_bytes = f.read(4)
+                    if len(length_bytes) < 4:
+                        break
+                    (header_length,) = struct.unpack('<I', length_bytes)
+                    header_bytes = f.read(header_length)
+                    payload_length_bytes = f.read(4)
+                    if len(header_bytes) < header_length or len(payload_length_bytes) < 4:
+                        break
+                    (payload_length,) = struct.unpack('<I', payload_length_bytes)
+                    payload_offset = f.tell()
+                    if payload_offset + payload_length > total_size:
+                        break
+                    header = json.loads(header_bytes.decode('utf-8'))
+                    f.seek(payload_length, os.SEEK_CUR)
+                    valid_end = f.tell()
+
+                    key = header['key']
+                    if header.get('removed'):
+                        records.pop(key, None)
+                    elif header.get('meta_only'):
+                        if key in records:
+                            records[key]['meta'] = header['meta']
+                    else:
+                        records[key] = {
+                            'meta': header['meta'],
+                            'offset': payload_offset,
+                            'length': payload_length,
+                            'payload': None,
+                        }
+                if valid_end < total_size:
+                    log("缓存文件末尾存在不完整的记录，已忽略。")
+            self.records = records
+            self.file_size = valid_end
+            log(f"成功从文件加载缓存目录，共 {len(records)} 个词库。")
+        except (struct.error, ValueError, KeyError) as e:
+            log(f"CRITICAL: 加载缓存失败 (格式错误): {e}。将创建新缓存。")
+        except (IOError, OSError) as e:
+            log(f"CRITICAL: 加载缓存失败 (文件读写错误): {e}。将创建新缓存。")
+
+    def keys(self):
+        return self.records.keys()
+
+    def get_meta(self, key):
+        record = self.records.get(key)
+        return record['meta'] if record else None
+
+    def _read_payload(self, record):
+        with open(self.file_path, 'rb') as f:
+            f.seek(record['offset'])
+            payload = f.read(record['length'])
+        if len(payload) != record['length']:
+            raise ValueError("缓存负载长度不足")
+        return payload
+
+    def load_blocks(self, key):
+        """解码单个词库文件的缓存词条；读取或解码失败时返回 None。"""
+        record = self.records.get(key)
+        if record is None:
+            return None
+        try:
+            payload = record['payload'] if record['payload'] is not None else self._read_payload(record)
+            return decode_blocks(payload)
+        except (OSError, ValueError, KeyError, IndexError, TypeError, struct.error) as e:
+            log(f"CRITICAL: 解码缓存记录失败 ({key}): {e}")
+            return None
+
+    def put(self, key, meta, blocks):
+        """
+        记录一个需要重新写入的词库文件，在 save() 时写入。
+        词条在这里立即编码，之后调用方可以自由修改或精简这些词条字典（见惰性正文模式）。
+        """
+        payload = encode_blocks(blocks, blocks[0].source_path if blocks else None)
+        self.records[key] = {'meta': meta, 'offset': None, 'length': None, 'payload': payload}
+        self.dirty_keys.add(key)
+        self.removed_keys.discard(key)
+
+    def update_meta(self, key, meta):
+        self.records[key]['meta'] = meta
+        self.dirty_keys.add(key)
+
+    def remove(self, key):
+        if self.records.pop(key, None) is not None:
+            self.removed_keys.add(key)
+        self.dirty_keys.discard(key)
+
+    def _encode_record(self, key, record):
+        """返回 (头部字节, 负载字节)；只改了元数据的记录不带负载。"""
+        if record['payload'] is not None:
+            payload = record['payload']
+            header = {'key': key, 'meta': record['meta']}
+        elif record['offset'] is None:
+            raise ValueError(f"缓存记录缺少数据: {key}")
+        else:
+            payload = b""
+            header = {'key': key, 'meta': record['meta'], 'meta_only': True}
+        return json.dumps(header, ensure_ascii=False).encode('utf-8'), payload
+
+    def _write_record(self, out, header, payload):
+        out.write(struct.pack('<I', len(header)))
+        out.write(header)
+        out.write(struct.pack('<I', len(payload)))
+        payload_offset = out.tell()
+        out.write(payload)
+        return payload_offset
+
+    def _needs_rewrite(self):
+        if not self.file_size or not os.path.exists(self.file_path):
+            return True
+        live_bytes = sum(record['length'] or 0 for record in self.records.values())
+        return self.file_size > live_bytes * 2 + self.COMPACT_SLACK_BYTES
+
+    def save(self):
+        """把变化追加到缓存文件末尾；首次写入或失效数据过多时整体重写。"""
+        try:
+            if self._needs_rewrite():
+                self._rewrite()
+            else:
+                self._append()
+        except Exception as e:
+            log(f"保存缓存失败: {e}")
+            self.file_size = 0
+            return False
+
+        self.dirty_keys = set()
+        self.removed_keys = set()
+        log("缓存已成功保存。")
+        return True
+
+    def _append(self):
+        new_offsets = {}
+        with open(self.file_path, 'r+b') as out:
+            out.seek(self.file_size)
+            out.truncate()
+            for key in self.removed_keys:
+                header = json.dumps({'key': key, 'removed': True}, ensure_ascii=False).encode('utf-8')
+                self._write_record(out, header, b"")
+            for key in self.dirty_keys:
+                record = self.records[key]
+                header, payload = self._encode_record(key, record)
+                payload_offset = self._write_record(out, header, payload)
+                if record['payload'] is not None:
+                    new_offsets[key] = (payload_offset, len(payload))
+            self.file_size = out.tell()
+        self._commit_offsets(new_offsets)
+
+    def _rewrite(self):
+        """写入临时文件后整体替换，未变化的记录直接复制原负载字节。"""
+        temp_path = self.file_path + ".tmp"
+        version_bytes = VERSION.encode('utf-8')
+        new_offsets = {}
+        with open(temp_path, 'wb') as out:
+            out.write(CACHE_MAGIC)
+            out.write(struct.pack('<HH', CACHE_FORMAT_VERSION, len(version_bytes)))
+            out.write(version_bytes)
+            for key, record in self.records.items():
+                if record['payload'] is not None:
+                    header, payload = self._encode_record(key, record)
+                else:
+                    payload = self._read_payload(record)
+                    header = json.dumps({'key': key, 'meta': record['meta']}, ensure_ascii=False).encode('utf-8')
+                new_offsets[key] = (self._write_record(out, header, payload), len(payload))
+            file_size = out.tell()
+        os.replace(temp_path, self.file_path)
+        self.file_size = file_size
+        self._commit_offsets(new_offsets)
+
+    def _commit_offsets(self, new_offsets):
+        for key, (offset, length) in new_offsets.items():
+            record = self.records[key]
+            record['offset'] = offset
+            record['length'] = length
+            record['payload'] = None
+
+    def export_json(self, file_path):
+        """以旧版 cache.json 的结构导出全部缓存，仅用于调试查看。"""
+        files = {}
+        for key, record in self.records.items():
+            blocks = self.load_blocks(key) or []
+            files[key] = dict(record['meta'], data=blocks)
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": VERSION, "files": files}, f, ensure_ascii=False, indent=2, default=_export_default)
+            log(f"缓存调试导出已写入: {file_path}")
+        except Exception as e:
+            log(f"导出缓存调试 JSON 失败: {e}")
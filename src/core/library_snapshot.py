@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+
+class LibrarySnapshot:
+    """
+    某一代词库数据的只读快照：词条列表与基于它构建的各类索引。
+    重载总是在后台构建一份全新的快照，再在界面线程一次性替换；搜索线程在查询开始时取一次引用，
+    即使查询过程中词库被重载，也始终读取同一代的一致数据。快照建成后不再修改。
+    """
+
+    def __init__(self, generation=0, word_blocks=None, search_index=None, vector_index=None):
+        self.generation = generation
+        self.word_blocks = word_blocks if word_blocks is not None else []
+        self.search_index = search_index
+        self.vector_index = vector_index
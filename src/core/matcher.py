@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+
+class ClassicMatcher:
+    """逐起点扫描的原始匹配实现，适用于任何字符映射表。"""
+
+    name = "classic"
+
+    def compile(self, char_map):
+        return None
+
+    def match(self, keyword, char_map, compiled=None, pinyin_search_enabled=False, used_indices=None):
+        """在指定字符映射表中寻找单个关键词的最佳命中。"""
+        if not keyword or not char_map:
+            return None
+
+        used_indices = used_indices or set()
+        best_match = None
+
+        for start_idx in range(len(char_map)):
+            match_indices = []
+            match_types = []
+            kw_ptr = 0
+            map_ptr = start_idx
+
+            while kw_ptr < len(keyword) and map_ptr < len(char_map):
+                if map_ptr in used_indices:
+                    map_ptr += 1
+                    continue
+
+                char_info = char_map[map_ptr]
+                original_match = False
+                if keyword[kw_ptr:].startswith(char_info.char.lower()):
+                    match_indices.append(map_ptr)
+                    match_types.append('original')
+                    kw_ptr += len(char_info.char)
+                    map_ptr += 1
+                    original_match = True
+                elif pinyin_search_enabled:
+                    pinyin_matched = False
+                    for pinyin_key in char_info.keys:
+                        if keyword[kw_ptr:].startswith(pinyin_key):
+                            match_indices.append(map_ptr)
+                            match_types.append('pinyin')
+                            kw_ptr += len(pinyin_key)
+                            map_ptr += 1
+                            pinyin_matched = True
+                            break
+                    if not pinyin_matched and not original_match:
+                        break
+                else:
+                    break
+
+            if kw_ptr != len(keyword):
+                continue
+
+            current_match_indices = set(match_indices)
+            if used_indices and not used_indices.isdisjoint(current_match_indices):
+                continue
+
+            score = sum(2 if match_type == 'original' else 1 for match_type in match_types)
+            if current_match_indices and len(current_match_indices) == (max(current_match_indices) - min(current_match_indices) + 1):
+                score *= 1.5
+            if 0 in current_match_indices:
+                score *= 1.2
+
+            match = {
+                'score': score,
+                'indices': current_match_indices,
+            }
+            if best_match is None or score > best_match['score']:
+                best_match = match
+
+        return best_match
+
+
+class BitParallelMatcher(ClassicMatcher):
+    """
+    位并行（Shift-And 思路）匹配实现。
+    建索引时把每个字符的可搜索键编码为位掩码：掩码的第 i 位表示第 i 个字符可以被该键消费。
+    匹配时对关键词的第 j 个字符取掩码并右移 j 位后逐个相与，剩下的位即为所有合法起点，
+    无需逐起点切片比较。输出的得分与命中下标与 ClassicMatcher 完全一致。
+    以下情况无法用单字符掩码表达，会退回 ClassicMatcher：
+    - 字符小写后不是单个字符，或拼音键不是单个字符；
+    - 多关键词搜索中需要跳过已被前序关键词占用的下标。
+    """
+
+    name = "bitparallel"
+
+    def compile(self, char_map):
+        """将字符映射表编码为可 JSON 序列化的位掩码表；不满足单字符前提时返回 None。"""
+        if not char_map:
+            return None
+
+        original_masks = {}
+        key_masks = {}
+        for position, char_info in enumerate(char_map):
+            char_lower = char_info.char.lower()
+            if len(char_lower) != 1:
+                return None
+            bit = 1 << position
+            original_masks[char_lower] = original_masks.get(char_lower, 0) | bit
+            for key in char_info.keys:
+                if len(key) != 1:
+                    return None
+                key_masks[key] = key_masks.get(key, 0) | bit
+
+        return {
+            'length': len(char_map),
+            'original': original_masks,
+            # 不含汉字的文本两张表相同，共用一份
+            'keys': original_masks if key_masks == original_masks else key_masks,
+        }
+
+    def match(self, keyword, char_map, compiled=None, pinyin_search_enabled=False, used_indices=None):
+        if compiled is None or used_indices:
+            return super().match(keyword, char_map, compiled, pinyin_search_enabled, used_indices)
+        if not keyword or not char_map:
+            return None
+
+        keyword_length = len(keyword)
+        map_length = compiled['length']
+        if keyword_length > map_length:
+            return None
+
+        original_masks = compiled['original']
+        search_masks = compiled['keys'] if pinyin_search_enabled else original_masks
+
+        # 起点 s 必须满足 s + len(keyword) <= len(char_map)
+        starts = (1 << (map_length - keyword_length + 1)) - 1
+        for offset, kw_char in enumerate(keyword):
+            mask = search_masks.get(kw_char)
+            if not mask:
+                return None
+            starts &= mask >> offset
+            if not starts:
+                return None
+
+        best_score = None
+        best_start = None
+        while starts:
+            lowest_bit = starts & -starts
+            start_idx = lowest_bit.bit_length() - 1
+            starts ^= lowest_bit
+
+            original_count = keyword_length
+            if pinyin_search_enabled:
+                original_count = sum(
+                    (original_masks.get(kw_char, 0) >> (start_idx + offset)) & 1
+                    for offset, kw_char in enumerate(keyword)
+                )
+            # 与 ClassicMatcher 保持相同的运算顺序，确保浮点结果逐位一致
+            score = original_count * 2 + (keyword_length - original_count)
+            score *= 1.5
+            if start_idx == 0:
+                score *= 1.2
+
+            if best_score is None or score > best_score:
+                best_score = score
+                best_start = start_idx
+
+        return {
+            'score': best_score,
+            'indices': set(range(best_start, best_start + keyword_length)),
+        }
+
+
+def score_block(matcher, block, keywords, pinyin_search_enabled=False):
+    """
+    对单个词条块计算所有关键词的综合得分。
+    全部关键词命中时返回 (得分, 高亮分组)，否则返回 None。
+    """
+    char_map = block.char_map
+    alias_entries = block.alias_search_entries
+    if not char_map and not alias_entries:
+        return None
+
+    highlight_groups = {}
+    total_score = 0
+    used_indices_for_block = set()
+
+    for kw_idx, kw in enumerate(keywords):
+        best_target = None
+
+        parent_match = matcher.match(
+            kw,
+            char_map,
+            pinyin_search_enabled=pinyin_search_enabled,
+            used_indices=used_indices_for_block,
+            compiled=block.char_masks
+        )
+        if parent_match:
+            best_target = {
+                'target': 'parent',
+                'score': parent_match['score'],
+                'indices': parent_match['indices']
+            }
+
+        for alias_entry in alias_entries:
+            alias_match = matcher.match(
+                kw,
+                alias_entry.get('char_map', []),
+                pinyin_search_enabled=pinyin_search_enabled,
+                compiled=alias_entry.get('char_masks')
+            )
+            if not alias_match:
+                continue
+
+            alias_score = alias_match['score'] * 0.75
+            if best_target is None or alias_score > best_target['score']:
+                best_target = {
+                    'target': 'alias',
+                    'score': alias_score,
+                    'indices': set()
+                }
+
+        if not best_target:
+            return None
+
+        total_score += best_target['score']
+        if best_target['target'] == 'parent':
+            used_indices_for_block.update(best_target['indices'])
+            highlight_groups[kw_idx] = best_target['indices']
+
+    # 距离惩罚
+    if len(highlight_groups) > 1:
+        all_indices = set().union(*highlight_groups.values())
+        span = max(all_indices) - min(all_indices)
+        total_score /= (1 + span * 0.1)
+
+    return total_score, build_highlight_groups(block, highlight_groups)
+
+
+def build_highlight_groups(block, highlight_groups):
+    """
+    将父级文本内的命中下标换算为 full_content 中的精确高亮位置。
+    正文未驻留的词条（惰性正文模式）使用释放正文时记下的 parent_offset。
+    """
+    parent_start_in_full = block.parent_offset
+    if parent_start_in_full is None:
+        parent_start_in_full = block.full_content.find(block.parent)
+    if parent_start_in_full != -1 and highlight_groups:
+        return {
+            g_idx: {idx + parent_start_in_full for idx in g_indices}
+            for g_idx, g_indices in highlight_groups.items()
+        }
+    return {}
+
+
+MATCHER_CLASSES = {
+    ClassicMatcher.name: ClassicMatcher,
+    BitParallelMatcher.name: BitParallelMatcher,
+}
+
+
+def create_matcher(engine_name):
+    """根据设置项创建匹配引擎，未知名称回退到位并行实现。"""
+    matcher_class = MATCHER_CLASSES.get(engine_name, BitParallelMatcher)
+    return matcher_class()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from core.word_block import WordBlock, CharInfo
+
+
+def _deep_size(obj, seen):
+    """递归累计对象及其引用的容器、字符串的内存占用；被多处共享的对象只计一次。"""
+    if obj is None or isinstance(obj, (bool, type)) or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_size(key, seen) + _deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _deep_size(item, seen)
+    elif isinstance(obj, WordBlock):
+        for value in obj.assigned_fields().values():
+            size += _deep_size(value, seen)
+    elif isinstance(obj, CharInfo):
+        size += _deep_size(obj.char, seen) + _deep_size(obj.keys, seen)
+    return size
+
+
+def measure_blocks(blocks):
+    """
+    统计一组词条常驻内存的近似大小，返回 {'entries', 'total_bytes', 'bytes_per_entry'}。
+    共享的对象（驻留的路径字符串、CharInfo、小整数等）只计一次，结果反映这些词条实际摊到的内存。
+    """
+    seen = set()
+    total_bytes = sum(_deep_size(block, seen) for block in blocks)
+    entries = len(blocks)
+    return {
+        'entries': entries,
+        'total_bytes': total_bytes,
+        'bytes_per_entry': total_bytes // entries if entries else 0,
+    }
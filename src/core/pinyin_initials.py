@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+
+class PinyinInitials:
+    """
+    一段文本的多音字首字母的惰性表示。
+    每个位置保存该位置所有可能的首字母（非汉字片段原样保留，可能是多字符串）。
+    判断某个首字母串是否匹配时，用一个小型自动机推进“已消费到的偏移集合”，
+    不再枚举所有组合：耗时只与位置数、每个位置的候选数和首字母串长度成正比。
+    """
+
+    def __init__(self, position_options):
+        self.position_options = [tuple(sorted(set(options))) for options in position_options]
+
+    def __len__(self):
+        return len(self.position_options)
+
+    def matches(self, initials):
+        """initials 是否恰好等于某一种首字母组合。"""
+        offsets = {0}
+        for options in self.position_options:
+            next_offsets = set()
+            for offset in offsets:
+                for option in options:
+                    if initials.startswith(option, offset):
+                        next_offsets.add(offset + len(option))
+            if not next_offsets:
+                return False
+            offsets = next_offsets
+        return len(initials) in offsets
+
+    def matches_prefix(self, initials):
+        """initials 是否为某一种首字母组合的前缀。"""
+        target = len(initials)
+        offsets = {0}
+        for options in self.position_options:
+            if target in offsets:
+                return True
+            next_offsets = set()
+            for offset in offsets:
+                rest = initials[offset:]
+                for option in options:
+                    # 剩余部分落在当前位置的候选内部，同样算作前缀
+                    if option.startswith(rest):
+                        return True
+                    if rest.startswith(option):
+                        next_offsets.add(offset + len(option))
+            if not next_offsets:
+                return False
+            offsets = next_offsets
+        return target in offsets
+
+    def combination_count(self):
+        """组合总数（仅用于诊断），按位置候选数相乘得到，不会真正展开组合。"""
+        count = 1
+        for options in self.position_options:
+            count *= len(options)
+        return count
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from core.config import *
+
+_load_lock = threading.Lock()
+_pinyin_api = None
+
+
+def get_pinyin():
+    """
+    返回 (pinyin, Style)。首次调用时才导入 pypinyin 并加载 pypinyin-dict 修正词典。
+    两者合计需要一秒以上，而拼音首字母查表和词库缓存都有效时，启动过程完全用不到它们。
+    """
+    global _pinyin_api
+    if _pinyin_api is None:
+        with _load_lock:
+            if _pinyin_api is None:
+                _pinyin_api = _load_pinyin()
+    return _pinyin_api
+
+
+def _load_pinyin():
+    started_at = time.perf_counter()
+    from pypinyin import pinyin, Style
+
+    # --- 拼音库修正 ---
+    # 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
+    try:
+        from pypinyin_dict.pinyin_data import kxhc1983
+        kxhc1983.load()
+        from pypinyin_dict.phrase_pinyin_data import cc_cedict
+        cc_cedict.load()
+        print("成功加载 pypinyin-dict 修正词典。")
+    except ImportError:
+        print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+
+    log(f"pypinyin 及修正词典已按需加载，耗时 {time.perf_counter() - started_at:.2f}s。")
+    return pinyin, Style
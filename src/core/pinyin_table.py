@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+from array import array
+from importlib.metadata import version, PackageNotFoundError
+
+from core.config import *
+from core.pinyin_loader import get_pinyin
+
+CJK_TABLE_START = 0x4E00
+CJK_TABLE_END = 0x9FA5
+# 位 0-25 对应 a-z；首字母中出现非 a-z 字符时置此位，查表时回退到 pypinyin
+FALLBACK_BIT = 1 << 31
+
+TABLE_MAGIC = b"QKPY"
+TABLE_FORMAT_VERSION = 1
+
+
+def _package_version(name):
+    """读取已安装包的版本号（只读包元数据，不导入包本身）；未安装时返回 'none'。"""
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return 'none'
+
+
+def _table_signature():
+    """数据来源签名：pypinyin 或 pypinyin-dict 版本变化时需要重建查表。"""
+    return f"{_package_version('pypinyin')}|{_package_version('pypinyin-dict')}".encode('utf-8')
+
+
+def heteronym_initials(char):
+    """用 pypinyin 取单个字符所有可能的拼音首字母（查表不可用时的回退路径）。"""
+    pinyin, Style = get_pinyin()
+    return pinyin(char, style=Style.FIRST_LETTER, heteronym=True)[0]
+
+
+class PinyinInitialsTable:
+    """
+    U+4E00–U+9FA5 汉字到拼音首字母位掩码的静态查表。
+    首次运行时用 pypinyin（含 pypinyin-dict 修正）逐字生成，以紧凑的 array 二进制写入用户数据目录；
+    之后启动只需读入约 80KB 的数据，建索引时每个汉字一次查表即可得到全部多音首字母，
+    查表有效时启动过程无需导入 pypinyin。
+    """
+
+    def __init__(self, masks):
+        self.masks = masks
+        self._letters_by_mask = {}
+
+    @staticmethod
+    def _mask_for(char):
+        mask = 0
+        for initial in heteronym_initials(char):
+            if len(initial) == 1 and 'a' <= initial <= 'z':
+                mask |= 1 << (ord(initial) - 97)
+            else:
+                mask |= FALLBACK_BIT
+        return mask
+
+    @classmethod
+    def build(cls):
+        masks = array('I', (cls._mask_for(chr(code)) for code in range(CJK_TABLE_START, CJK_TABLE_END + 1)))
+        return cls(masks)
+
+    @classmethod
+    def load(cls, file_path):
+        """读取磁盘上的查表；文件不存在、格式不符或数据来源已变化时返回 None。"""
+        signature = _table_signature()
+        try:
+            with open(file_path, 'rb') as f:
+                header = f.read(len(TABLE_MAGIC) + 3)
+                if len(header) != len(TABLE_MAGIC) + 3 or not header.startswith(TABLE_MAGIC):
+                    return None
+                format_version, signature_length = struct.unpack('<BH', header[len(TABLE_MAGIC):])
+                if format_version != TABLE_FORMAT_VERSION or f.read(signature_length) != signature:
+                    return None
+                masks = array('I')
+                masks.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if len(masks) != CJK_TABLE_END - CJK_TABLE_START + 1:
+            return None
+        return cls(masks)
+
+    def save(self, file_path):
+        signature = _table_signature()
+        temp_path = file_path + ".tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(TABLE_MAGIC)
+                f.write(struct.pack('<BH', TABLE_FORMAT_VERSION, len(signature)))
+                f.write(signature)
+                f.write(self.masks.tobytes())
+            os.replace(temp_path, file_path)
+        except OSError as e:
+            log(f"保存拼音首字母查表失败: {e}")
+
+    @classmethod
+    def load_or_build(cls, file_path):
+        table = cls.load(file_path)
+        if table is not None:
+            return table
+        log("拼音首字母查表不存在或已过期，正在重新生成...")
+        table = cls.build()
+        table.save(file_path)
+        return table
+
+    def initials_for(self, char):
+        """返回单个汉字所有可能的拼音首字母；表外字符或无法用位掩码表示时回退到 pypinyin。"""
+        code = ord(char)
+        if not CJK_TABLE_START <= code <= CJK_TABLE_END:
+            return heteronym_initials(char)
+
+        mask = self.masks[code - CJK_TABLE_START]
+        if mask & FALLBACK_BIT:
+            return heteronym_initials(char)
+
+        letters = self._letters_by_mask.get(mask)
+        if letters is None:
+            letters = [chr(97 + bit) for bit in range(26) if mask >> bit & 1]
+            self._letters_by_mask[mask] = letters
+        return letters
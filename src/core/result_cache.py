@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import threading
+from collections import OrderedDict
+
+
+class QueryResultCache:
+    """
+    跨弹窗会话的查询结果 LRU 缓存。
+    键为 (查询文本, 多关键词开关, 拼音开关, 结果代数)；结果代数在词库重载、收藏/最近使用刷新时递增，
+    旧代的条目不会再被命中，同时整体清空以释放内存。
+    容量同时受条目数与缓存的候选总数限制，超出时从最久未使用的条目开始淘汰。
+    搜索线程读写、界面线程清空，所有操作由 lock 串行化。
+    """
+
+    def __init__(self, max_entries=64, max_items=200000):
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self.entries = OrderedDict()
+        self.item_count = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(entry):
+        return len(entry['scored_blocks'])
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, scored_blocks):
+        """缓存一次查询的打分结果，返回缓存条目；容量为 0 或结果过大时不缓存，直接返回临时条目。"""
+        entry = {'scored_blocks': scored_blocks, 'ranked': None, 'ranked_limit': None}
+        if self.max_entries <= 0 or self._entry_size(entry) > self.max_items:
+            return entry
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.item_count -= self._entry_size(previous)
+            self.entries[key] = entry
+            self.item_count += self._entry_size(entry)
+
+            while len(self.entries) > self.max_entries or self.item_count > self.max_items:
+                _, evicted = self.entries.popitem(last=False)
+                self.item_count -= self._entry_size(evicted)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.item_count = 0
+
+    def stats(self):
+        """返回命中统计，供诊断日志使用。"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'items': self.item_count,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
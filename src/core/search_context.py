@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+
+class SearchContext:
+    """
+    单次弹窗会话内的增量搜索上下文。
+    记住上一次查询的关键词、命中词条与得分；当新查询只是在上一次的最后一个关键词后继续输入时，
+    新查询的命中集合必然是旧命中集合的子集，只需在旧命中集合上重新过滤即可。
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.keywords = None
+        self.multi_word_search_enabled = None
+        self.pinyin_search_enabled = None
+        self.generation = None
+        self.scored_blocks = []
+
+    def _same_settings(self, multi_word_search_enabled, pinyin_search_enabled, generation):
+        return (
+            self.keywords is not None
+            and self.multi_word_search_enabled == multi_word_search_enabled
+            and self.pinyin_search_enabled == pinyin_search_enabled
+            and self.generation == generation
+        )
+
+    def is_same_query(self, keywords, multi_word_search_enabled, pinyin_search_enabled, generation):
+        return (
+            self._same_settings(multi_word_search_enabled, pinyin_search_enabled, generation)
+            and self.keywords == keywords
+        )
+
+    def can_refine(self, keywords, multi_word_search_enabled, pinyin_search_enabled, generation):
+        """
+        仅当关键词拆分方式不变、前面的关键词完全相同、且最后一个关键词只是向后延长时才可增量过滤。
+        退格、插入空格导致拆分变化、或修改中间关键词都会回退到全量搜索。
+        """
+        if not self._same_settings(multi_word_search_enabled, pinyin_search_enabled, generation):
+            return False
+        if len(keywords) != len(self.keywords):
+            return False
+        if keywords[:-1] != self.keywords[:-1]:
+            return False
+        return keywords[-1].startswith(self.keywords[-1])
+
+    @property
+    def matched_blocks(self):
+        return [item['block'] for item in self.scored_blocks]
+
+    def remember(self, keywords, multi_word_search_enabled, pinyin_search_enabled, generation, scored_blocks):
+        self.keywords = list(keywords)
+        self.multi_word_search_enabled = multi_word_search_enabled
+        self.pinyin_search_enabled = pinyin_search_enabled
+        self.generation = generation
+        self.scored_blocks = scored_blocks
+
+
+class SearchCancelled(Exception):
+    """查询已被更新的输入取代，搜索线程应立即放弃当前结果。"""
+
+
+class CancellationToken:
+    """
+    单次查询的取消令牌。界面线程在新的按键到来时调用 cancel()，
+    搜索线程在词条循环中定期调用 raise_if_cancelled() 检查。
+    """
+
+    # 每处理多少个词条检查一次取消状态，兼顾响应速度与循环开销
+    CHECK_INTERVAL = 256
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise SearchCancelled()
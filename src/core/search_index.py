@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+from array import array
+
+from core.config import *
+
+
+def collect_block_search_keys(block):
+    """
+    收集一个词条块所有可被关键词消费的字符。
+    返回 (原字符集合, 拼音首字母集合)，父级文本与别名都会计入。
+    """
+    original_chars = set()
+    pinyin_chars = set()
+    char_maps = [block.char_map]
+    char_maps.extend(entry.get('char_map', ()) for entry in block.alias_search_entries)
+
+    for char_map in char_maps:
+        for char_info in char_map:
+            original_chars.update(char_info.char.lower())
+            for key in char_info.keys:
+                pinyin_chars.update(key)
+
+    return original_chars, pinyin_chars
+
+
+class SourceIndex:
+    """单个词库文件的倒排表：字符 -> 该文件内词条的局部序号（升序 array）。"""
+
+    def __init__(self, source_key):
+        self.source_key = source_key
+        self.global_positions = array('I')
+        self.original_postings = {}
+        self.pinyin_postings = {}
+
+    def add_block(self, block, global_position):
+        local_idx = len(self.global_positions)
+        self.global_positions.append(global_position)
+        original_chars, pinyin_chars = collect_block_search_keys(block)
+        for char in original_chars:
+            self.original_postings.setdefault(char, []).append(local_idx)
+        for char in pinyin_chars:
+            self.pinyin_postings.setdefault(char, []).append(local_idx)
+
+    def with_global_positions(self, global_positions):
+        """返回共享同一组倒排表、只替换全局序号的副本；用于其他来源变化后本来源词条整体平移的情况。"""
+        source_index = SourceIndex(self.source_key)
+        source_index.global_positions = global_positions
+        source_index.original_postings = self.original_postings
+        source_index.pinyin_postings = self.pinyin_postings
+        return source_index
+
+    def freeze(self):
+        """将构建期的 list 收缩为紧凑的 array，降低常驻内存。"""
+        self.original_postings = {char: array('I', ids) for char, ids in self.original_postings.items()}
+        self.pinyin_postings = {char: array('I', ids) for char, ids in self.pinyin_postings.items()}
+
+    def _posting_for(self, char, pinyin_search_enabled):
+        original = self.original_postings.get(char)
+        if not pinyin_search_enabled:
+            return original
+        pinyin_posting = self.pinyin_postings.get(char)
+        if original is None:
+            return pinyin_posting
+        if pinyin_posting is None:
+            return original
+        # 拼音键本身就包含字符小写形式，两者取并集即可
+        return set(original).union(pinyin_posting)
+
+    def lookup(self, required_chars, pinyin_search_enabled):
+        """返回同时包含所有必需字符的全局序号列表。"""
+        postings = []
+        for char in required_chars:
+            posting = self._posting_for(char, pinyin_search_enabled)
+            if not posting:
+                return []
+            postings.append(posting)
+
+        postings.sort(key=len)
+        local_ids = set(postings[0])
+        for posting in postings[1:]:
+            local_ids.intersection_update(posting)
+            if not local_ids:
+                return []
+
+        return [self.global_positions[local_idx] for local_idx in local_ids]
+
+
+class ClipboardIndex:
+    """
+    剪贴板历史的增量倒排表：字符 -> 含该字符的剪贴板词条集合。
+    剪贴板随每次复制增删单个词条，倒排表原地增删，不像 SourceIndex 那样整体重建；
+    键的含义与 SourceIndex 相同，匹配规则因此与词库词条一致。
+    每个词条记下加入时的序号，查询结果据此按从新到旧排列。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self):
+        return len(self.block_keys)
+
+    def clear(self):
+        self.next_sequence = 0
+        self.original_postings = {}
+        self.pinyin_postings = {}
+        self.block_keys = {} # 词条 -> (序号, 原字符集合, 拼音首字母集合)，删除时据此找回所在的倒排表
+
+    def add_block(self, block):
+        if block in self.block_keys:
+            return
+        original_chars, pinyin_chars = collect_block_search_keys(block)
+        self.block_keys[block] = (self.next_sequence, original_chars, pinyin_chars)
+        self.next_sequence += 1
+        for char in original_chars:
+            self.original_postings.setdefault(char, set()).add(block)
+        for char in pinyin_chars:
+            self.pinyin_postings.setdefault(char, set()).add(block)
+
+    def remove_block(self, block):
+        keys = self.block_keys.pop(block, None)
+        if keys is None:
+            return
+        _, original_chars, pinyin_chars = keys
+        for postings, chars in ((self.original_postings, original_chars), (self.pinyin_postings, pinyin_chars)):
+            for char in chars:
+                posting = postings.get(char)
+                if posting is None:
+                    continue
+                posting.discard(block)
+                if not posting:
+                    del postings[char]
+
+    def _posting_for(self, char, pinyin_search_enabled):
+        original = self.original_postings.get(char)
+        if not pinyin_search_enabled:
+            return original
+        pinyin_posting = self.pinyin_postings.get(char)
+        if original is None:
+            return pinyin_posting
+        if pinyin_posting is None:
+            return original
+        return original | pinyin_posting
+
+    def candidates(self, keywords, pinyin_search_enabled=False):
+        """返回可能命中所有关键词的剪贴板词条，最新加入的在前。"""
+        required_chars = set()
+        for keyword in keywords:
+            required_chars.update(keyword)
+
+        if required_chars:
+            postings = []
+            for char in required_chars:
+                posting = self._posting_for(char, pinyin_search_enabled)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                matched.intersection_update(posting)
+                if not matched:
+                    return []
+        else:
+            matched = self.block_keys
+
+        return sorted(matched, key=lambda block: self.block_keys[block][0], reverse=True)
+
+
+class SearchIndex:
+    """
+    词条搜索的倒排索引。
+    以“原字符”和“拼音首字母”为键，关键词中的每个字符都必须能被某个字符映射消费，
+    因此只有包含全部查询字符的词条才可能命中，其余词条无需进入逐字打分。
+    索引按来源文件分组，便于后续只替换单个文件的数据。
+    """
+
+    def __init__(self):
+        self.word_blocks = []
+        self.source_indexes = {}
+
+    def build(self, word_blocks):
+        self.word_blocks = word_blocks
+        self.source_indexes = {}
+        for position, block in enumerate(word_blocks):
+            source_key = normalize_library_path(block.source_path or '')
+            source_index = self.source_indexes.get(source_key)
+            if source_index is None:
+                source_index = SourceIndex(source_key)
+                self.source_indexes[source_key] = source_index
+            source_index.add_block(block, position)
+
+        for source_index in self.source_indexes.values():
+            source_index.freeze()
+        log(f"搜索索引已构建: {len(word_blocks)} 个词条，{len(self.source_indexes)} 个来源文件。")
+
+    @classmethod
+    def splice(cls, previous, word_blocks, owners, changed_keys):
+        """
+        在已有索引的基础上构建新索引：changed_keys 中的来源重新建倒排表，其余来源复用原倒排表，只更新全局序号。
+        owners[i] 为 word_blocks[i] 所属来源的键；未变化来源的词条在新列表中必须保持原有的相对顺序。
+        """
+        search_index = cls()
+        search_index.word_blocks = word_blocks
+        positions_by_source = {}
+        for position, owner in enumerate(owners):
+            positions = positions_by_source.get(owner)
+            if positions is None:
+                positions = positions_by_source[owner] = array('I')
+            positions.append(position)
+
+        rebuilt_count = 0
+        for source_key, positions in positions_by_source.items():
+            previous_index = previous.source_indexes.get(source_key)
+            if source_key in changed_keys or previous_index is None:
+                source_index = SourceIndex(source_key)
+                for position in positions:
+                    source_index.add_block(word_blocks[position], position)
+                source_index.freeze()
+                rebuilt_count += 1
+            else:
+                source_index = previous_index.with_global_positions(positions)
+            search_index.source_indexes[source_key] = source_index
+        log(f"搜索索引已增量更新: 重建 {rebuilt_count} 个来源文件，复用 {len(positions_by_source) - rebuilt_count} 个。")
+        return search_index
+
+    def position_owners(self):
+        """返回与 word_blocks 等长的列表，第 i 项为第 i 个词条所属来源的键。"""
+        owners = [None] * len(self.word_blocks)
+        for source_key, source_index in self.source_indexes.items():
+            for position in source_index.global_positions:
+                owners[position] = source_key
+        return owners
+
+    def candidate_positions(self, keywords, pinyin_search_enabled=False):
+        """返回可能命中所有关键词的词条在 word_blocks 中的升序下标。"""
+        required_chars = set()
+        for keyword in keywords:
+            required_chars.update(keyword)
+        if not required_chars:
+            return list(range(len(self.word_blocks)))
+
+        positions = []
+        for source_index in self.source_indexes.values():
+            positions.extend(source_index.lookup(required_chars, pinyin_search_enabled))
+        positions.sort()
+        return positions
+
+    def candidates(self, keywords, pinyin_search_enabled=False):
+        """按 word_blocks 原有顺序返回可能命中所有关键词的候选词条。"""
+        positions = self.candidate_positions(keywords, pinyin_search_enabled)
+        return [self.word_blocks[position] for position in positions]
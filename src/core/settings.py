@@ -1,41 +1,7 @@
 # -*- coding: utf-8 -*-
-import sys
 import os
-import webbrowser
 import configparser
-import hashlib
 import json
-import subprocess
-import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
 
 
 from core.config import *
@@ -127,12 +93,29 @@ class SettingsManager:
             self.multi_word_search = self.config.getboolean('Search', 'multi_word_search', fallback=True)
             self.pinyin_initial_search = self.config.getboolean('Search', 'pinyin_initial_search', fallback=True)
             self.highlight_matches = self.config.getboolean('Search', 'highlight_matches', fallback=True) # 新增
+            self.matcher_engine = self.config.get('Search', 'matcher_engine', fallback=MATCHER_ENGINE_BITPARALLEL)
+            if self.matcher_engine not in SUPPORTED_MATCHER_ENGINES:
+                self.matcher_engine = MATCHER_ENGINE_BITPARALLEL
+            self.vectorized_search = self.config.getboolean('Search', 'vectorized_search', fallback=False)
+            self.sharded_search = self.config.getboolean('Search', 'sharded_search', fallback=False)
+            self.shard_workers = max(0, self.config.getint('Search', 'shard_workers', fallback=0)) # 0 表示按 CPU 核数自动决定
+            self.result_limit = max(0, self.config.getint('Search', 'result_limit', fallback=200)) # 每页显示的结果数，0 表示不限制
+            self.result_cache_entries = max(0, self.config.getint('Search', 'result_cache_entries', fallback=64)) # 0 表示关闭查询结果缓存
+            self.cache_json_export = self.config.getboolean('Data', 'cache_json_export', fallback=False) # 额外导出 cache.json 便于调试
+            self.lazy_bodies = self.config.getboolean('Data', 'lazy_bodies', fallback=False) # 长词条正文不常驻内存，使用时再从词库文件读取
+            self.memory_report = self.config.getboolean('Data', 'memory_report', fallback=False) # 每次重载后在日志中输出词条内存占用
+            self.ranking_durability = self.config.get('Data', 'ranking_durability', fallback=RANKING_DURABILITY_BATCHED)
+            if self.ranking_durability not in SUPPORTED_RANKING_DURABILITY:
+                self.ranking_durability = RANKING_DURABILITY_BATCHED
+            self.ranking_flush_seconds = max(0.0, self.config.getfloat('Data', 'ranking_flush_seconds', fallback=1.0)) # batched 模式下攒批写入的间隔
             self.word_wrap_enabled = self.config.getboolean('UI', 'word_wrap_enabled', fallback=False)
             self.show_source_enabled = self.config.getboolean('UI', 'show_source_enabled', fallback=False)
             self.clipboard_memory_enabled = self.config.getboolean('Clipboard', 'enabled', fallback=False)
             self.clipboard_memory_count = self.config.getint('Clipboard', 'count', fallback=10)
             self.clipboard_auto_clear_enabled = self.config.getboolean('Clipboard', 'auto_clear_enabled', fallback=False)
             self.clipboard_auto_clear_minutes = self.config.getint('Clipboard', 'auto_clear_minutes', fallback=10)
+            self.clipboard_blob_threshold_kb = max(1, self.config.getint('Clipboard', 'blob_threshold_kb', fallback=64)) # 超过该大小的内容外置保存，历史中只留预览
+            self.clipboard_max_kb = max(0, self.config.getint('Clipboard', 'max_kb', fallback=65536)) # 超过该大小的内容不记录，0 表示不限制
             self.auto_restart_enabled = self.config.getboolean('Restart', 'enabled', fallback=False)
             self.auto_restart_interval = self.config.getint('Restart', 'interval_minutes', fallback=3)
             # 新的协议接受信息，存储为 JSON 字符串
@@ -184,6 +167,17 @@ class SettingsManager:
         self.config['Search']['multi_word_search'] = str(self.multi_word_search)
         self.config['Search']['pinyin_initial_search'] = str(self.pinyin_initial_search)
         self.config['Search']['highlight_matches'] = str(self.highlight_matches) # 新增
+        self.config['Search']['matcher_engine'] = self.matcher_engine
+        self.config['Search']['vectorized_search'] = str(self.vectorized_search)
+        self.config['Search']['sharded_search'] = str(self.sharded_search)
+        self.config['Search']['shard_workers'] = str(self.shard_workers)
+        self.config['Search']['result_limit'] = str(self.result_limit)
+        self.config['Search']['result_cache_entries'] = str(self.result_cache_entries)
+        self.config['Data']['cache_json_export'] = str(self.cache_json_export)
+        self.config['Data']['lazy_bodies'] = str(self.lazy_bodies)
+        self.config['Data']['memory_report'] = str(self.memory_report)
+        self.config['Data']['ranking_durability'] = self.ranking_durability
+        self.config['Data']['ranking_flush_seconds'] = str(self.ranking_flush_seconds)
         if not self.config.has_section('UI'): self.config.add_section('UI')
         self.config['UI']['word_wrap_enabled'] = str(self.word_wrap_enabled)
         self.config['UI']['show_source_enabled'] = str(self.show_source_enabled)
@@ -193,6 +187,8 @@ class SettingsManager:
         self.config['Clipboard']['count'] = str(self.clipboard_memory_count)
         self.config['Clipboard']['auto_clear_enabled'] = str(self.clipboard_auto_clear_enabled)
         self.config['Clipboard']['auto_clear_minutes'] = str(self.clipboard_auto_clear_minutes)
+        self.config['Clipboard']['blob_threshold_kb'] = str(self.clipboard_blob_threshold_kb)
+        self.config['Clipboard']['max_kb'] = str(self.clipboard_max_kb)
         self.config['Restart']['enabled'] = str(self.auto_restart_enabled)
         self.config['Restart']['interval_minutes'] = str(self.auto_restart_interval)
         self.config['Paste']['mode'] = self.paste_mode
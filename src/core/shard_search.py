@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+import multiprocessing
+
+from core.config import *
+from core.matcher import create_matcher, score_block
+from core.search_index import SourceIndex
+from core.word_block import WordBlock
+
+# 发送给工作进程的最小词条字段：只保留打分与高亮所需的数据
+SHARD_BLOCK_FIELDS = ('parent', 'full_content', 'parent_offset', 'char_map', 'char_masks', 'alias_search_entries')
+
+
+def _shard_worker_main(conn, engine_name):
+    """
+    工作进程主循环。每个进程常驻若干分片（按来源文件划分）的预处理字符映射表，
+    收到查询后先用分片自己的倒排表筛选候选，再逐条打分，返回 (分片键, 分片内序号, 得分, 高亮分组)。
+    """
+    matcher = create_matcher(engine_name)
+    shards = {}
+    while True:
+        try:
+            command = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        action = command[0]
+        if action == 'load':
+            _, shard_key, blocks = command
+            shard_index = SourceIndex(shard_key)
+            for local_idx, block in enumerate(blocks):
+                shard_index.add_block(block, local_idx)
+            shard_index.freeze()
+            shards[shard_key] = (blocks, shard_index)
+        elif action == 'drop':
+            shards.pop(command[1], None)
+        elif action == 'search':
+            _, keywords, pinyin_search_enabled = command
+            required_chars = set()
+            for keyword in keywords:
+                required_chars.update(keyword)
+            results = []
+            for shard_key, (blocks, shard_index) in shards.items():
+                for local_idx in shard_index.lookup(required_chars, pinyin_search_enabled):
+                    result = score_block(matcher, blocks[local_idx], keywords, pinyin_search_enabled)
+                    if result is not None:
+                        results.append((shard_key, local_idx, result[0], result[1]))
+            conn.send(results)
+        elif action == 'stop':
+            break
+
+    conn.close()
+
+
+class ShardedSearchPool:
+    """
+    常驻多进程分片搜索池。
+    词条按来源文件划分为分片，分片按词条数量均衡地分配给固定数量的工作进程；
+    一次查询并行下发到所有进程，再把各分片的命中结果汇总回主进程做统一排序。
+    重载时只向进程重新发送发生变化的文件对应的分片。
+    同步与查询可能分别来自界面线程和搜索线程，管道读写由 lock 串行化。
+    查询被取消时不等待剩余进程的回复，未读回复的个数记在 pending_replies 中，由下一次查询先行读出丢弃。
+    """
+
+    def __init__(self, worker_count, engine_name):
+        self.worker_count = max(1, worker_count)
+        self.engine_name = engine_name
+        self.workers = []
+        self.shard_owner = {}
+        self.shard_sizes = {}
+        self.worker_loads = []
+        self.pending_replies = [] # 每个工作进程尚未读取的过期查询回复数
+        self.generation = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def default_worker_count():
+        return max(1, min(8, (os.cpu_count() or 2) - 1))
+
+    def start(self):
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.worker_count):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_shard_worker_main,
+                args=(child_conn, self.engine_name),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self.workers.append((process, parent_conn))
+            self.worker_loads.append(0)
+            self.pending_replies.append(0)
+        log(f"分片搜索进程池已启动，共 {self.worker_count} 个工作进程。")
+
+    def stop(self):
+        with self.lock:
+            self._stop_workers()
+        log("分片搜索进程池已停止。")
+
+    def _stop_workers(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(('stop',))
+                conn.close()
+            except (OSError, ValueError):
+                pass
+            process.join(timeout=1.5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = []
+        self.shard_owner = {}
+        self.shard_sizes = {}
+        self.worker_loads = []
+        self.pending_replies = []
+        self.generation = None
+
+    def _drop_shard(self, shard_key):
+        worker_idx = self.shard_owner.pop(shard_key)
+        self.worker_loads[worker_idx] -= self.shard_sizes.pop(shard_key, 0)
+        self.workers[worker_idx][1].send(('drop', shard_key))
+
+    def sync(self, shard_blocks, changed_keys, generation):
+        """
+        同步分片：移除已不存在的分片，为新增或内容变化的分片重新下发数据，其余分片保持不动。
+        shard_blocks: {分片键: 该来源文件的词条列表（按 word_blocks 顺序）}
+        generation: 这批数据所属的词库代数
+        """
+        with self.lock:
+            self._sync_shards(shard_blocks, changed_keys)
+            self.generation = generation
+
+    def _sync_shards(self, shard_blocks, changed_keys):
+        for shard_key in list(self.shard_owner.keys()):
+            if shard_key not in shard_blocks or shard_key in changed_keys:
+                self._drop_shard(shard_key)
+
+        loaded = 0
+        for shard_key, blocks in shard_blocks.items():
+            if shard_key in self.shard_owner:
+                continue
+            worker_idx = min(range(len(self.workers)), key=lambda idx: self.worker_loads[idx])
+            payload = [WordBlock(**{field: getattr(block, field) for field in SHARD_BLOCK_FIELDS}) for block in blocks]
+            self.workers[worker_idx][1].send(('load', shard_key, payload))
+            self.shard_owner[shard_key] = worker_idx
+            self.shard_sizes[shard_key] = len(blocks)
+            self.worker_loads[worker_idx] += len(blocks)
+            loaded += 1
+
+        log(f"分片同步完成: 共 {len(shard_blocks)} 个分片，重新下发 {loaded} 个。")
+
+    def _discard_stale_replies(self):
+        """读出并丢弃被取消的查询留在管道中的回复，保证之后读到的都是本次查询的结果。"""
+        for worker_idx, count in enumerate(self.pending_replies):
+            conn = self.workers[worker_idx][1]
+            for _ in range(count):
+                conn.recv()
+            self.pending_replies[worker_idx] = 0
+
+    def search(self, keywords, pinyin_search_enabled=False, generation=None, cancel_token=None):
+        """
+        并行下发查询并收集全部分片的命中结果。
+        进程中的数据不属于调用方指定的词库代数时返回 None。
+        传入 cancel_token 时，下发前与等待每个进程回复期间都检查取消状态，已取消则抛出 SearchCancelled。
+        """
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return None
+            self._discard_stale_replies()
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            busy_workers = sorted(set(self.shard_owner.values()))
+            for worker_idx in busy_workers:
+                self.workers[worker_idx][1].send(('search', keywords, pinyin_search_enabled))
+                self.pending_replies[worker_idx] += 1
+
+            results = []
+            for worker_idx in busy_workers:
+                conn = self.workers[worker_idx][1]
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                    while not conn.poll(SHARD_CANCEL_POLL_SECONDS):
+                        cancel_token.raise_if_cancelled()
+                results.extend(conn.recv())
+                self.pending_replies[worker_idx] -= 1
+            return results
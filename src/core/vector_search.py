@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+from core.config import *
+
+# NumPy 为可选依赖：缺失时向量化引擎不可用，搜索自动回退到纯 Python 路径
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+_UNSEEN = object()
+
+
+def is_vector_search_available():
+    return np is not None
+
+
+class VectorIndex:
+    """
+    面向超大词库的 NumPy 批量打分引擎。
+    重载时把所有词条父级文本的小写码位与每个字符的拼音首字母位掩码（a-z 占 26 位）
+    拼接成连续数组（增量更新时由 splice 只重新编码变化的来源）；单关键词查询时，对整个数组按关键词的每个字符做一次向量化比较，
+    一次性得到所有合法起点及其得分，只把幸存者交给 Python 端的排序微调。
+    带别名或含有无法编码字符（小写后多字符、非 a-z 拼音键）的词条仍走逐条打分。
+    """
+
+    # CharInfo 全局驻留，相同字符的编码结果只计算一次（不同字符的数量很小）
+    _encoded_chars = {}
+
+    def __init__(self):
+        self.word_blocks = []
+        self.codes = None
+        self.initial_masks = None
+        self.block_positions = None
+        self.char_offsets = None
+        self.block_lengths = None
+        self.python_positions = set()
+
+    @staticmethod
+    def _encode_char(char_info):
+        """返回 (小写码位, 首字母位掩码)；无法编码时返回 None。"""
+        char_lower = char_info.char.lower()
+        if len(char_lower) != 1:
+            return None
+
+        mask = 0
+        for key in char_info.keys:
+            if 'a' <= key <= 'z' and len(key) == 1:
+                mask |= 1 << (ord(key) - 97)
+            elif key != char_lower:
+                return None
+        return ord(char_lower), mask
+
+    def _encode_rows(self, word_blocks, positions):
+        """
+        把 positions 处的词条编码为逐字符的数组列，返回 (码位, 首字母位掩码, 词条下标, 字符偏移, 词条长度) 五个列表。
+        无法编码的词条记入 python_positions。同一词条的字符在数组中连续且按偏移排列，不同词条之间的先后不影响匹配结果。
+        """
+        codes = []
+        initial_masks = []
+        block_positions = []
+        char_offsets = []
+        block_lengths = []
+        encoded_chars = self._encoded_chars
+
+        for position in positions:
+            block = word_blocks[position]
+            if block.alias_search_entries:
+                self.python_positions.add(position)
+                continue
+
+            char_map = block.char_map
+            encoded = []
+            for char_info in char_map:
+                encoded_char = encoded_chars.get(char_info, _UNSEEN)
+                if encoded_char is _UNSEEN:
+                    encoded_char = encoded_chars[char_info] = self._encode_char(char_info)
+                if encoded_char is None:
+                    break
+                encoded.append(encoded_char)
+            else:
+                map_length = len(char_map)
+                for offset, (code, mask) in enumerate(encoded):
+                    codes.append(code)
+                    initial_masks.append(mask)
+                    block_positions.append(position)
+                    char_offsets.append(offset)
+                    block_lengths.append(map_length)
+                continue
+
+            self.python_positions.add(position)
+
+        return codes, initial_masks, block_positions, char_offsets, block_lengths
+
+    def build(self, word_blocks):
+        self.word_blocks = word_blocks
+        self.python_positions = set()
+        codes, initial_masks, block_positions, char_offsets, block_lengths = self._encode_rows(word_blocks, range(len(word_blocks)))
+
+        self.codes = np.array(codes, dtype=np.int32)
+        self.initial_masks = np.array(initial_masks, dtype=np.uint32)
+        self.block_positions = np.array(block_positions, dtype=np.int32)
+        self.char_offsets = np.array(char_offsets, dtype=np.int32)
+        self.block_lengths = np.array(block_lengths, dtype=np.int32)
+        log(f"向量化索引已构建: {len(codes)} 个字符，{len(self.python_positions)} 个词条走逐条打分。")
+
+    @classmethod
+    def splice(cls, previous, word_blocks, previous_search_index, search_index, changed_keys):
+        """
+        增量更新时在旧索引的基础上构建新索引，与 SearchIndex.splice 对应：
+        未变化来源的字符行原样保留，只按新旧全局序号的对应关系改写词条下标（整列的 NumPy 运算），
+        只有 changed_keys 中来源的词条重新编码。previous 必须与 previous_search_index 属于同一份快照。
+        """
+        old_to_new = np.full(len(previous.word_blocks), -1, dtype=np.int64)
+        rebuilt_positions = []
+        for source_key, source_index in search_index.source_indexes.items():
+            previous_source = previous_search_index.source_indexes.get(source_key)
+            if source_key in changed_keys or previous_source is None:
+                rebuilt_positions.extend(source_index.global_positions)
+            elif len(previous_source.global_positions):
+                old_to_new[np.asarray(previous_source.global_positions, dtype=np.int64)] = np.asarray(
+                    source_index.global_positions, dtype=np.int64
+                )
+
+        vector_index = cls()
+        vector_index.word_blocks = word_blocks
+        vector_index.python_positions = {
+            int(old_to_new[position]) for position in previous.python_positions if old_to_new[position] >= 0
+        }
+        codes, initial_masks, block_positions, char_offsets, block_lengths = vector_index._encode_rows(
+            word_blocks, sorted(rebuilt_positions)
+        )
+
+        remapped_positions = old_to_new[previous.block_positions]
+        kept = remapped_positions >= 0
+        vector_index.codes = np.concatenate((previous.codes[kept], np.array(codes, dtype=np.int32)))
+        vector_index.initial_masks = np.concatenate((previous.initial_masks[kept], np.array(initial_masks, dtype=np.uint32)))
+        vector_index.block_positions = np.concatenate(
+            (remapped_positions[kept].astype(np.int32), np.array(block_positions, dtype=np.int32))
+        )
+        vector_index.char_offsets = np.concatenate((previous.char_offsets[kept], np.array(char_offsets, dtype=np.int32)))
+        vector_index.block_lengths = np.concatenate((previous.block_lengths[kept], np.array(block_lengths, dtype=np.int32)))
+        log(f"向量化索引已增量更新: 重新编码 {len(rebuilt_positions)} 个词条，共 {len(vector_index.codes)} 个字符。")
+        return vector_index
+
+    def match_single_keyword(self, keyword, pinyin_search_enabled=False):
+        """
+        对全部可编码词条做单关键词向量化匹配。
+        返回 {词条下标: (得分, 起点)}，得分与起点规则与 BitParallelMatcher/ClassicMatcher 一致：
+        同一词条取得分最高且最靠前的起点。
+        """
+        keyword_length = len(keyword)
+        total_chars = len(self.codes)
+        window_count = total_chars - keyword_length + 1
+        if not keyword_length or window_count <= 0:
+            return {}
+
+        valid = (self.char_offsets[:window_count] + keyword_length) <= self.block_lengths[:window_count]
+        original_count = np.zeros(window_count, dtype=np.int32)
+
+        for offset, kw_char in enumerate(keyword):
+            window_codes = self.codes[offset:offset + window_count]
+            original_hit = window_codes == ord(kw_char)
+            if pinyin_search_enabled and 'a' <= kw_char <= 'z':
+                bit = np.uint32(1 << (ord(kw_char) - 97))
+                window_masks = self.initial_masks[offset:offset + window_count]
+                valid &= original_hit | ((window_masks & bit) != 0)
+            else:
+                valid &= original_hit
+            original_count += original_hit
+
+        starts = np.nonzero(valid)[0]
+        if not len(starts):
+            return {}
+
+        # 与逐条匹配相同的运算顺序：整数基础分 -> *1.5（连续命中）-> 行首命中再 *1.2
+        scores = (original_count[starts] + keyword_length).astype(np.float64)
+        scores *= 1.5
+        at_line_start = self.char_offsets[starts] == 0
+        scores[at_line_start] *= 1.2
+
+        owners = self.block_positions[starts]
+        order = np.lexsort((starts, -scores, owners))
+        owners = owners[order]
+        first_of_owner = np.ones(len(owners), dtype=bool)
+        first_of_owner[1:] = owners[1:] != owners[:-1]
+
+        best = order[first_of_owner]
+        return {
+            int(owner): (float(score), int(offset))
+            for owner, score, offset in zip(
+                self.block_positions[starts[best]],
+                scores[best],
+                self.char_offsets[starts[best]],
+            )
+        }
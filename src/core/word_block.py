@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import sys
+
+
+class CharInfo:
+    """
+    字符映射表中的一项：字符本身与它的全部搜索键（小写形式和拼音首字母）。
+    搜索键只由字符决定，相同的 (字符, 搜索键) 通过 intern_char_info 全局共享一个实例，
+    字符映射表因此只是一个引用元组，不再为每个位置单独分配字典与列表。
+    """
+
+    __slots__ = ('char', 'keys')
+
+    def __init__(self, char, keys):
+        self.char = char
+        self.keys = keys
+
+    def __reduce__(self):
+        # 发送到分片进程后重新驻留，进程内同样只保留一份
+        return intern_char_info, (self.char, self.keys)
+
+
+_char_infos = {}
+
+
+def intern_char_info(char, keys):
+    """返回共享的 CharInfo；keys 可以是任意可迭代的字符串序列。"""
+    keys = tuple(keys)
+    info = _char_infos.get((char, keys))
+    if info is None:
+        info = CharInfo(sys.intern(char), tuple(sys.intern(key) for key in keys))
+        _char_infos[(char, keys)] = info
+    return info
+
+
+# 未赋值字段的默认值；可变字段一律用不可变的空值，避免实例之间意外共享
+WORD_BLOCK_DEFAULTS = {
+    'parent': '',
+    'full_content': None,
+    'exclude_parent': False,
+    'shortcut_code': None,
+    'aliases': (),
+    'source_path': None,
+    'is_clipboard': False,
+    'body_offset': None,
+    'body_length': None,
+    'parent_lower': '',
+    'char_map': (),
+    'char_masks': None,
+    'alias_search_entries': (),
+    'pinyin_sort_key': None,
+    'entry_id': None,
+    'is_favorite': False,
+    'usage_meta': None,
+    'content_crc': None,
+    'content_length': None,
+    'parent_offset': None,
+    'blob_digest': None,
+}
+
+
+class WordBlock:
+    """
+    一个词条的全部数据。
+    字段固定，使用 __slots__ 存储，比每个词条一个字典节省大半内存；未赋值的字段读取时返回 WORD_BLOCK_DEFAULTS 中的默认值。
+    解析阶段的字段：parent、full_content、exclude_parent、shortcut_code、aliases、source_path、
+    is_clipboard、body_offset / body_length（词条在文件中的字节范围）；
+    预处理产物：parent_lower、char_map（CharInfo 元组）、char_masks、alias_search_entries、pinyin_sort_key；
+    排序元数据：entry_id、is_favorite、usage_meta；
+    惰性正文模式下正文释放后记录 content_crc、content_length 与 parent_offset；
+    剪贴板大文本词条的 blob_digest 指向 BlobStore 中的完整文本。
+    """
+
+    __slots__ = tuple(WORD_BLOCK_DEFAULTS)
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        # 只有未赋值的槽位才会走到这里
+        try:
+            return WORD_BLOCK_DEFAULTS[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __repr__(self):
+        return f"WordBlock({self.parent!r}, source_path={self.source_path!r})"
+
+    @classmethod
+    def from_fields(cls, fields):
+        """由字段字典构建词条，忽略不认识的字段（例如旧版缓存中已废弃的键）。"""
+        return cls(**{name: value for name, value in fields.items() if name in WORD_BLOCK_DEFAULTS})
+
+    def assigned_fields(self):
+        """返回已赋值字段的 {字段名: 值}。"""
+        fields = {}
+        for name in self.__slots__:
+            try:
+                fields[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                continue
+        return fields
+
+    def copy(self):
+        return WordBlock(**self.assigned_fields())
@@ -1,99 +1,112 @@
 # -*- coding: utf-8 -*-
-import sys
+import io
 import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
 import re
-import itertools
+import zlib
+import heapq
 import threading
-import ctypes
+import time
 from datetime import datetime
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+from itertools import islice
 
 
 from core.config import *
-from core.word_source import WordSource
+from core.word_source import WordSource, parse_word_blocks
+from core.clipboard_history import ClipboardHistory
+from core.body_store import BodyStore, split_body_lines
+from core.blob_store import BlobStore
+from core.word_block import WordBlock, intern_char_info
+from core.memory_report import measure_blocks
+from core.search_index import SearchIndex
+from core.search_context import CancellationToken
+from core.library_snapshot import LibrarySnapshot
+from core.result_cache import QueryResultCache
+from core.pinyin_initials import PinyinInitials
+from core.pinyin_loader import get_pinyin
+from core.pinyin_table import PinyinInitialsTable, heteronym_initials
+from core.library_cache import LibraryCache
+from core.matcher import create_matcher, score_block, build_highlight_groups
+from core.vector_search import VectorIndex, is_vector_search_available
+from core.shard_search import ShardedSearchPool
 
 # --- 词库管理器 ---
 class WordManager:
-    def __init__(self, settings, ranking_state=None):
+    # 渐进加载时两次向界面线程汇报进度的最小间隔（秒），避免逐个文件合并造成界面抖动
+    PROGRESS_REPORT_INTERVAL = 0.15
+
+    def __init__(self, settings, ranking_state=None, load_libraries=True):
         self.settings = settings
         self.ranking_state = ranking_state
+        self.matcher = create_matcher(settings.matcher_engine) # 关键词匹配引擎（经典 / 位并行）
+        # 汉字 -> 拼音首字母查表。启动时只读取已有的表文件；需要重新生成（约 1.5 秒）时留给后台的 prepare_reload，
+        # 生成完成前逐字回退到 pypinyin，结果相同
+        self.pinyin_table = PinyinInitialsTable.load(PINYIN_TABLE_FILE)
         self.sources = []
         self.word_blocks = []
-        self.cache = {} # 新增：用于存储缓存数据
+        self.search_index = SearchIndex() # 倒排索引，用于缩小每次查询的候选集
+        self.vector_index = None # 可选的 NumPy 批量打分索引
+        self.shard_pool = None # 可选的多进程分片搜索池
+        self.library_generation = 0 # 词库代数，每次重载递增，用于使搜索上下文失效
+        self.snapshot = LibrarySnapshot(search_index=self.search_index) # 供搜索线程读取的一致数据视图
+        self.result_generation = 0 # 结果代数：词库或收藏/最近使用变化时递增，用于使结果缓存失效
+        self.result_cache = QueryResultCache(settings.result_cache_entries)
+        self.cache = LibraryCache(CACHE_BIN_FILE) # 词库二进制缓存（按文件分记录，按需解码）
         self.active_file_paths = set()
-        # 新增：剪贴板历史专用
-        self.clipboard_source = None
-        self.clipboard_history = []
-        self.reload_all()
+        self.library_order = {} # 规范化路径 -> 词库文件在设置中的先后次序，合并排序时用于打破同键平局
+        self.reload_lock = threading.Lock() # 串行化后台重载与增量更新对词库缓存的读写
+        self.last_reload_stats = {'adopted': 0, 'reused': 0, 'rebuilt': 0} # 最近一次重载中整文件复用 / 逐条比对复用 / 重新预处理的词条数
+        self.loading_progress = None # 渐进加载进行中时为 (已加载文件数, 文件总数)
+        self.body_store = BodyStore() # 惰性正文模式下按需回读词条正文
+        # 剪贴板历史：环形缓冲区 + 只追加的日志文件；超过阈值的大文本外置到 clipboard_blobs
+        self.clipboard_blobs = BlobStore(CLIPBOARD_BLOB_DIR)
+        self.clipboard = ClipboardHistory(
+            CLIPBOARD_HISTORY_FILE,
+            settings.clipboard_memory_count,
+            self._prepare_clipboard_block,
+            self._release_clipboard_block,
+        )
+        if load_libraries:
+            self.reload_all()
+        else:
+            # 词库稍后由后台线程渐进加载，剪贴板历史很小，先行加载
+            self.loading_progress = (0, 0)
+            self.load_clipboard_history()
 
     def _get_pinyin_sort_key(self, text):
+        pinyin, Style = get_pinyin()
         return "".join(item[0] for item in pinyin(text, style=Style.NORMAL))
 
     def _get_pinyin_initials(self, text):
-        # 开启多音字模式，获取所有首字母
-        initials_list = pinyin(text, style=Style.FIRST_LETTER, heteronym=True)
-        
-        # 生成所有可能的首字母组合
-        import itertools
-        # [[ 'd', 't'], ['q']] -> [('d', 'q'), ('t', 'q')]
-        all_combinations = list(itertools.product(*initials_list))
-        # -> ['dq', 'tq']
-        return ["".join(combo) for combo in all_combinations]
+        """
+        返回文本的多音字首字母表示（PinyinInitials）。
+        每个位置只保存候选首字母集合，用 matches()/matches_prefix() 判断，不再展开所有组合。
+        """
+        # 开启多音字模式，获取所有首字母：[['d', 't'], ['q']]
+        pinyin, Style = get_pinyin()
+        return PinyinInitials(pinyin(text, style=Style.FIRST_LETTER, heteronym=True))
 
     def _build_char_map(self, text):
         """
         为文本中的每个字符构建一个详细的搜索映射表。
         这是新搜索算法的核心，取代了旧的 _generate_hybrid_initials。
+        返回 CharInfo 元组，相同字符的映射项全局共享。
         """
+        pinyin_table = self.pinyin_table
         char_map = []
-        for index, char in enumerate(text):
+        for char in text:
             char_lower = char.lower()
             # 默认搜索键是字符本身的小写形式
             keys = [char_lower]
             
             # 如果是汉字，添加所有可能的拼音首字母
             if '\u4e00' <= char <= '\u9fa5':
-                initials = pinyin(char, style=Style.FIRST_LETTER, heteronym=True)[0]
+                initials = pinyin_table.initials_for(char) if pinyin_table is not None else heteronym_initials(char)
                 keys.extend(initials)
                 # 去重，例如对于 '和'，keys 会是 ['h', 'h', 'h']，去重后为 ['h']
                 keys = sorted(list(set(keys)))
             
-            char_map.append({
-                'char': char,
-                'keys': keys,
-                'index': index
-            })
-        return char_map
+            char_map.append(intern_char_info(char, keys))
+        return tuple(char_map)
 
     def _normalize_aliases(self, aliases):
         """清洗别名列表，保留原顺序并按小写去重。"""
@@ -111,186 +124,128 @@ class WordManager:
         return normalized_aliases
 
     def _get_file_hash(self, file_path):
-        """计算文件的MD5哈希值"""
-        hasher = hashlib.md5()
+        """计算文件内容摘要（CRC32 + 文件大小，分块读取）。只用于判断内容是否变化，不需要密码学强度。"""
+        checksum = 0
+        size = 0
         try:
             with open(file_path, 'rb') as f:
-                buf = f.read()
-                hasher.update(buf)
-            return hasher.hexdigest()
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    checksum = zlib.crc32(chunk, checksum)
+                    size += len(chunk)
+            return f"crc32:{size}:{checksum:08x}"
         except FileNotFoundError:
             return None
 
-    def _load_cache(self):
-        """
-        尝试从文件加载缓存。
-        【已加固】确保在任何情况下（文件不存在、JSON损坏、权限问题）都能安全返回一个空字典。
-        """
-        if not os.path.exists(CACHE_FILE):
-            log("缓存文件不存在，将跳过加载。")
-            return {}
+    def _get_stat_signature(self, file_path):
+        """返回文件的 (大小, 修改时间纳秒, inode) 签名；文件不存在时返回 None。"""
         try:
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # 健壮性检查：确保 cache_data 是一个字典
-            if not isinstance(cache_data, dict):
-                log("缓存文件格式错误：顶层结构不是一个字典。将创建新缓存。")
-                return {}
-
-            # 版本校验
-            if cache_data.get("version") != VERSION:
-                log(f"缓存版本不兼容 (需要 {VERSION}，但发现 {cache_data.get('version')})，将创建新缓存。")
-                return {}
-            
-            files_data = cache_data.get("files")
-            # 健壮性检查：确保 files 部分也是一个字典
-            if not isinstance(files_data, dict):
-                log("缓存文件格式错误：'files' 键对应的值不是一个字典。将创建新缓存。")
-                return {}
-
-            log("成功从文件加载缓存。")
-            return files_data
-
-        except json.JSONDecodeError as e:
-            log(f"CRITICAL: 加载缓存失败 (JSON解析错误): {e}。将创建新缓存。")
-            return {}
-        except (IOError, OSError) as e:
-            log(f"CRITICAL: 加载缓存失败 (文件读写错误): {e}。将创建新缓存。")
-            return {}
-        except Exception as e:
-            log(f"CRITICAL: 加载缓存时发生未知严重错误: {e}。将创建新缓存。")
-            return {}
+            stat_result = os.stat(file_path)
+        except OSError:
+            return None
+        return [stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino]
 
     def _save_cache(self):
-        """将当前缓存数据保存到文件"""
-        try:
-            with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump({"version": VERSION, "files": self.cache}, f, ensure_ascii=False, indent=2)
-            log("缓存已成功保存。")
-        except Exception as e:
-            log(f"保存缓存失败: {e}")
+        """将当前缓存数据保存到二进制缓存文件，按需额外导出调试用的 JSON。"""
+        self.cache.save()
+        if self.settings.cache_json_export:
+            self.cache.export_json(CACHE_FILE)
 
     def _preprocess_block(self, block):
         """对单个词条块进行预处理（已重构）"""
-        parent_text = block['parent']
-        block['parent_lower'] = parent_text.lower()
+        parent_text = block.parent
+        block.parent_lower = parent_text.lower()
         # 新的核心数据结构：字符映射表
-        block['char_map'] = self._build_char_map(parent_text)
-        aliases = self._normalize_aliases(block.get('aliases', []))
-        block['aliases'] = aliases
-        block['alias_search_entries'] = [
-            {
+        block.char_map = self._build_char_map(parent_text)
+        block.char_masks = self.matcher.compile(block.char_map)
+        aliases = self._normalize_aliases(block.aliases)
+        block.aliases = aliases
+        alias_search_entries = []
+        for alias in aliases:
+            alias_char_map = self._build_char_map(alias)
+            alias_search_entries.append({
                 'text': alias,
-                'char_map': self._build_char_map(alias)
-            }
-            for alias in aliases
-        ]
-        # 移除旧的、不再使用的键
-        if 'hybrid_initials' in block:
-            del block['hybrid_initials']
+                'char_map': alias_char_map,
+                'char_masks': self.matcher.compile(alias_char_map),
+            })
+        block.alias_search_entries = alias_search_entries
+        if not block.is_clipboard:
+            # 剪贴板历史按时间排列，不参与拼音排序，也就无需为它加载 pypinyin
+            block.pinyin_sort_key = self._get_pinyin_sort_key(parent_text)
         self._apply_ranking_metadata(block)
         return block
 
-    def _apply_ranking_metadata(self, block):
-        """为普通词条补齐收藏与最近使用元数据。"""
-        default_usage_meta = {'count': 0, 'last_used_at': ''}
-        if block.get('is_clipboard'):
-            block['entry_id'] = None
-            block['is_favorite'] = False
-            block['usage_meta'] = default_usage_meta
-            return
+    def _is_cached_block_intact(self, block):
+        """校验缓存解码出的词条是否完整，与预处理产物的结构一致。"""
+        try:
+            aliases = block.aliases
+            alias_entries = block.alias_search_entries
+            return (
+                isinstance(block.full_content, str)
+                and len(block.char_map) == len(block.parent)
+                and len(alias_entries) == len(aliases)
+                and all(entry['text'] == alias and len(entry['char_map']) == len(alias)
+                        for entry, alias in zip(alias_entries, aliases))
+            )
+        except (KeyError, TypeError):
+            return False
 
-        if not self.ranking_state:
-            block['entry_id'] = None
-            block['is_favorite'] = False
-            block['usage_meta'] = default_usage_meta
+    def _adopt_cached_block(self, block):
+        """
+        直接采用缓存中已预处理好的词条：字符映射表原样保留，不再调用 pypinyin。
+        只补齐依赖当前匹配引擎的位掩码和排序元数据。
+        """
+        block.char_masks = self.matcher.compile(block.char_map)
+        for alias_entry in block.alias_search_entries:
+            alias_entry['char_masks'] = self.matcher.compile(alias_entry['char_map'])
+        if block.pinyin_sort_key is None:
+            block.pinyin_sort_key = self._get_pinyin_sort_key(block.parent)
+        self._apply_ranking_metadata(block)
+        return block
+
+    def _apply_ranking_metadata(self, block):
+        """为普通词条补齐收藏与最近使用元数据。从未使用过的词条 usage_meta 为 None，不为每个词条分配空字典。"""
+        if block.is_clipboard or not self.ranking_state:
+            block.entry_id = None
+            block.is_favorite = False
+            block.usage_meta = None
             return
 
-        entry_id = self.ranking_state.make_entry_id(
-            block.get('source_path', ''),
-            block.get('full_content', ''),
-        )
-        block['entry_id'] = entry_id
-        block['is_favorite'] = self.ranking_state.is_favorite(entry_id)
-        block['usage_meta'] = self.ranking_state.get_usage_meta(entry_id)
+        if block.full_content is not None:
+            entry_id = self.ranking_state.make_entry_id(
+                block.source_path or '',
+                block.full_content,
+            )
+            block.entry_id = entry_id
+        else:
+            # 正文未驻留的词条内容未变，沿用释放正文前算好的 entry_id
+            entry_id = block.entry_id
+        block.is_favorite = self.ranking_state.is_favorite(entry_id)
+        usage_meta = self.ranking_state.get_usage_meta(entry_id)
+        block.usage_meta = usage_meta if usage_meta['count'] or usage_meta['last_used_at'] else None
 
     def refresh_ranking_metadata(self):
         """刷新内存中词条的收藏与最近使用元数据。"""
         for block in self.word_blocks:
             self._apply_ranking_metadata(block)
-
-    def _match_keyword_in_char_map(self, keyword, char_map, pinyin_search_enabled=False, used_indices=None):
-        """在指定字符映射表中寻找单个关键词的最佳命中。"""
-        if not keyword or not char_map:
-            return None
-
-        used_indices = used_indices or set()
-        best_match = None
-
-        for start_idx in range(len(char_map)):
-            match_indices = []
-            match_types = []
-            kw_ptr = 0
-            map_ptr = start_idx
-
-            while kw_ptr < len(keyword) and map_ptr < len(char_map):
-                if map_ptr in used_indices:
-                    map_ptr += 1
-                    continue
-
-                char_info = char_map[map_ptr]
-                original_match = False
-                if keyword[kw_ptr:].startswith(char_info['char'].lower()):
-                    match_indices.append(map_ptr)
-                    match_types.append('original')
-                    kw_ptr += len(char_info['char'])
-                    map_ptr += 1
-                    original_match = True
-                elif pinyin_search_enabled:
-                    pinyin_matched = False
-                    for pinyin_key in char_info['keys']:
-                        if keyword[kw_ptr:].startswith(pinyin_key):
-                            match_indices.append(map_ptr)
-                            match_types.append('pinyin')
-                            kw_ptr += len(pinyin_key)
-                            map_ptr += 1
-                            pinyin_matched = True
-                            break
-                    if not pinyin_matched and not original_match:
-                        break
-                else:
-                    break
-
-            if kw_ptr != len(keyword):
-                continue
-
-            current_match_indices = set(match_indices)
-            if used_indices and not used_indices.isdisjoint(current_match_indices):
-                continue
-
-            score = sum(2 if match_type == 'original' else 1 for match_type in match_types)
-            if current_match_indices and len(current_match_indices) == (max(current_match_indices) - min(current_match_indices) + 1):
-                score *= 1.5
-            if 0 in current_match_indices:
-                score *= 1.2
-
-            match = {
-                'score': score,
-                'indices': current_match_indices,
-            }
-            if best_match is None or score > best_match['score']:
-                best_match = match
-
-        return best_match
-
-    def _clear_highlight_groups(self):
-        for block in self.word_blocks:
-            if 'highlight_groups' in block:
-                del block['highlight_groups']
-        for block in self.clipboard_history:
-            if 'highlight_groups' in block:
-                del block['highlight_groups']
+        self._invalidate_results()
+
+    def _invalidate_results(self):
+        """递增结果代数并清空查询结果缓存。必须在新数据生效之后调用。"""
+        self.result_generation += 1
+        self.result_cache.clear()
+
+    def _match_keyword_in_char_map(self, keyword, char_map, pinyin_search_enabled=False, used_indices=None, char_masks=None):
+        """在指定字符映射表中寻找单个关键词的最佳命中（具体算法由匹配引擎决定）。"""
+        return self.matcher.match(
+            keyword,
+            char_map,
+            compiled=char_masks,
+            pinyin_search_enabled=pinyin_search_enabled,
+            used_indices=used_indices,
+        )
 
     def _usage_sort_value(self, usage_meta):
         last_used_at = (usage_meta or {}).get('last_used_at', '')
@@ -309,34 +264,56 @@ class WordManager:
         return sorted(
             group,
             key=lambda item: (
-                0 if item['block'].get('is_favorite') else 1,
-                -self._usage_sort_value(item['block'].get('usage_meta', {})),
-                -int(item['block'].get('usage_meta', {}).get('count', 0) or 0),
+                0 if item['block'].is_favorite else 1,
+                -self._usage_sort_value(item['block'].usage_meta),
+                -int((item['block'].usage_meta or {}).get('count', 0) or 0),
                 -item['base_score'],
                 item['original_order'],
             )
         )
 
-    def _apply_ranking_adjustments(self, scored_blocks):
-        """在基础相关度排序之后，对相近候选做收藏/最近使用微调。"""
+    def _iter_by_base_score(self, scored_blocks):
+        """
+        用堆按基础得分从高到低惰性产出候选，同分时保持原有顺序。
+        建堆为 O(n)，之后只为实际取出的候选付出 O(log n)，适合只需要前 K 个结果的场景。
+        """
+        heap = [(-item['base_score'], idx) for idx, item in enumerate(scored_blocks)]
+        heapq.heapify(heap)
+        while heap:
+            _, idx = heapq.heappop(heap)
+            yield scored_blocks[idx]
+
+    def _apply_ranking_adjustments(self, scored_blocks, limit=None):
+        """
+        在基础相关度排序之后，对相近候选做收藏/最近使用微调。
+        传入 limit 时只返回最终排序的前 limit 项：按基础得分逐个取出候选并划分分档，
+        凑满 limit 后再把最后一档完整取出（档内的收藏/最近使用项可能越过档内更高分的候选），
+        其余候选不再参与排序。
+        """
         if not scored_blocks:
             return []
 
-        base_sorted = sorted(scored_blocks, key=lambda item: item['base_score'], reverse=True)
+        if limit is None or len(scored_blocks) <= limit:
+            base_ordered = sorted(scored_blocks, key=lambda item: item['base_score'], reverse=True)
+            limit = None
+        else:
+            base_ordered = self._iter_by_base_score(scored_blocks)
+
         final_items = []
-        current_group = [base_sorted[0]]
-        previous_item = base_sorted[0]
+        current_group = []
+        previous_item = None
 
-        for item in base_sorted[1:]:
-            if self._is_same_ranking_band(previous_item['base_score'], item['base_score']):
-                current_group.append(item)
-            else:
+        for item in base_ordered:
+            if previous_item is not None and not self._is_same_ranking_band(previous_item['base_score'], item['base_score']):
                 final_items.extend(self._sort_ranking_group(current_group))
-                current_group = [item]
+                current_group = []
+                if limit is not None and len(final_items) >= limit:
+                    break
+            current_group.append(item)
             previous_item = item
 
         final_items.extend(self._sort_ranking_group(current_group))
-        return final_items
+        return final_items if limit is None else final_items[:limit]
 
     def _expand_library_entries(self, libraries):
         """将文件/文件夹两类词库条目展开为真实可加载的 md 文件。"""
@@ -358,128 +335,592 @@ class WordManager:
 
         return expanded_paths
 
-    def reload_all(self):
-        """通过缓存机制重新加载所有词库"""
-        log("--- 开始重载所有词库 ---")
-        self.cache = self._load_cache()
-
+    def _expand_active_libraries(self):
+        """返回 {规范化路径: 实际路径}，包含手动添加与自动发现的全部启用词库文件。"""
         norm_to_original = self._expand_library_entries(self.settings.libraries)
         norm_to_original.update(self._expand_library_entries(self.settings.auto_libraries))
-        unique_enabled_paths = set(norm_to_original.values())
-        self.active_file_paths = set(norm_to_original.keys())
-        self.sources = []
+        return norm_to_original
 
-        new_word_blocks = []
+    def _load_library_file(self, norm_path, original_path, stats):
+        """
+        加载单个词库文件：内容未变时直接采用缓存词条，否则重新解析并预处理后写入缓存。
+        stats 中累计 adopted / rebuilt 数量；返回 (词条列表, 是否重新解析, 缓存是否有改动)。
+        """
+        stat_signature = self._get_stat_signature(original_path)
+        cached_meta = self.cache.get_meta(norm_path)
         cache_updated = False
-
-        for norm_path, original_path in norm_to_original.items():
+        if cached_meta and stat_signature is not None and cached_meta.get('stat') == stat_signature:
+            # 大小、修改时间与 inode 都未变化，视为内容未变，无需读取文件
+            current_hash = cached_meta.get('hash')
+        else:
             current_hash = self._get_file_hash(original_path)
-            cached_file = self.cache.get(norm_path)
+            if cached_meta and cached_meta.get('hash') == current_hash:
+                # 文件被触碰但内容未变：只刷新缓存中的 stat 签名
+                self.cache.update_meta(norm_path, {"hash": current_hash, "stat": stat_signature})
+                cache_updated = True
+
+        cached_blocks = None
+        if cached_meta and cached_meta.get('hash') == current_hash:
+            cached_blocks = self.cache.load_blocks(norm_path)
+            if cached_blocks is not None and not all(self._is_cached_block_intact(block) for block in cached_blocks):
+                log(f"CRITICAL: 缓存记录校验失败，将重新解析: {os.path.basename(original_path)}")
+                cached_blocks = None
+
+        if cached_blocks is not None:
+            log(f"缓存命中: {os.path.basename(original_path)}")
+            stats['adopted'] += len(cached_blocks)
+            blocks = [self._adopt_cached_block(block) for block in cached_blocks]
+            self._release_bodies(blocks)
+            return blocks, False, cache_updated
+
+        log(f"缓存未命中或已过期: {os.path.basename(original_path)}")
+        source = WordSource(original_path) # WordSource.load() is called here
+        preprocessed_data, reused_count = self._diff_blocks(norm_path, source.word_blocks)
+        self.cache.put(norm_path, {"hash": current_hash, "stat": stat_signature}, preprocessed_data)
+        stats['reused'] += reused_count
+        stats['rebuilt'] += len(preprocessed_data) - reused_count
+        log(f"词条比对 {os.path.basename(original_path)}: 复用 {reused_count} 个，重新预处理 {len(preprocessed_data) - reused_count} 个。")
+        # 缓存在 put 时已完成编码，之后释放正文不影响写入
+        self._release_bodies(preprocessed_data)
+        return preprocessed_data, True, True
+
+    @staticmethod
+    def _content_key(block):
+        """正文的 (CRC32, 字符数)，正文已释放的词条取释放时记下的值。"""
+        if block.full_content is not None:
+            return zlib.crc32(block.full_content.encode('utf-8')), len(block.full_content)
+        return block.content_crc, block.content_length
+
+    def _release_bodies(self, blocks):
+        """
+        惰性正文模式：长词条只保留搜索所需的字段和正文在词库文件中的位置，丢弃 full_content，
+        显示或上屏时再通过 get_full_content / get_raw_lines 取回。
+        只能作用于尚未发布的词条；没有字节位置的词条（如旧版缓存解码出的）保持常驻。
+        """
+        if not self.settings.lazy_bodies:
+            return
+        for block in blocks:
+            if block.is_clipboard or block.body_offset is None:
+                continue
+            if block.body_length < LAZY_BODY_MIN_BYTES:
+                continue
+            block.content_crc, block.content_length = self._content_key(block)
+            block.parent_offset = block.full_content.find(block.parent)
+            block.full_content = None
+
+    def _parse_bodies(self, source_path):
+        """重新解析词库文件，返回 {(父级, 正文键): 完整内容}，供字节位置失效时按内容查找正文。"""
+        log(f"词条正文位置已失效，重新解析: {os.path.basename(source_path or '')}")
+        bodies = {}
+        for parsed_block in WordSource(source_path).word_blocks:
+            bodies.setdefault((parsed_block.parent, self._content_key(parsed_block)), parsed_block.full_content)
+        return bodies
+
+    def _materialize_body(self, block):
+        """
+        取回正文已释放词条的 full_content：先按字节位置读原文件，校验不一致（文件已被修改、等待重载）时
+        按内容在重新解析的结果中查找；同一文件在未再次变化前只解析一次。仍找不到时返回 None。
+        """
+        source_path = block.source_path
+        expected_key = (block.content_crc, block.content_length)
+        text = self.body_store.read(source_path, block.body_offset, block.body_length)
+        if text is not None:
+            content = '\n'.join(split_body_lines(text))
+            if self._content_key(WordBlock(full_content=content)) == expected_key:
+                return content
+            self.body_store.discard(source_path, block.body_offset, block.body_length)
+
+        signature = self._get_stat_signature(source_path)
+        bodies = self.body_store.reparsed_bodies(
+            source_path, tuple(signature) if signature is not None else None, self._parse_bodies,
+        )
+        content = bodies.get((block.parent, expected_key))
+        if content is not None:
+            return content
+        log(f"CRITICAL: 在 {source_path} 中找不到词条正文: {block.parent}")
+        return None
+
+    def get_full_content(self, block):
+        """返回词条的完整内容；惰性正文模式下按需从词库文件读取。"""
+        if block.full_content is not None:
+            return block.full_content
+        content = self._materialize_body(block)
+        return content if content is not None else f"- {block.parent}"
+
+    def get_raw_lines(self, block):
+        """返回词条的原始行列表（已去除行尾空白），由完整内容按换行切分得到。"""
+        return self.get_full_content(block).split('\n')
+
+    def has_content(self, block, text):
+        """判断词条的完整内容是否等于 text；正文未驻留时先比较长度与 CRC32，避免无谓的文件读取。"""
+        if block.full_content is not None:
+            return block.full_content == text
+        if len(text) != block.content_length or zlib.crc32(text.encode('utf-8')) != block.content_crc:
+            return False
+        return self._materialize_body(block) == text
 
-            if cached_file and cached_file.get('hash') == current_hash:
-                log(f"缓存命中: {os.path.basename(original_path)}")
-                new_word_blocks.extend([self._preprocess_block(block) for block in cached_file['data']])
+    def _previous_blocks(self, norm_path):
+        """
+        返回该词库文件上一版本的已预处理词条及其位掩码是否可直接使用。
+        优先取当前快照中的词条；快照中没有时退回缓存里的旧记录（内容已过期，但未变化的词条仍可复用）。
+        """
+        snapshot = self.snapshot
+        source_index = snapshot.search_index.source_indexes.get(norm_path)
+        if source_index is not None:
+            return [snapshot.word_blocks[position] for position in source_index.global_positions], True
+        cached_blocks = self.cache.load_blocks(norm_path)
+        if cached_blocks is None or not all(self._is_cached_block_intact(block) for block in cached_blocks):
+            return [], False
+        return cached_blocks, False
+
+    def _diff_blocks(self, norm_path, parsed_blocks):
+        """
+        按 full_content 把新解析的词条与上一版本逐条对应：内容相同的词条沿用原有的字符映射表、位掩码与排序键，
+        只有新增或修改过的词条才重新预处理。同一内容出现多次时按出现顺序一一配对。
+        预处理结果完全由 full_content 决定，因此复用的词条与重新预处理的结果一致。
+        配对先按 (正文 CRC32, 正文长度, 标题行) 查找候选，旧词条的正文仍驻留时再逐字比较确认，CRC 碰撞不会误用旧词条；
+        惰性正文模式下已释放正文的旧词条无法逐字比较，只凭 CRC32、长度与标题行三者同时相同认定内容未变
+        （为此回读旧正文会让每次保存都读一遍整个文件，得不偿失）。字节位置等随文件变化的字段总是取自新解析的词条。
+        返回 (词条列表, 复用数量)。
+        """
+        previous_blocks, masks_ready = self._previous_blocks(norm_path)
+        previous_by_content = {}
+        for block in previous_blocks:
+            # 上一版本的词条可能已释放正文，统一按正文的 CRC32 与长度配对，再核对标题行
+            previous_by_content.setdefault((self._content_key(block), block.parent), []).append(block)
+
+        blocks = []
+        reused_count = 0
+        for parsed_block in parsed_blocks:
+            candidates = previous_by_content.get((self._content_key(parsed_block), parsed_block.parent))
+            match_idx = self._find_same_content(candidates, parsed_block.full_content) if candidates else None
+            if match_idx is None:
+                blocks.append(self._preprocess_block(parsed_block))
+                continue
+
+            # 旧词条可能仍被正在进行的搜索读取，复制一份再修改；预处理产物只读，可直接共享
+            block = candidates.pop(match_idx).copy()
+            for field in ('source_path', 'full_content', 'body_offset', 'body_length'):
+                setattr(block, field, getattr(parsed_block, field))
+            block.content_crc = block.content_length = block.parent_offset = None
+            if masks_ready:
+                self._apply_ranking_metadata(block)
             else:
-                log(f"缓存未命中或已过期: {os.path.basename(original_path)}")
-                source = WordSource(original_path) # WordSource.load() is called here
-                
-                preprocessed_data = [self._preprocess_block(block) for block in source.word_blocks]
-                
-                self.cache[norm_path] = {
-                    "hash": current_hash,
-                    "data": preprocessed_data
-                }
-                new_word_blocks.extend(preprocessed_data)
+                self._adopt_cached_block(block)
+            blocks.append(block)
+            reused_count += 1
+        return blocks, reused_count
+
+    @staticmethod
+    def _find_same_content(candidates, full_content):
+        """在 CRC32、长度与标题行都相同的候选中找出内容确实相同的第一个，返回其下标；正文已释放的候选视为相同。"""
+        for idx, candidate in enumerate(candidates):
+            if candidate.full_content is None or candidate.full_content == full_content:
+                return idx
+        return None
+
+    def _make_block_sort_key(self, library_order):
+        """
+        返回词条全局排序键函数：拼音排序键相同时按词库文件在设置中的先后次序，与整体重载的稳定排序结果一致。
+        每个函数自带 source_path -> 次序的缓存，避免排序时反复规范化路径。
+        """
+        source_ranks = {}
+
+        def block_sort_key(block):
+            source_path = block.source_path or ''
+            rank = source_ranks.get(source_path)
+            if rank is None:
+                rank = library_order.get(normalize_library_path(source_path), 0)
+                source_ranks[source_path] = rank
+            return block.pinyin_sort_key, rank
+
+        return block_sort_key
+
+    def _publish_library(self, word_blocks, search_index, vector_index, changed_sources):
+        """新一代数据全部构建完成后整体替换，正在进行的后台搜索仍读取旧快照。只能在界面线程调用。"""
+        self.library_generation += 1
+        self.word_blocks = word_blocks
+        self.search_index = search_index
+        self.vector_index = vector_index
+        self.snapshot = LibrarySnapshot(self.library_generation, word_blocks, search_index, vector_index)
+        self.body_store.clear()
+        self._sync_shard_pool(changed_sources)
+        log(f"查询结果缓存统计: {self.result_cache.stats()}")
+        self._invalidate_results()
+
+    def reload_all(self):
+        """通过缓存机制同步重新加载所有词库（启动时使用；运行期间由后台线程分两步完成）。"""
+        self.apply_reload(self.prepare_reload())
+
+    def prepare_reload(self, progress_callback=None):
+        """
+        重载的第一步，可在后台线程执行：读取缓存、解析与预处理变化的文件、排序并构建索引。
+        只读取当前快照，不修改任何供界面或搜索线程使用的状态；结果交给 apply_reload 在界面线程一次性替换。
+        progress_callback: 渐进加载时使用，按批收到 {'loaded', 'total', 'sources', 'library_order'}，
+        其中 sources 为这一批刚加载完成的 [(规范化路径, 词条列表)]，可交给 merge_loaded_sources 先行并入。
+        """
+        with self.reload_lock:
+            log("--- 开始重载所有词库 ---")
+            if self.pinyin_table is None:
+                self.pinyin_table = PinyinInitialsTable.load_or_build(PINYIN_TABLE_FILE)
+            self.cache.load()
+
+            norm_to_original = self._expand_active_libraries()
+            library_order = {norm_path: rank for rank, norm_path in enumerate(norm_to_original)}
+
+            new_word_blocks = []
+            cache_updated = False
+            changed_sources = set()
+            stats = {'adopted': 0, 'reused': 0, 'rebuilt': 0}
+
+            pending_sources = []
+            last_report_at = time.perf_counter()
+            for loaded_count, (norm_path, original_path) in enumerate(norm_to_original.items(), 1):
+                blocks, rebuilt, file_cache_updated = self._load_library_file(norm_path, original_path, stats)
+                new_word_blocks.extend(blocks)
+                cache_updated = cache_updated or file_cache_updated
+                if rebuilt:
+                    changed_sources.add(norm_path)
+
+                if progress_callback is not None:
+                    pending_sources.append((norm_path, blocks))
+                    now = time.perf_counter()
+                    if now - last_report_at >= self.PROGRESS_REPORT_INTERVAL or loaded_count == len(norm_to_original):
+                        progress_callback({
+                            'loaded': loaded_count,
+                            'total': len(norm_to_original),
+                            'sources': pending_sources,
+                            'library_order': library_order,
+                        })
+                        pending_sources = []
+                        last_report_at = now
+
+            # 移除缓存中不再启用的词库
+            paths_to_remove = set(self.cache.keys()) - set(norm_to_original.keys())
+            if paths_to_remove:
+                for path in paths_to_remove:
+                    self.cache.remove(path)
                 cache_updated = True
 
-        # 移除缓存中不再启用的词库
-        paths_to_remove = set(self.cache.keys()) - set(norm_to_original.keys())
-        if paths_to_remove:
-            for path in paths_to_remove:
-                del self.cache[path]
-            cache_updated = True
+            new_word_blocks.sort(key=self._make_block_sort_key(library_order))
+            search_index = SearchIndex()
+            search_index.build(new_word_blocks)
+            vector_index = self._build_vector_index(new_word_blocks)
+
+            if cache_updated:
+                self._save_cache()
+
+            return {
+                'word_blocks': new_word_blocks,
+                'search_index': search_index,
+                'vector_index': vector_index,
+                'changed_sources': changed_sources,
+                'library_order': library_order,
+                'file_count': len(set(norm_to_original.values())),
+                'stats': stats,
+            }
 
-        self.word_blocks = new_word_blocks
-        self.word_blocks.sort(key=lambda block: self._get_pinyin_sort_key(block['parent']))
+    def apply_reload(self, prepared):
+        """重载的第二步，必须在界面线程执行：整体替换为 prepare_reload 构建好的新一代数据。"""
+        self.loading_progress = None
+        self.library_order = prepared['library_order']
+        self.active_file_paths = set(prepared['library_order'])
+        self.sources = []
+        self._publish_library(
+            prepared['word_blocks'], prepared['search_index'], prepared['vector_index'], prepared['changed_sources']
+        )
 
         if self.ranking_state:
             active_entry_ids = {
-                block.get('entry_id')
+                block.entry_id
                 for block in self.word_blocks
-                if block.get('entry_id')
+                if block.entry_id
             }
             self.ranking_state.cleanup_orphans(active_entry_ids)
-        
-        if cache_updated:
-            self._save_cache()
 
-        log(f"已聚合 {len(self.word_blocks)} 个词条从 {len(unique_enabled_paths)} 个启用的词库。")
+        stats = prepared['stats']
+        self.last_reload_stats = stats
+        log(f"已聚合 {len(self.word_blocks)} 个词条从 {prepared['file_count']} 个启用的词库（缓存复用 {stats['adopted']} 个，逐条比对复用 {stats['reused']} 个，重新预处理 {stats['rebuilt']} 个）。")
         
-        # 加载剪贴板历史（它不使用主缓存）
-        self.load_clipboard_history()
+        # 剪贴板历史不使用主缓存；只有文件被外部修改过才需要重新加载
+        if self.clipboard.changed_on_disk():
+            self.load_clipboard_history()
+        if self.settings.memory_report:
+            self.log_memory_report()
+
+    def log_memory_report(self):
+        """在日志中输出当前词条的内存占用（逐个对象统计，词条很多时需要数秒，只在开启 memory_report 时调用）。"""
+        report = measure_blocks(self.word_blocks)
+        log(f"词条内存占用: {report['entries']} 个词条，共 {report['total_bytes'] / 1048576:.1f} MB，平均每个词条 {report['bytes_per_entry']} 字节。")
+        return report
+
+    def update_files(self, changed_paths):
+        """
+        增量更新：只重新解析 changed_paths 中的词库文件，把它们的词条按排序键合并进现有的有序列表，
+        未变化来源的倒排表与向量化索引中的字符行原样复用（后者只改写词条下标）。在界面线程执行，
+        解析、预处理与编码只针对变化的文件；此外还有几次与总词条数成正比、常数很小的线性操作（拼接列表、改写全局序号），
+        启用向量化搜索时另有一次与总字符数成正比的 NumPy 整列拷贝。十万词条、近两百万字符的词库中保存一个小文件约需一百毫秒，
+        其中向量化索引约占四十毫秒。
+        启用的词库文件集合发生变化（新增、删除或重命名）时不做处理并返回 None，由调用方改为整体重载；
+        否则返回是否有数据真正发生了变化（词库文件被重新解析，或剪贴板历史被重新加载）。
+        内容未变的文件事件（例如自身追加剪贴板日志产生的事件）返回 False，调用方无需刷新界面。
+        """
+        norm_to_original = self._expand_active_libraries()
+        if list(norm_to_original) != list(self.library_order):
+            return None
 
-    def load_clipboard_history(self):
-        """加载剪贴板历史文件"""
-        if not os.path.exists(CLIPBOARD_HISTORY_FILE):
-            try:
-                with open(CLIPBOARD_HISTORY_FILE, 'w', encoding='utf-8') as f:
-                    f.write("")
-                log(f"已创建剪贴板历史文件: {CLIPBOARD_HISTORY_FILE}")
-            except Exception as e:
-                log(f"创建剪贴板历史文件失败: {e}")
-                return
-
-        self.clipboard_source = WordSource(CLIPBOARD_HISTORY_FILE)
-        # 剪贴板历史按添加顺序（文件中的倒序）显示，所以我们直接逆序
-        raw_history = list(reversed(self.clipboard_source.word_blocks))
-        self.clipboard_history = []
-        for block in raw_history:
-            block['is_clipboard'] = True # 添加标志
-            self.clipboard_history.append(self._preprocess_block(block))
-        log(f"已加载 {len(self.clipboard_history)} 条剪贴板历史。")
+        changed_norms = {normalize_library_path(path) for path in changed_paths if path}
+        clipboard_reloaded = False
+        if normalize_library_path(CLIPBOARD_HISTORY_FILE) in changed_norms and self.clipboard.changed_on_disk():
+            # 自身追加或重写产生的文件事件不需要重新加载
+            self.load_clipboard_history()
+            clipboard_reloaded = True
+
+        stats = {'adopted': 0, 'reused': 0, 'rebuilt': 0}
+        changed_sources = set()
+        reloaded_pairs = []
+        with self.reload_lock:
+            cache_updated = False
+            for norm_path in changed_norms & self.active_file_paths:
+                blocks, rebuilt, file_cache_updated = self._load_library_file(norm_path, norm_to_original[norm_path], stats)
+                cache_updated = cache_updated or file_cache_updated
+                if rebuilt:
+                    changed_sources.add(norm_path)
+                    reloaded_pairs.extend((block, norm_path) for block in blocks)
+            if cache_updated:
+                self._save_cache()
+        if not changed_sources:
+            return clipboard_reloaded
+
+        previous_snapshot = self.snapshot
+        new_word_blocks, search_index = self._merge_sources(reloaded_pairs, changed_sources, self.library_order)
+        vector_index = self._splice_vector_index(previous_snapshot, new_word_blocks, search_index, changed_sources)
+        self._publish_library(new_word_blocks, search_index, vector_index, changed_sources)
+
+        self.last_reload_stats = stats
+        log(f"增量更新 {len(changed_sources)} 个词库文件，逐条比对复用 {stats['reused']} 个词条，重新预处理 {stats['rebuilt']} 个，共 {len(new_word_blocks)} 个词条。")
+        return True
+
+    def _merge_sources(self, reloaded_pairs, changed_sources, library_order):
+        """
+        把若干来源文件的新词条并入当前快照：返回 (新的有序词条列表, 拼接后的搜索索引)。
+        (词条, 所属来源) 两路有序序列归并：旧列表去掉变化的来源后仍然有序，只需对新词条排序。
+        新词条远少于旧词条时（保存单个小文件）逐个二分查找插入点，只为 O(新词条数 × log 旧词条数) 个旧词条计算排序键；
+        否则整体归并。两种方式在排序键相同时都把旧词条排在前面，结果一致。
+        """
+        snapshot = self.snapshot
+        block_sort_key = self._make_block_sort_key(library_order)
+        pair_sort_key = lambda pair: block_sort_key(pair[0])
+        previous_owners = snapshot.search_index.position_owners()
+        # 旧词条与所属来源分成两个平行列表，不为每个旧词条创建 (词条, 来源) 元组
+        kept_blocks = [block for block, owner in zip(snapshot.word_blocks, previous_owners) if owner not in changed_sources]
+        kept_owners = [owner for owner in previous_owners if owner not in changed_sources]
+        reloaded_pairs.sort(key=pair_sort_key)
+        if len(reloaded_pairs) * len(kept_blocks).bit_length() < len(kept_blocks):
+            new_word_blocks, owners = self._insert_sorted_pairs(kept_blocks, kept_owners, reloaded_pairs, block_sort_key)
+        else:
+            merged_pairs = list(heapq.merge(zip(kept_blocks, kept_owners), reloaded_pairs, key=pair_sort_key))
+            new_word_blocks = [block for block, _ in merged_pairs]
+            owners = [owner for _, owner in merged_pairs]
+        return new_word_blocks, SearchIndex.splice(snapshot.search_index, new_word_blocks, owners, changed_sources)
+
+    @staticmethod
+    def _insert_sorted_pairs(kept_blocks, kept_owners, new_pairs, block_sort_key):
+        """
+        把有序的 (词条, 来源) 列表 new_pairs 逐个二分插入有序的 kept_blocks / kept_owners（相同排序键时插在已有项之后），
+        返回合并后的 (词条列表, 来源列表)。
+        """
+        merged_blocks = []
+        merged_owners = []
+        start = 0
+        for block, owner in new_pairs:
+            key = block_sort_key(block)
+            low, high = start, len(kept_blocks)
+            while low < high:
+                middle = (low + high) // 2
+                if key < block_sort_key(kept_blocks[middle]):
+                    high = middle
+                else:
+                    low = middle + 1
+            merged_blocks.extend(kept_blocks[start:low])
+            merged_blocks.append(block)
+            merged_owners.extend(kept_owners[start:low])
+            merged_owners.append(owner)
+            start = low
+        merged_blocks.extend(kept_blocks[start:])
+        merged_owners.extend(kept_owners[start:])
+        return merged_blocks, merged_owners
+
+    def merge_loaded_sources(self, progress):
+        """
+        渐进加载：把后台刚加载完成的一批词库文件并入当前快照，让已加载的部分先行可搜。必须在界面线程执行。
+        这些中间快照不构建向量化索引、也不同步分片进程池，搜索按倒排索引进行；全部完成后由 apply_reload 替换。
+        """
+        self.loading_progress = (progress['loaded'], progress['total'])
+        sources = progress['sources']
+        if not sources:
+            return
 
-    def add_to_clipboard_history(self, text):
-        """向剪贴板历史中添加新条目"""
-        if not self.clipboard_source:
-            # 确保 clipboard_source 已被初始化
-            self.clipboard_source = WordSource(CLIPBOARD_HISTORY_FILE)
+        loaded_keys = {norm_path for norm_path, _ in sources}
+        loaded_pairs = [(block, norm_path) for norm_path, blocks in sources for block in blocks]
+        word_blocks, search_index = self._merge_sources(loaded_pairs, loaded_keys, progress['library_order'])
+
+        self.library_generation += 1
+        self.word_blocks = word_blocks
+        self.search_index = search_index
+        self.vector_index = None
+        self.snapshot = LibrarySnapshot(self.library_generation, word_blocks, search_index, None)
+        self._invalidate_results()
+        log(f"渐进加载: 已加载 {progress['loaded']}/{progress['total']} 个词库文件，共 {len(word_blocks)} 个词条。")
+
+    def _build_vector_index(self, word_blocks):
+        """按设置构建向量化索引；未启用或未安装 NumPy 时返回 None，保持纯 Python 搜索。"""
+        if not self.settings.vectorized_search:
+            return None
+        if not is_vector_search_available():
+            log("警告: 未安装 NumPy，向量化搜索不可用，将使用纯 Python 搜索。建议安装: pip install numpy")
+            return None
+        vector_index = VectorIndex()
+        vector_index.build(word_blocks)
+        return vector_index
+
+    def _splice_vector_index(self, previous_snapshot, word_blocks, search_index, changed_sources):
+        """增量更新时的向量化索引：旧快照带有索引时只重新编码变化的来源，否则整体构建。"""
+        if previous_snapshot.vector_index is None:
+            return self._build_vector_index(word_blocks)
+        if not self.settings.vectorized_search or not is_vector_search_available():
+            return None
+        return VectorIndex.splice(
+            previous_snapshot.vector_index, word_blocks, previous_snapshot.search_index, search_index, changed_sources
+        )
 
-        # 在添加前，重新加载一次，确保拿到最新的历史记录
-        self.clipboard_source.load()
+    def _sync_shard_pool(self, changed_sources):
+        """按设置启动/停止分片搜索进程池，并只重新下发内容发生变化的来源文件。"""
+        if not self.settings.sharded_search:
+            self.shutdown()
+            return
+
+        try:
+            if self.shard_pool is None:
+                worker_count = self.settings.shard_workers or ShardedSearchPool.default_worker_count()
+                self.shard_pool = ShardedSearchPool(worker_count, self.matcher.name)
+                self.shard_pool.start()
+
+            snapshot = self.snapshot
+            shard_blocks = {
+                source_key: [snapshot.word_blocks[position] for position in source_index.global_positions]
+                for source_key, source_index in snapshot.search_index.source_indexes.items()
+            }
+            self.shard_pool.sync(shard_blocks, changed_sources, snapshot.generation)
+        except Exception as e:
+            log(f"CRITICAL: 分片搜索进程池同步失败，将回退到单进程搜索: {e}")
+            self.shutdown()
+
+    def shutdown(self):
+        """释放后台资源（分片搜索进程池）。"""
+        if self.shard_pool is not None:
+            self.shard_pool.stop()
+            self.shard_pool = None
+
+    @property
+    def clipboard_history(self):
+        """剪贴板历史词条，按添加时间倒序（最新的在前）。"""
+        return list(reversed(self.clipboard.entries))
+
+    def _prepare_clipboard_block(self, block):
+        block.is_clipboard = True # 添加标志
+        self._preprocess_block(block)
+
+    def _release_clipboard_block(self, block):
+        # 历史中已没有引用同一大文本的条目时删除外置文件
+        if block.blob_digest and self.clipboard.find(block.full_content) is None:
+            self.clipboard_blobs.discard(block.blob_digest)
+
+    def _make_blob_entry(self, text, data):
+        """把大文本保存到外置存储，返回历史中使用的条目内容（单行预览 + 摘要引用）；保存失败时返回 None。"""
+        digest = self.clipboard_blobs.put(data)
+        if digest is None:
+            return None
+        # 连续的反引号一律压成一个，预览中不可能再出现 ``...`` 元命令（快捷码、不出现、别名）
+        preview = re.sub('`+', '`', text[:CLIPBOARD_PREVIEW_CHARS].replace('\n', ' ↵ ')).strip()
+        entry = f"- {preview}… ``clip:{digest}``\n（完整内容 {len(text)} 字，粘贴时读取）"
+        if not self._is_plain_blob_entry(entry, digest):
+            # 兜底：解析结果仍带有其他元命令时，去掉预览中的全部反引号
+            entry = f"- {preview.replace('`', '')}… ``clip:{digest}``\n（完整内容 {len(text)} 字，粘贴时读取）"
+        return entry
+
+    @staticmethod
+    def _is_plain_blob_entry(entry, digest):
+        """大文本条目解析后应当只有一个词条，且除了外置引用之外不带任何元命令。"""
+        blocks = parse_word_blocks(io.StringIO(entry, newline='').readlines(), CLIPBOARD_HISTORY_FILE, allow_blob_refs=True)
+        return (
+            len(blocks) == 1
+            and blocks[0].blob_digest == digest
+            and blocks[0].shortcut_code is None
+            and not blocks[0].exclude_parent
+            and not blocks[0].aliases
+        )
+
+    def get_clipboard_blob_text(self, block):
+        """返回外置大文本词条的完整文本；不是大文本词条或文件已丢失时返回 None。"""
+        if not block.is_clipboard or not block.blob_digest:
+            return None
+        return self.clipboard_blobs.get(block.blob_digest)
+
+    def find_clipboard_block(self, content):
+        """按完整内容查找剪贴板历史词条（O(1)），找不到时返回 None。"""
+        return self.clipboard.find(content)
+
+    def load_clipboard_history(self):
+        """从日志文件重新加载剪贴板历史（启动时或文件被外部修改后）。"""
+        self.clipboard.load()
+        self.clipboard_blobs.prune(block.blob_digest for block in self.clipboard.entries if block.blob_digest)
+        log(f"已加载 {len(self.clipboard.entries)} 条剪贴板历史。")
 
-        full_content_to_add = f"- {text}"
+    def add_to_clipboard_history(self, text):
+        """
+        向剪贴板历史中添加新条目。
+        只在日志文件末尾追加并预处理新条目；历史已满时最旧的条目被挤出缓冲区，
+        不再为此重写文件或重新加载整个历史。新条目同时进入剪贴板的增量倒排表；
+        剪贴板的搜索结果不进入结果缓存，因此无需使结果缓存失效。
+        超过 clipboard_blob_threshold_kb 的文本外置保存，历史中只记录预览与摘要，
+        相同的大文本得到相同的条目内容，去重同样只需一次字典查找。
+        成功时返回新加入的词条列表，已存在或写入失败时返回 False。
+        """
+        data = text.encode('utf-8')
+        if len(data) > self.settings.clipboard_blob_threshold_kb * 1024:
+            full_content_to_add = self._make_blob_entry(text, data)
+            if full_content_to_add is None:
+                return False
+        else:
+            full_content_to_add = f"- {text}"
         # 避免重复添加
-        if any(block['full_content'] == full_content_to_add for block in self.clipboard_source.word_blocks):
-            log(f"剪贴板历史中已存在: '{text}'")
+        if self.clipboard.find(full_content_to_add) is not None:
+            log(f"剪贴板历史中已存在: '{text[:CLIPBOARD_PREVIEW_CHARS]}'")
             return False
 
-        # 限制历史数量
-        while len(self.clipboard_source.word_blocks) >= self.settings.clipboard_memory_count:
-            oldest_item = self.clipboard_source.word_blocks.pop(0) # 移除最旧的
-            self.clipboard_source.delete_entry(oldest_item['full_content'])
-            log(f"剪贴板历史已满，移除最旧条目: {oldest_item['parent']}")
+        blocks = self.clipboard.append(full_content_to_add)
+        if not blocks:
+            return False
+        log(f"已添加新剪贴板历史: '{text[:CLIPBOARD_PREVIEW_CHARS]}'")
+        return blocks
 
-        # 添加新条目
-        if self.clipboard_source.add_entry(full_content_to_add):
-            log(f"已添加新剪贴板历史: '{text}'")
-            # 重新加载以更新内部状态
-            self.reload_all()
-            return True
-        return False
+    def remove_from_clipboard_history(self, contents):
+        """删除完整内容在 contents 中的剪贴板历史条目，返回删除的条数。"""
+        removed_count = self.clipboard.remove(contents)
+        if removed_count:
+            log(f"已从剪贴板历史中删除 {removed_count} 个条目。")
+        return removed_count
+
+    def set_clipboard_capacity(self, capacity):
+        self.clipboard.set_capacity(capacity)
 
     def clear_clipboard_history(self):
         """清空剪贴板历史"""
-        if not self.clipboard_source: return
-        try:
-            # 删除文件内容，保持历史真正为空
-            with open(self.clipboard_source.file_path, 'w', encoding='utf-8') as f:
-                f.write("")
-            self.load_clipboard_history() # 重新加载
+        if self.clipboard.clear():
             log("剪贴板历史已清空。")
             return True
-        except Exception as e:
-            log(f"清空剪贴板历史失败: {e}")
-            return False
+        return False
 
     def aggregate_words(self):
         """聚合所有启用的词库数据 (此方法现在由 reload_all 替代)"""
@@ -488,110 +929,217 @@ class WordManager:
         # 为了安全起见，暂时保留，但其逻辑已被移至 reload_all。
         pass
 
-    def find_matches(self, query, multi_word_search_enabled=False, pinyin_search_enabled=False):
+    def _score_block(self, block, keywords, pinyin_search_enabled=False):
+        """
+        对单个词条块计算所有关键词的综合得分。
+        全部关键词命中时返回 (得分, 高亮分组)，否则返回 None。
+        """
+        return score_block(self.matcher, block, keywords, pinyin_search_enabled)
+
+    def _build_highlight_groups(self, block, highlight_groups):
+        """将父级文本内的命中下标换算为 full_content 中的精确高亮位置。"""
+        return build_highlight_groups(block, highlight_groups)
+
+    def _score_blocks(self, search_pool, keywords, pinyin_search_enabled=False, cancel_token=None):
+        """按 search_pool 的顺序逐个打分，返回未经排序微调的候选列表。高亮信息只写入结果项，不修改共享词条。"""
+        scored_blocks = []
+        for block_idx, block in enumerate(search_pool):
+            if cancel_token is not None and block_idx % CancellationToken.CHECK_INTERVAL == 0:
+                cancel_token.raise_if_cancelled()
+
+            result = self._score_block(block, keywords, pinyin_search_enabled)
+            if result is None:
+                continue
+
+            total_score, highlight_groups = result
+            scored_blocks.append({
+                'block': block,
+                'base_score': total_score,
+                'original_order': len(scored_blocks),
+                'highlight_groups': highlight_groups,
+            })
+        return scored_blocks
+
+    def _score_blocks_vectorized(self, snapshot, keyword, pinyin_search_enabled=False, cancel_token=None):
+        """
+        单关键词的向量化打分：可编码词条由 VectorIndex 一次性算出得分与起点，
+        其余词条（带别名等）经倒排索引筛选后逐条打分，最终按 word_blocks 顺序合并。
+        """
+        vector_index = snapshot.vector_index
+        vector_matches = vector_index.match_single_keyword(keyword, pinyin_search_enabled)
+        python_positions = [
+            position
+            for position in snapshot.search_index.candidate_positions([keyword], pinyin_search_enabled)
+            if position in vector_index.python_positions
+        ]
+
+        scored_blocks = []
+        for block_idx, position in enumerate(sorted(vector_matches.keys() | set(python_positions))):
+            if cancel_token is not None and block_idx % CancellationToken.CHECK_INTERVAL == 0:
+                cancel_token.raise_if_cancelled()
+
+            block = snapshot.word_blocks[position]
+            vector_match = vector_matches.get(position)
+            if vector_match is not None:
+                total_score, start_idx = vector_match
+                highlight_groups = self._build_highlight_groups(
+                    block, {0: set(range(start_idx, start_idx + len(keyword)))}
+                )
+            else:
+                result = self._score_block(block, [keyword], pinyin_search_enabled)
+                if result is None:
+                    continue
+                total_score, highlight_groups = result
+
+            scored_blocks.append({
+                'block': block,
+                'base_score': total_score,
+                'original_order': len(scored_blocks),
+                'highlight_groups': highlight_groups,
+            })
+        return scored_blocks
+
+    def _score_blocks_sharded(self, shard_pool, snapshot, keywords, pinyin_search_enabled=False, cancel_token=None):
+        """
+        将查询分发到分片进程池，并把各分片的命中按 word_blocks 顺序合并。
+        进程池中的数据与快照不是同一代时返回 None，由调用方改走本地搜索。
+        """
+        shard_results = shard_pool.search(keywords, pinyin_search_enabled, snapshot.generation, cancel_token)
+        if shard_results is None:
+            return None
+        source_indexes = snapshot.search_index.source_indexes
+
+        positioned_results = sorted(
+            (source_indexes[shard_key].global_positions[local_idx], total_score, highlight_groups)
+            for shard_key, local_idx, total_score, highlight_groups in shard_results
+        )
+
+        scored_blocks = []
+        for position, total_score, highlight_groups in positioned_results:
+            scored_blocks.append({
+                'block': snapshot.word_blocks[position],
+                'base_score': total_score,
+                'original_order': len(scored_blocks),
+                'highlight_groups': highlight_groups,
+            })
+        return scored_blocks
+
+    def _score_snapshot(self, snapshot, keywords, pinyin_search_enabled=False, cancel_token=None):
+        """在一份词库快照上做全量搜索，按可用的引擎选择打分路径。"""
+        if snapshot.vector_index is not None and len(keywords) == 1:
+            return self._score_blocks_vectorized(snapshot, keywords[0], pinyin_search_enabled, cancel_token)
+
+        shard_pool = self.shard_pool
+        if shard_pool is not None:
+            try:
+                scored_blocks = self._score_blocks_sharded(shard_pool, snapshot, keywords, pinyin_search_enabled, cancel_token)
+                if scored_blocks is not None:
+                    return scored_blocks
+            except (EOFError, OSError) as e:
+                log(f"CRITICAL: 分片搜索进程通信失败，将回退到单进程搜索: {e}")
+                self.shutdown()
+
+        # 先用倒排索引筛掉不可能命中的词条，再对候选集做逐字打分
+        search_pool = snapshot.search_index.candidates(keywords, pinyin_search_enabled)
+        return self._score_blocks(search_pool, keywords, pinyin_search_enabled, cancel_token)
+
+    def find_matches(self, query, multi_word_search_enabled=False, pinyin_search_enabled=False, search_context=None, cancel_token=None, limit=None):
         """
         全新的、基于字符映射表的精确匹配算法。
         取代了旧的 fuzzywuzzy 模糊匹配。
         【已重构】根据用户需求，实现分情况显示逻辑。
+        传入 search_context 时，会复用同一会话中上一次查询的结果做增量过滤。
+        可在后台线程调用：整个查询只读取开始时的词库快照，且不修改任何共享词条；
+        传入 cancel_token 时，查询被取消会抛出 SearchCancelled。
+        返回结果项列表，每项包含 'block' 与本次查询的 'highlight_groups'。
+        传入 limit 时只返回排序后的前 limit 项，调用方可用更大的 limit 再次查询以加载更多。
+        相同查询的打分结果与排序结果会进入跨会话的 LRU 缓存，直到结果代数变化。
+        剪贴板记忆开启时，剪贴板历史中的命中项也会按得分并入结果。
         """
         # 1. 当搜索框为空时
         if not query:
-            self._clear_highlight_groups()
+            if search_context:
+                search_context.reset()
 
-            # 如果剪贴板记忆开启，只显示剪贴板历史（按时间倒序）
+            # 如果剪贴板记忆开启，只显示剪贴板历史（按时间倒序），同样只取前 limit 条，滚动到底部时再加载下一页
             if self.settings.clipboard_memory_enabled:
-                return self.clipboard_history
+                return [{'block': block, 'highlight_groups': {}} for block in self.clipboard.newest(limit)]
             # 如果剪贴板记忆关闭，返回空列表以提高性能
             else:
                 return []
 
         # 2. 当有搜索词时（全局搜索模式）
-        search_pool = self.word_blocks
+        # 先读结果代数再读快照：重载总是先替换快照再递增代数，因此缓存键不会指向更新的数据
+        result_generation = self.result_generation
+        snapshot = self.snapshot
         query_lower = query.lower()
         keywords = [k for k in query_lower.split(' ') if k] if multi_word_search_enabled and ' ' in query_lower.strip() else [query_lower]
-        
-        scored_blocks = []
-
-        for block in search_pool:
-            char_map = block.get('char_map', [])
-            alias_entries = block.get('alias_search_entries', [])
-            if not char_map and not alias_entries:
-                continue
-
-            highlight_groups = {}
-            total_score = 0
-            all_keywords_found = True
-            used_indices_for_block = set()
-
-            for kw_idx, kw in enumerate(keywords):
-                best_target = None
-
-                parent_match = self._match_keyword_in_char_map(
-                    kw,
-                    char_map,
-                    pinyin_search_enabled=pinyin_search_enabled,
-                    used_indices=used_indices_for_block
-                )
-                if parent_match:
-                    best_target = {
-                        'target': 'parent',
-                        'score': parent_match['score'],
-                        'indices': parent_match['indices']
-                    }
-
-                for alias_entry in alias_entries:
-                    alias_match = self._match_keyword_in_char_map(
-                        kw,
-                        alias_entry.get('char_map', []),
-                        pinyin_search_enabled=pinyin_search_enabled
-                    )
-                    if not alias_match:
-                        continue
-
-                    alias_score = alias_match['score'] * 0.75
-                    if best_target is None or alias_score > best_target['score']:
-                        best_target = {
-                            'target': 'alias',
-                            'score': alias_score,
-                            'indices': set()
-                        }
-
-                if not best_target:
-                    all_keywords_found = False
-                    break
-
-                total_score += best_target['score']
-                if best_target['target'] == 'parent':
-                    used_indices_for_block.update(best_target['indices'])
-                    highlight_groups[kw_idx] = best_target['indices']
-
-            if all_keywords_found:
-                # 距离惩罚
-                if len(highlight_groups) > 1:
-                    all_indices = set().union(*highlight_groups.values())
-                    span = max(all_indices) - min(all_indices)
-                    total_score /= (1 + span * 0.1)
-
-                # --- 精确高亮 ---
-                parent_text = block['parent']
-                full_content = block['full_content']
-                parent_start_in_full = full_content.find(parent_text)
-                if parent_start_in_full != -1 and highlight_groups:
-                    block['highlight_groups'] = {
-                        g_idx: {idx + parent_start_in_full for idx in g_indices}
-                        for g_idx, g_indices in highlight_groups.items()
-                    }
+        search_state = (keywords, multi_word_search_enabled, pinyin_search_enabled, snapshot.generation)
+        cache_key = (query_lower, multi_word_search_enabled, pinyin_search_enabled, result_generation)
+
+        cache_entry = self.result_cache.get(cache_key)
+        if cache_entry is not None:
+            if search_context:
+                search_context.remember(*search_state, cache_entry['scored_blocks'])
+        else:
+            if search_context and search_context.is_same_query(*search_state):
+                # 同一查询（例如收藏后刷新）：直接复用得分，只重新做排序微调
+                scored_blocks = search_context.scored_blocks
+            else:
+                if search_context and search_context.can_refine(*search_state):
+                    # 新查询只是延长了最后一个关键词，命中集合必然是上次命中的子集
+                    scored_blocks = self._score_blocks(search_context.matched_blocks, keywords, pinyin_search_enabled, cancel_token)
                 else:
-                    block['highlight_groups'] = {}
-                
-                scored_blocks.append({
-                    'block': block,
-                    'base_score': total_score,
-                    'original_order': len(scored_blocks),
-                })
-
-        ranked_blocks = self._apply_ranking_adjustments(scored_blocks)
-        return [item['block'] for item in ranked_blocks]
+                    scored_blocks = self._score_snapshot(snapshot, keywords, pinyin_search_enabled, cancel_token)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if search_context:
+                    search_context.remember(*search_state, scored_blocks)
+            cache_entry = self.result_cache.put(cache_key, scored_blocks)
+
+        ranked = self._rank_cache_entry(cache_entry, limit)
+        if self.settings.clipboard_memory_enabled and len(self.clipboard.index):
+            ranked = self._merge_clipboard_matches(ranked, keywords, pinyin_search_enabled, cancel_token, limit)
+        return ranked
+
+    def _merge_clipboard_matches(self, ranked, keywords, pinyin_search_enabled=False, cancel_token=None, limit=None):
+        """
+        在剪贴板历史的倒排表上打分，并按基础得分并入词库的排序结果。
+        剪贴板每次复制都会变化，它的命中只在这里现算（候选集很小），不进入结果缓存；
+        得分相同时词库词条在前，剪贴板词条之间新的在前。
+        合并按一个与 limit 无关的全序进行：第 i 个词库词条的键为 (i, 1, 0)；剪贴板词条按得分从高到低排好后，
+        排在第一个得分低于它的词库词条之前，键为 (该词库词条的名次, 0, 剪贴板名次)。
+        ranked 是完整词库排序的前 limit 项，合并后截取前 limit 项，结果总是更大 limit 所得结果的前缀，
+        界面加载下一页时只需追加新的部分。
+        """
+        candidates = self.clipboard.candidates(keywords, pinyin_search_enabled)
+        clipboard_items = self._score_blocks(candidates, keywords, pinyin_search_enabled, cancel_token)
+        if not clipboard_items:
+            return ranked
+        clipboard_items.sort(key=lambda item: item['base_score'], reverse=True)
+
+        keyed_clipboard = []
+        slot = 0
+        for clipboard_rank, item in enumerate(clipboard_items):
+            while slot < len(ranked) and item['base_score'] <= ranked[slot]['base_score']:
+                slot += 1
+            keyed_clipboard.append(((slot, 0, clipboard_rank), item))
+        keyed_library = (((rank, 1, 0), item) for rank, item in enumerate(ranked))
+        merged = heapq.merge(keyed_clipboard, keyed_library, key=lambda pair: pair[0])
+        return [item for _, item in islice(merged, limit)]
+
+    def _rank_cache_entry(self, cache_entry, limit=None):
+        """对缓存条目做排序微调；已排好的前缀足够覆盖 limit 时直接复用。"""
+        ranked = cache_entry['ranked']
+        ranked_limit = cache_entry['ranked_limit']
+        if ranked is not None and (ranked_limit is None or (limit is not None and limit <= ranked_limit)):
+            return ranked if limit is None else ranked[:limit]
+
+        scored_blocks = cache_entry['scored_blocks']
+        ranked = self._apply_ranking_adjustments(scored_blocks, limit)
+        cache_entry['ranked'] = ranked
+        cache_entry['ranked_limit'] = limit if limit is not None and len(scored_blocks) > limit else None
+        return ranked
 
 
     def get_source_by_path(self, path):
@@ -1,52 +1,106 @@
 # -*- coding: utf-8 -*-
-import sys
 import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
 import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+import sys
 
 
 from core.config import *
+from core.word_block import WordBlock
 
 SHORTCUT_COMMAND_RE = re.compile(r'^k\s*[:：](?![:：])\s*(.+)$', re.IGNORECASE)
 ALIAS_COMMAND_RE = re.compile(r'^bm\s*[:：](?![:：])\s*(.+)$', re.IGNORECASE)
+# 剪贴板大文本的外置引用：``clip:<SHA-1 摘要>``，完整文本保存在 BlobStore 中
+BLOB_COMMAND_RE = re.compile(r'^clip\s*[:：]\s*([0-9a-f]{40})$', re.IGNORECASE)
+
+def parse_word_blocks(lines, file_path, base_offset=0, allow_blob_refs=False):
+    """
+    把词库文本行（readlines 且保留原换行符）解析为词条列表。
+    base_offset 为第一行在文件中的字节偏移，只解析文件新追加的部分时使用（见 ClipboardHistory）。
+    allow_blob_refs 只在解析剪贴板历史日志时为 True：普通词库中的 ``clip:...`` 不指向任何外置文本，按未知元命令处理。
+    """
+    blocks = []
+    current_block = None
+    current_lines = []
+    offset = base_offset
+
+    def finish_block(block, lines, end_offset):
+        # 原始行可由 full_content 按换行切分还原，不再单独保存一份
+        block.full_content = '\n'.join(lines)
+        block.body_length = end_offset - block.body_offset
+        blocks.append(block)
+
+    for line in lines:
+        line_start = offset
+        offset += len(line.encode('utf-8'))
+        if line.startswith('- '):
+            if current_block:
+                finish_block(current_block, current_lines, line_start)
+            
+            parent_text = line.strip()[2:].strip()
+            
+            # --- 新的元命令解析逻辑 ---
+            # 匹配所有 ``...`` 形式的元命令
+            meta_commands_pattern = r'``(.*?)``'
+            meta_commands = re.findall(meta_commands_pattern, parent_text)
+            
+            # 从原始文本中移除所有元命令，得到纯净的 parent_text
+            clean_parent_text = re.sub(meta_commands_pattern, '', parent_text).strip()
+
+            should_exclude = False
+            shortcut_code = None
+            blob_digest = None
+            aliases = []
+
+            # 遍历找到的所有元命令并进行处理
+            for command in meta_commands:
+                normalized_command = command.strip()
+                if normalized_command == '不出现':
+                    should_exclude = True
+                    continue
+
+                shortcut_match = SHORTCUT_COMMAND_RE.match(normalized_command)
+                if shortcut_match:
+                    # 提取 k/K + :/： 后面的内容作为快捷码
+                    shortcut_code = shortcut_match.group(1).strip()
+                    continue
+
+                blob_match = BLOB_COMMAND_RE.match(normalized_command) if allow_blob_refs else None
+                if blob_match:
+                    blob_digest = blob_match.group(1).lower()
+                    continue
+
+                alias_match = ALIAS_COMMAND_RE.match(normalized_command)
+                if alias_match:
+                    alias_text = alias_match.group(1).strip()
+                    if alias_text:
+                        aliases.extend(re.split(r'[、，]', alias_text))
+            # --- 新逻辑结束 ---
+
+            current_block = WordBlock(
+                parent=clean_parent_text, # 使用纯净文本
+                exclude_parent=should_exclude,
+                shortcut_code=shortcut_code, # 新增：快捷码
+                aliases=aliases,
+                source_path=file_path, # 标记来源
+                is_clipboard=False, # 默认非剪贴板
+                body_offset=line_start # 词条在文件中的字节起点
+            )
+            if blob_digest:
+                current_block.blob_digest = blob_digest # 只在有外置大文本时赋值
+            current_lines = [line.rstrip()]
+        elif current_block:
+            current_lines.append(line.rstrip())
+
+    if current_block:
+        finish_block(current_block, current_lines, offset)
+    return blocks
+
 
 # --- 词库数据源 ---
 class WordSource:
     def __init__(self, file_path):
-        self.file_path = file_path
+        # 同一文件的所有词条共用一个路径字符串
+        self.file_path = sys.intern(file_path)
         self.word_blocks = []
         self.load()
 
@@ -54,66 +108,11 @@ class WordSource:
         log(f"开始从 {self.file_path} 加载词库...")
         self.word_blocks = []
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
+            # newline='' 保留原始换行符，以便准确统计每行的字节偏移（惰性正文按偏移回读原文件）
+            with open(self.file_path, 'r', encoding='utf-8', newline='') as f:
                 lines = f.readlines()
 
-            current_block = None
-            for line in lines:
-                if line.startswith('- '):
-                    if current_block:
-                        current_block['full_content'] = '\n'.join(current_block['raw_lines'])
-                        self.word_blocks.append(current_block)
-                    
-                    parent_text = line.strip()[2:].strip()
-                    
-                    # --- 新的元命令解析逻辑 ---
-                    # 匹配所有 ``...`` 形式的元命令
-                    meta_commands_pattern = r'``(.*?)``'
-                    meta_commands = re.findall(meta_commands_pattern, parent_text)
-                    
-                    # 从原始文本中移除所有元命令，得到纯净的 parent_text
-                    clean_parent_text = re.sub(meta_commands_pattern, '', parent_text).strip()
-
-                    should_exclude = False
-                    shortcut_code = None
-                    aliases = []
-
-                    # 遍历找到的所有元命令并进行处理
-                    for command in meta_commands:
-                        normalized_command = command.strip()
-                        if normalized_command == '不出现':
-                            should_exclude = True
-                            continue
-
-                        shortcut_match = SHORTCUT_COMMAND_RE.match(normalized_command)
-                        if shortcut_match:
-                            # 提取 k/K + :/： 后面的内容作为快捷码
-                            shortcut_code = shortcut_match.group(1).strip()
-                            continue
-
-                        alias_match = ALIAS_COMMAND_RE.match(normalized_command)
-                        if alias_match:
-                            alias_text = alias_match.group(1).strip()
-                            if alias_text:
-                                aliases.extend(re.split(r'[、，]', alias_text))
-                    # --- 新逻辑结束 ---
-
-                    current_block = {
-                        'parent': clean_parent_text, # 使用纯净文本
-                        'raw_lines': [line.rstrip()],
-                        'exclude_parent': should_exclude,
-                        'shortcut_code': shortcut_code, # 新增：快捷码
-                        'aliases': aliases,
-                        'source_path': self.file_path, # 标记来源
-                        'is_clipboard': False # 默认非剪贴板
-                    }
-                elif current_block:
-                    current_block['raw_lines'].append(line.rstrip())
-
-            if current_block:
-                current_block['full_content'] = '\n'.join(current_block['raw_lines'])
-                self.word_blocks.append(current_block)
-            
+            self.word_blocks = parse_word_blocks(lines, self.file_path)
             log(f"成功从 {os.path.basename(self.file_path)} 加载 {len(self.word_blocks)} 个词条。")
         except FileNotFoundError:
             log(f"词库文件不存在: {self.file_path}")
@@ -138,17 +137,15 @@ class WordSource:
 
             all_blocks = loader.word_blocks
             
-            # 寻找并替换要更新的块
+            # 寻找并替换要更新的块（只需要各块的完整内容）
             found = False
-            new_blocks = []
+            new_contents = []
             for block in all_blocks:
-                if block['full_content'] == original_content:
-                    # 创建一个新的 block 结构来代表更新后的内容
-                    # 注意：这里我们只替换 full_content，其他字段不会被使用
-                    new_blocks.append({'full_content': new_content})
+                if block.full_content == original_content:
+                    new_contents.append(new_content)
                     found = True
                 else:
-                    new_blocks.append(block)
+                    new_contents.append(block.full_content)
             
             if not found:
                 log(f"update_entry: 在 {self.file_path} 中未找到要更新的内容")
@@ -156,7 +153,7 @@ class WordSource:
 
             # 从更新后的块列表中重建文件内容
             # 使用 '\n' 作为分隔符，因为 add_entry 会在每个条目前加一个换行符
-            new_file_content = '\n'.join([block['full_content'] for block in new_blocks])
+            new_file_content = '\n'.join(new_contents)
             
             with open(self.file_path, 'w', encoding='utf-8') as f:
                 f.write(new_file_content)
@@ -176,7 +173,7 @@ class WordSource:
             all_blocks = loader.word_blocks
             
             # 过滤掉要删除的块
-            remaining_blocks = [block for block in all_blocks if block['full_content'] != content_to_delete]
+            remaining_blocks = [block for block in all_blocks if block.full_content != content_to_delete]
             
             # 如果块的数量没有减少，说明没有找到要删除的内容
             if len(remaining_blocks) == len(all_blocks):
@@ -185,7 +182,7 @@ class WordSource:
 
             # 从剩余的块中重建文件内容
             # 使用 '\n' 作为分隔符，因为 add_entry 会在每个条目前加一个换行符
-            new_file_content = '\n'.join([block['full_content'] for block in remaining_blocks])
+            new_file_content = '\n'.join([block.full_content for block in remaining_blocks])
             
             with open(self.file_path, 'w', encoding='utf-8') as f:
                 f.write(new_file_content)
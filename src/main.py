@@ -1,43 +1,14 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
-import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame, QDialog)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+import time
+STARTUP_STARTED_AT = time.perf_counter() # 启动计时起点（包含下方各模块的导入耗时）
+from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QDialog
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QIcon, QAction, QActionGroup
 
 
+import multiprocessing
 from core.config import *
 from core.ranking_state import RankingStateManager
 from core.settings import SettingsManager
@@ -51,6 +22,9 @@ from PySide6.QtNetwork import QLocalServer, QLocalSocket
 
 # --- main入口 ---
 if __name__ == "__main__":
+    # 打包为 exe 后，分片搜索的子进程需要由此入口接管
+    multiprocessing.freeze_support()
+
     # --- 启用高DPI支持 ---
     # PySide6 默认启用缩放，仅保留取整策略即可
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
@@ -80,9 +54,14 @@ if __name__ == "__main__":
             log(f"创建默认词库文件失败: {e}")
 
     settings_manager = SettingsManager(CONFIG_FILE)
-    ranking_state_manager = RankingStateManager(RANKING_STATE_FILE)
+    ranking_state_manager = RankingStateManager(
+        RANKING_STATE_FILE,
+        durability=settings_manager.ranking_durability,
+        flush_interval=settings_manager.ranking_flush_seconds,
+    )
     template_renderer = TemplateRenderer()
-    word_manager = WordManager(settings_manager, ranking_state_manager)
+    # 词库在托盘图标与热键就绪后再由后台线程渐进加载，避免开机后长时间等不到热键
+    word_manager = WordManager(settings_manager, ranking_state_manager, load_libraries=False)
     controller = MainController(
         app,
         word_manager,
@@ -111,6 +90,7 @@ if __name__ == "__main__":
             sys.exit(0)
 
     tray_icon = QSystemTrayIcon(QIcon(ICON_PATH), app); tray_icon.setToolTip("QuickKV")
+    controller.tray_icon = tray_icon # 将托盘图标传递给controller，用于显示重载状态
     
     # 点击托盘图标触发主界面
     def on_tray_activated(reason):
@@ -279,7 +259,8 @@ if __name__ == "__main__":
     controller.rebuild_auto_library_menu()      # 基于扫描结果，首次强制构建自动词库菜单UI
     tray_icon.setContextMenu(menu); tray_icon.show()
     
-    log("程序启动成功，正在后台运行。")
+    log(f"程序启动成功，正在后台运行。启动耗时 {time.perf_counter() - STARTUP_STARTED_AT:.2f}s。")
+    controller.start_initial_library_load()
     print(f"按下 '{settings_manager.hotkey}' 来激活或关闭窗口。")
     print(f"当前主题: {settings_manager.theme}。右键点击托盘图标可进行设置。")
     
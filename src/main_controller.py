@@ -2,48 +2,28 @@
 import sys
 import os
 import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
-import re
-import itertools
-import threading
 import ctypes
 import time
+import math
 from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame, QDialog)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
+from PySide6.QtWidgets import (QWidget, QHBoxLayout, QPushButton, QInputDialog, QMessageBox,
+                               QFileDialog, QCheckBox, QWidgetAction, QDialog)
+from PySide6.QtCore import Signal, Slot, QObject, QTimer, QProcess, QThreadPool
+from PySide6.QtGui import QAction
 import pyperclip
-from pypinyin import pinyin, Style
 from pynput import keyboard
-from fuzzywuzzy import fuzz
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
-
 
 import builtins
 # Dependency Injection
 from core.config import *
 from core.template_renderer import TemplateRenderer, TemplateRenderError
+from core.clipboard_expiry import ClipboardExpiry
+from core.blob_store import text_digest
 from ui.search_popup import SearchPopup
+from ui.reload_worker import ReloadTask
 from ui.components import HotkeyDialog, DisclaimerDialog, ScrollableMessageBox, get_disclaimer_html_text, EditDialog, TemplateInputDialog
 from services.hotkey_manager import NativeHotkeyManager
 from services.shortcut_listener import ShortcutListener
@@ -69,18 +49,19 @@ class LibraryChangeHandler(FileSystemEventHandler):
             return
 
         # 不论是源路径还是目标路径（用于移动事件），只要是.md文件就触发
-        if event.src_path.endswith('.md') or (hasattr(event, 'dest_path') and event.dest_path.endswith('.md')):
+        changed_paths = [path for path in (event.src_path, getattr(event, 'dest_path', '')) if path and path.endswith('.md')]
+        if changed_paths:
             log(f"Watchdog 检测到事件: {event.event_type} - {event.src_path}")
             # 【关键修复】通过发射信号来安全地通知主线程，而不是直接调用方法
-            self.controller.thread_safe_reload_signal.emit()
+            self.controller.thread_safe_reload_signal.emit(changed_paths)
 
 
 # --- 主控制器 ---
 class MainController(QObject):
     show_popup_signal = Signal()
     hide_popup_signal = Signal()
-    # 新增：用于从 watchdog 线程安全地触发重载的信号
-    thread_safe_reload_signal = Signal()
+    # 新增：用于从 watchdog 线程安全地触发重载的信号（携带发生变化的文件路径）
+    thread_safe_reload_signal = Signal(list)
 
     MODIFIER_VKS = {
         'ctrl': 0x11,
@@ -120,10 +101,17 @@ class MainController(QObject):
         self.full_reload_timer = QTimer(self)
         self.full_reload_timer.setSingleShot(True)
         self.full_reload_timer.setInterval(500) # 500ms 防抖
-        self.full_reload_timer.timeout.connect(self.perform_full_reload)
+        self.full_reload_timer.timeout.connect(self.perform_scheduled_reload)
+        self.pending_reload_paths = set() # 防抖期间累积的变化文件
+        self.pending_full_reload = False # 防抖期间是否有需要全量重载的请求
+        # 全量重载在后台线程构建新快照，完成后回到界面线程一次性替换
+        self.reload_thread_pool = QThreadPool(self)
+        self.reload_thread_pool.setMaxThreadCount(1)
+        self.reload_task = None
+        self.tray_icon = None # 由 main.py 设置，用于显示“正在重载”状态
 
         # 【关键修复】连接线程安全信号到实际的调度槽
-        self.thread_safe_reload_signal.connect(self.schedule_full_reload)
+        self.thread_safe_reload_signal.connect(self.schedule_library_update)
 
         self.observer = None
         self.start_file_observer()
@@ -133,13 +121,13 @@ class MainController(QObject):
         self.auto_restart_timer.timeout.connect(self.perform_restart)
         self.update_auto_restart_timer()
 
-        # 初始化剪贴板定时清除
-        self.clipboard_timestamps = {}
-        self.sync_clipboard_timestamps()
-        
+        # 初始化剪贴板定时清除：单次定时器只在下一个条目到期时触发，不再每分钟轮询
         self.clipboard_clear_timer = QTimer(self)
+        self.clipboard_clear_timer.setSingleShot(True)
         self.clipboard_clear_timer.timeout.connect(self.check_clipboard_auto_clear)
-        self.clipboard_clear_timer.start(60000) # 每分钟检查一次
+        self.clipboard_expiry = ClipboardExpiry(CLIPBOARD_TIMESTAMPS_FILE)
+        self.clipboard_expiry_generation = None # 上次全量对齐时剪贴板历史的加载代数
+        self.sync_clipboard_timestamps()
 
         self.ignore_next_clipboard_change = False # 用于防止记录自己的输出
         self.app.clipboard().dataChanged.connect(self.on_clipboard_changed)
@@ -175,35 +163,76 @@ class MainController(QObject):
             self.ignore_next_clipboard_change = False
             return
 
-        # 避免空内容和重复内容
-        if not current_text or current_text == getattr(self, "_last_clipboard_text", ""):
+        if not current_text:
+            return
+
+        data = current_text.encode('utf-8')
+        max_bytes = self.settings.clipboard_max_kb * 1024
+        if max_bytes and len(data) > max_bytes:
+            log(f"剪贴板内容过大（{len(data) // 1024} KB），超过记录上限，已跳过。")
+            return
+
+        # 避免重复内容：只保留上一次内容的摘要，不长期持有可能很大的完整文本
+        current_digest = text_digest(data)
+        if current_digest == getattr(self, "_last_clipboard_digest", None):
             return
 
         # --- 核心逻辑 ---
-        self._last_clipboard_text = current_text
+        self._last_clipboard_digest = current_digest
         # 换行符规范化
         normalized_text = '\n'.join(current_text.splitlines())
-        log(f"检测到新的剪贴板内容 (事件驱动): '{normalized_text}'")
+        log(f"检测到新的剪贴板内容 (事件驱动): '{normalized_text[:CLIPBOARD_PREVIEW_CHARS]}'（{len(normalized_text)} 字）")
         
-        was_added = self.word_manager.add_to_clipboard_history(normalized_text)
+        added_blocks = self.word_manager.add_to_clipboard_history(normalized_text)
         
-        if was_added:
-            self.sync_clipboard_timestamps(current_time=time.time())
+        if added_blocks:
+            self.record_clipboard_timestamps(added_blocks, current_time=time.time())
             if self.popup.isVisible():
                 self.popup.update_list(self.popup.search_box.text())
 
     def sync_clipboard_timestamps(self, current_time=None):
-        """将时间戳与当前剪贴板历史的完整块内容对齐。"""
+        """
+        将时间戳与当前剪贴板历史全量对齐并重新安排下一次清除。
+        需要遍历全部历史并重写时间戳文件，只在启动、开启定时清除、清空与历史被重新加载后调用；定时清除关闭时不做任何事。
+        """
+        if not self.settings.clipboard_auto_clear_enabled:
+            return
         if current_time is None:
             current_time = time.time()
 
-        existing_timestamps = getattr(self, 'clipboard_timestamps', {})
-        synced_timestamps = {}
-        for block in self.word_manager.clipboard_history:
-            key = block['full_content']
-            synced_timestamps[key] = existing_timestamps.get(key, current_time)
+        self.clipboard_expiry.sync(
+            (block.full_content for block in self.word_manager.clipboard.entries),
+            current_time,
+        )
+        self.clipboard_expiry_generation = self.word_manager.clipboard.load_generation
+        self.schedule_clipboard_auto_clear()
 
-        self.clipboard_timestamps = synced_timestamps
+    def record_clipboard_timestamps(self, blocks, current_time=None):
+        """为新复制的条目记录时间：只入堆并追加一行，与历史条数无关。"""
+        if not self.settings.clipboard_auto_clear_enabled:
+            return
+        if current_time is None:
+            current_time = time.time()
+        for block in blocks:
+            self.clipboard_expiry.record(block.full_content, current_time)
+        if not self.clipboard_clear_timer.isActive():
+            self.schedule_clipboard_auto_clear()
+
+    def forget_clipboard_timestamps(self, contents):
+        """被删除的条目不再参与定时清除。"""
+        self.clipboard_expiry.discard(contents)
+        self.schedule_clipboard_auto_clear()
+
+    def schedule_clipboard_auto_clear(self):
+        """把单次定时器设到最早一个剪贴板条目的到期时刻；功能关闭或没有条目时停止定时器。"""
+        self.clipboard_clear_timer.stop()
+        if not self.settings.clipboard_auto_clear_enabled:
+            return
+        next_expiry = self.clipboard_expiry.next_expiry(self.settings.clipboard_auto_clear_minutes * 60)
+        if next_expiry is None:
+            return
+        delay_ms = max(0, math.ceil((next_expiry - time.time()) * 1000))
+        self.clipboard_clear_timer.start(delay_ms)
 
     def _start_detached_process(self, program, arguments):
         """兼容 PySide6 不同返回值形态的 detached 启动封装。"""
@@ -390,36 +419,133 @@ class MainController(QObject):
     def schedule_full_reload(self):
         """（防抖）安排一个完整的词库扫描和重载"""
         log("检测到词库相关变化，安排全量重载...")
+        self.pending_full_reload = True
+        self.full_reload_timer.start()
+
+    @Slot(list)
+    def schedule_library_update(self, changed_paths):
+        """（防抖）记录发生变化的词库文件，计时结束后只增量更新这些文件。"""
+        self.pending_reload_paths.update(changed_paths)
         self.full_reload_timer.start()
 
+    @Slot()
+    def perform_scheduled_reload(self):
+        """
+        防抖计时结束后执行重载。
+        只有文件内容变化时走增量更新；期间有全量重载请求、自动加载目录中的文件增删，
+        或增量更新判定词库集合已变化时，回退到全量重载。增量更新没有改变任何数据时不刷新界面。
+        """
+        if self.reload_task is not None:
+            # 后台重载尚未完成，待其完成后再处理累积的请求
+            return
+
+        changed_paths = self.pending_reload_paths
+        full_reload = self.pending_full_reload
+        self.pending_reload_paths = set()
+        self.pending_full_reload = False
+
+        if full_reload or not changed_paths:
+            self.perform_full_reload()
+            return
+        if self.scan_and_update_auto_libraries():
+            self.stop_file_observer()
+            self.start_file_observer()
+            self.perform_full_reload()
+            return
+        changed = self.word_manager.update_files(changed_paths)
+        if changed is None:
+            self.perform_full_reload()
+            return
+        if not changed:
+            # 文件事件没有带来任何数据变化，无需重建快捷码或刷新搜索列表
+            return
+
+        self._refresh_after_reload()
+        log(f"--- 增量更新完成: {len(changed_paths)} 个文件 ---")
+
+    def _refresh_after_reload(self):
+        """新词库数据生效后，同步剪贴板时间戳、快捷码与可见的搜索列表。"""
+        if self.word_manager.clipboard.load_generation != self.clipboard_expiry_generation:
+            # 剪贴板历史被重新加载过（例如文件被外部修改），才需要全量对齐
+            self.sync_clipboard_timestamps()
+        if self.shortcut_listener and self.settings.shortcut_code_enabled:
+            self.shortcut_listener.update_shortcuts()
+        if self.popup.isVisible():
+            self.popup.update_list(self.popup.search_box.text())
+
+    def _set_reloading_indicator(self, reloading):
+        """在托盘图标提示中显示是否正在后台重载词库。"""
+        if self.tray_icon is not None:
+            self.tray_icon.setToolTip("QuickKV（正在重载词库...）" if reloading else "QuickKV")
+
     @Slot()
     def perform_full_reload(self):
         """
         执行完整的词库重新加载流程。
         1. 重新扫描自动加载目录以发现新/删除的文件。
-        2. 重新加载所有词库数据（利用缓存）。
-        3. 更新快捷码。
-        4. 如果UI可见，刷新列表。
+        2. 在后台线程重新加载所有词库数据（利用缓存），期间搜索继续使用旧快照。
+        3. 完成后在界面线程替换快照，更新快捷码；如果UI可见，刷新列表。
+        已有后台重载在进行时，记下请求，待其完成后再执行一次。
         """
+        if self.reload_task is not None:
+            self.pending_full_reload = True
+            return
+
         log("--- 开始执行全量重载 ---")
         # 重新扫描自动加载目录，如果发生变化，则重启监视器
         if self.scan_and_update_auto_libraries():
              self.stop_file_observer()
              self.start_file_observer()
 
-        self.word_manager.reload_all() # 核心：加载所有词库
-        self.sync_clipboard_timestamps()
-        if self.shortcut_listener and self.settings.shortcut_code_enabled:
-            self.shortcut_listener.update_shortcuts()
+        self._start_background_reload(progressive=False)
+
+    def start_initial_library_load(self):
+        """
+        启动时的首次词库加载：托盘图标与热键就绪后才调用。
+        后台逐批加载文件，每批完成后立即并入当前快照，弹窗此时已可搜索已加载的部分并显示加载进度。
+        """
+        log("--- 开始渐进加载词库 ---")
+        self._start_background_reload(progressive=True)
+
+    def _start_background_reload(self, progressive):
+        self.reload_task = ReloadTask(self.word_manager, progressive) # 核心：加载所有词库
+        self.reload_task.signals.progress.connect(self._on_reload_progress)
+        self.reload_task.signals.finished.connect(self._on_reload_prepared)
+        self._set_reloading_indicator(True)
+        self.popup.update_loading_state()
+        self.reload_thread_pool.start(self.reload_task)
+
+    @Slot(object)
+    def _on_reload_progress(self, progress):
+        """渐进加载：并入刚加载完成的一批文件，刷新加载进度与可见的搜索结果。"""
+        self.word_manager.merge_loaded_sources(progress)
+        self.popup.update_loading_state()
         if self.popup.isVisible():
             self.popup.update_list(self.popup.search_box.text())
+
+    @Slot(object)
+    def _on_reload_prepared(self, prepared):
+        """后台重载完成：在界面线程一次性替换快照，并处理重载期间累积的请求。"""
+        self.reload_task = None
+        self._set_reloading_indicator(False)
+        if prepared is not None:
+            self.word_manager.apply_reload(prepared)
+            self._refresh_after_reload()
+        else:
+            self.word_manager.loading_progress = None
+        self.popup.update_loading_state()
         # 重新构建菜单（特别是自动加载菜单）以反映变化
         self.rebuild_auto_library_menu()
         log("--- 全量重载完成 ---")
+
+        if self.pending_full_reload or self.pending_reload_paths:
+            self.full_reload_timer.start()
     def _find_block_by_full_content(self, text):
-        search_pool = self.word_manager.clipboard_history + self.word_manager.word_blocks
-        for block in search_pool:
-            if block['full_content'] == text:
+        clipboard_block = self.word_manager.find_clipboard_block(text)
+        if clipboard_block is not None:
+            return clipboard_block
+        for block in self.word_manager.word_blocks:
+            if self.word_manager.has_content(block, text):
                 return block
         return None
 
@@ -427,11 +553,19 @@ class MainController(QObject):
         if not found_block:
             return selected_text.replace('- ', '', 1)
 
-        if found_block['exclude_parent']:
-            return '\n'.join(found_block['raw_lines'][1:])
+        if found_block.blob_digest:
+            # 外置的大文本：历史中只有预览，粘贴时才读取完整内容
+            blob_text = self.word_manager.get_clipboard_blob_text(found_block)
+            if blob_text is not None:
+                return blob_text
+            log("剪贴板大文本已丢失，改为输出预览内容。")
 
-        first_line = found_block['parent']
-        return '\n'.join([first_line] + found_block['raw_lines'][1:])
+        raw_lines = self.word_manager.get_raw_lines(found_block)
+        if found_block.exclude_parent:
+            return '\n'.join(raw_lines[1:])
+
+        first_line = found_block.parent
+        return '\n'.join([first_line] + raw_lines[1:])
 
     @Slot(str)
     def on_suggestion_selected(self, text, target_hwnd=None, origin='popup'):
@@ -507,12 +641,12 @@ class MainController(QObject):
 
     def record_entry_usage(self, block):
         """仅记录真正完成输出的普通词条使用行为。"""
-        if not block or block.get('is_clipboard'):
+        if not block or block.is_clipboard:
             return
         if not self.ranking_state:
             return
 
-        entry_id = block.get('entry_id')
+        entry_id = block.entry_id
         if not entry_id:
             return
 
@@ -521,19 +655,19 @@ class MainController(QObject):
 
     def toggle_block_favorite(self, block):
         """切换普通词条的收藏状态，并刷新当前结果。"""
-        if not block or block.get('is_clipboard'):
+        if not block or block.is_clipboard:
             return
         if not self.ranking_state:
             return
 
-        entry_id = block.get('entry_id')
+        entry_id = block.entry_id
         if not entry_id:
             return
 
         new_state = self.ranking_state.toggle_favorite(entry_id)
         self.word_manager.refresh_ranking_metadata()
         state_text = "已收藏" if new_state else "已取消收藏"
-        log(f"{state_text}: {block.get('parent', '')}")
+        log(f"{state_text}: {block.parent}")
         if self.popup.isVisible():
             self.popup.update_list(self.popup.search_box.text())
 
@@ -606,7 +740,7 @@ class MainController(QObject):
         found_block = None
         search_pool = self.word_manager.word_blocks + self.word_manager.clipboard_history
         for block in search_pool:
-            if block['full_content'] == original_content:
+            if self.word_manager.has_content(block, original_content):
                 found_block = block
                 break
         
@@ -614,8 +748,8 @@ class MainController(QObject):
             QMessageBox.warning(self.popup, "错误", "找不到要编辑的词条。")
             return
 
-        is_clipboard = found_block.get('source_path') == CLIPBOARD_HISTORY_FILE
-        source_path = found_block.get('source_path')
+        is_clipboard = found_block.source_path == CLIPBOARD_HISTORY_FILE
+        source_path = found_block.source_path
         
         source = self.word_manager.get_source_by_path(source_path)
 
@@ -641,7 +775,7 @@ class MainController(QObject):
         found_block = None
         search_pool = self.word_manager.word_blocks + self.word_manager.clipboard_history
         for block in search_pool:
-            if block['full_content'] == content:
+            if self.word_manager.has_content(block, content):
                 found_block = block
                 break
 
@@ -649,8 +783,8 @@ class MainController(QObject):
             QMessageBox.warning(self.popup, "错误", "找不到要删除的词条。")
             return
 
-        is_clipboard = found_block.get('source_path') == CLIPBOARD_HISTORY_FILE
-        source_path = found_block.get('source_path')
+        is_clipboard = found_block.source_path == CLIPBOARD_HISTORY_FILE
+        source_path = found_block.source_path
  
         source = self.word_manager.get_source_by_path(source_path)
 
@@ -667,7 +801,15 @@ class MainController(QObject):
         )
         
         if dialog.exec() == QDialog.Accepted:
-            if source.delete_entry(content):
+            if is_clipboard:
+                # 剪贴板条目只需从历史缓冲区和日志中删除，无需重载词库
+                if self.word_manager.remove_from_clipboard_history([content]):
+                    self.forget_clipboard_timestamps([content])
+                    if self.popup.isVisible():
+                        self.popup.update_list(self.popup.search_box.text())
+                else:
+                    QMessageBox.warning(self.popup, "错误", "从剪贴板历史删除词条失败！")
+            elif source.delete_entry(content):
                 # 统一调用全量重载
                 self.schedule_full_reload()
                 
@@ -678,8 +820,10 @@ class MainController(QObject):
 
     def move_clipboard_item_to_library(self, item_content, target_path):
         """将剪贴板条目移动到指定的词库"""
-        # 1. 提取纯文本
-        text_to_add = item_content.replace('- ', '', 1).strip()
+        # 1. 提取纯文本（外置的大文本取完整内容）
+        clipboard_block = self.word_manager.find_clipboard_block(item_content)
+        blob_text = self.word_manager.get_clipboard_blob_text(clipboard_block) if clipboard_block else None
+        text_to_add = blob_text if blob_text is not None else item_content.replace('- ', '', 1).strip()
 
         # 2. 添加到目标词库
         source = self.word_manager.get_source_by_path(target_path)
@@ -688,11 +832,10 @@ class MainController(QObject):
             self.schedule_full_reload() # 安排重载来更新所有状态
 
             # 3. 从剪贴板历史中删除
-            if self.word_manager.clipboard_source.delete_entry(item_content):
+            if self.word_manager.remove_from_clipboard_history([item_content]):
                 log(f"已从剪贴板历史中删除 '{item_content}'")
                 # 4. 刷新
-                self.word_manager.load_clipboard_history()
-                self.sync_clipboard_timestamps(current_time=time.time())
+                self.forget_clipboard_timestamps([item_content])
                 if self.popup.isVisible():
                     self.popup.update_list(self.popup.search_box.text())
             else:
@@ -937,6 +1080,11 @@ class MainController(QObject):
         if self.shortcut_listener:
             self.shortcut_listener.stop() # 退出时停止快捷码监听
         self.stop_file_observer() # 确保停止 watchdog
+        self.popup.stop_search_worker() # 取消并等待后台搜索线程
+        self.reload_thread_pool.waitForDone(5000) # 等待进行中的后台重载写完缓存
+        self.word_manager.shutdown() # 停止分片搜索进程池
+        if self.ranking_state:
+            self.ranking_state.close() # 写出尚未落盘的使用记录并压缩为快照
         log("所有监听器已停止，程序准备退出。")
 
     @Slot()
@@ -1180,10 +1328,11 @@ class MainController(QObject):
         current_count = self.settings.clipboard_memory_count
         new_count, ok = QInputDialog.getInt(None, "设置记忆次数",
                                              "请输入剪贴板记忆的最大条数:",
-                                             current_count, 1, 100, 1)
+                                             current_count, 1, CLIPBOARD_HISTORY_MAX_COUNT, 1)
         if ok and new_count != current_count:
             self.settings.clipboard_memory_count = new_count
             self.settings.save()
+            self.word_manager.set_clipboard_capacity(new_count) # 被挤出的条目到期时按已删除处理
             log(f"剪贴板记忆次数已更新为: {new_count}")
             QMessageBox.information(None, "成功", f"剪贴板记忆次数已设置为 {new_count} 条！")
 
@@ -1194,7 +1343,6 @@ class MainController(QObject):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             if self.word_manager.clear_clipboard_history():
-                self.clipboard_timestamps = {}
                 self.sync_clipboard_timestamps()
                 QMessageBox.information(None, "成功", "剪贴板历史已清空！")
                 if self.popup.isVisible():
@@ -1212,7 +1360,7 @@ class MainController(QObject):
         if self.settings.clipboard_auto_clear_enabled:
             current_time = time.time()
             self.sync_clipboard_timestamps(current_time=current_time)
-            self.check_clipboard_auto_clear()
+        self.check_clipboard_auto_clear()
         
         log(f"剪贴板定时清除功能: {'开启' if self.settings.clipboard_auto_clear_enabled else '关闭'}")
 
@@ -1231,32 +1379,27 @@ class MainController(QObject):
 
     @Slot()
     def check_clipboard_auto_clear(self):
+        """清除已到期的剪贴板条目（从堆顶依次弹出，一次重写日志），然后安排下一次触发。"""
         if not self.settings.clipboard_auto_clear_enabled:
+            self.clipboard_clear_timer.stop()
             return
         
         current_time = time.time()
         threshold = self.settings.clipboard_auto_clear_minutes * 60
-        items_to_delete = []
-        
-        for text, timestamp in list(self.clipboard_timestamps.items()):
-            if current_time - timestamp > threshold:
-                items_to_delete.append(text)
+        items_to_delete = self.clipboard_expiry.pop_expired(current_time, threshold)
                 
         if items_to_delete:
-            deleted_any = False
-            for full_content in items_to_delete:
-                if self.word_manager.clipboard_source and self.word_manager.clipboard_source.delete_entry(full_content):
-                    deleted_any = True
-                if full_content in self.clipboard_timestamps:
-                    del self.clipboard_timestamps[full_content]
+            # 一次重写日志删除全部过期条目
+            deleted_count = self.word_manager.remove_from_clipboard_history(items_to_delete)
             
-            if deleted_any:
-                log(f"已自动清除过期的剪贴板内容: {len(items_to_delete)} 条")
-                self.word_manager.load_clipboard_history() # 重新加载以更新内部状态
-                self.sync_clipboard_timestamps(current_time=current_time)
+            if deleted_count:
+                log(f"已自动清除过期的剪贴板内容: {deleted_count} 条")
                 if self.popup.isVisible():
                     self.popup.update_list(self.popup.search_box.text())
 
+        # 定时器可能略早触发，此时没有条目到期，重新安排即可
+        self.schedule_clipboard_auto_clear()
+
     # --- 新增：自动重启相关方法 ---
     @Slot()
     def perform_restart(self):
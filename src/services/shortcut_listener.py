@@ -1,42 +1,9 @@
 # -*- coding: utf-8 -*-
-import sys
-import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
-import re
-import itertools
 import threading
 import ctypes
 import time
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
+from PySide6.QtCore import Signal, QObject
 from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
 
 
 from core.config import *
@@ -112,8 +79,8 @@ class ShortcutListener(QObject):
         self.shortcut_map = {}
         all_blocks = self.word_manager.word_blocks + self.word_manager.clipboard_history
         for block in all_blocks:
-            if block.get('shortcut_code'):
-                self.shortcut_map[block['shortcut_code'].lower()] = block
+            if block.shortcut_code:
+                self.shortcut_map[block.shortcut_code.lower()] = block
         self.sorted_codes = sorted(self.shortcut_map.keys(), key=len, reverse=True)
         longest_code = max((len(code) for code in self.shortcut_map.keys()), default=0)
         self.max_buffer_length = max(8, longest_code + 4)
@@ -188,7 +155,7 @@ class ShortcutListener(QObject):
                 if self.typed_buffer.endswith(code):
                     log(f"快捷码 '{code}' 匹配成功! buffer='{self.typed_buffer}'")
                     block = self.shortcut_map[code]
-                    self.shortcut_matched.emit(block['full_content'], code)
+                    self.shortcut_matched.emit(self.word_manager.get_full_content(block), code)
                     self.typed_buffer = "" # 重置缓冲区
                     return # 匹配成功后立即返回
 
@@ -1,41 +1,8 @@
 # -*- coding: utf-8 -*-
-import sys
 import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
-import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QRectF, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPainter, QColor
 
 
 from core.config import *
@@ -48,7 +15,7 @@ class StyledItemDelegate(QStyledItemDelegate):
         # Cache Key: (text_hash, width, is_selected, theme_name)
         self._doc_cache = {}
 
-    def _create_text_document(self, text, option, block_data, is_selected=False):
+    def _create_text_document(self, text, option, highlight_groups, is_selected=False):
         from PySide6.QtGui import QTextDocument, QTextOption, QTextCursor, QTextCharFormat, QFont
         
         # 计算可用宽度作为缓存维度之一
@@ -56,7 +23,7 @@ class StyledItemDelegate(QStyledItemDelegate):
         text_hash = hash(text)
         
         # 获取高亮组并字符串化作为缓存键的一部分，应对搜索词改变但文本不变时的高亮更新
-        highlight_groups = block_data.get('highlight_groups', {}) if self.settings.highlight_matches else {}
+        highlight_groups = (highlight_groups or {}) if self.settings.highlight_matches else {}
         highlight_key = str(highlight_groups)
         
         cache_key = (text_hash, available_width, bool(is_selected), self.settings.theme, highlight_key)
@@ -93,7 +60,6 @@ class StyledItemDelegate(QStyledItemDelegate):
             doc.setTextWidth(available_width)
             
         theme = self.themes[self.settings.theme]
-        highlight_groups = block_data.get('highlight_groups', {}) if self.settings.highlight_matches else {}
         
         highlight_colors = [
             theme['highlight_color'],
@@ -180,7 +146,7 @@ class StyledItemDelegate(QStyledItemDelegate):
             painter.fillRect(rect, QColor(theme['bg_color']))
 
         # 创建 QTextDocument 以支持换行和HTML高亮
-        doc = self._create_text_document(full_text, option, block_data, is_selected=is_selected)
+        doc = self._create_text_document(full_text, option, index.data(HIGHLIGHT_GROUPS_ROLE), is_selected=is_selected)
         
         padding_v = 5
         padding_h = 8
@@ -194,11 +160,11 @@ class StyledItemDelegate(QStyledItemDelegate):
 
         # --- 新增功能：绘制“归属显示”徽章 (Badge) ---
         if self.settings.show_source_enabled:
-            source_path = block_data.get('source_path', '')
+            source_path = block_data.source_path or ''
             if source_path:
                 basename = os.path.basename(source_path)
                 name_without_ext = os.path.splitext(basename)[0]
-                if block_data.get('is_favorite'):
+                if block_data.is_favorite:
                     name_without_ext = f"⭐ {name_without_ext}"
                 
                 # 确定徽章颜色
@@ -259,14 +225,13 @@ class StyledItemDelegate(QStyledItemDelegate):
 
     def sizeHint(self, option, index):
         full_text = index.data(Qt.DisplayRole)
-        block_data = index.data(Qt.UserRole)
         
         is_selected = bool(option.state & QStyle.State_Selected)
 
         # 为了精确计算高度，我们必须在 sizeHint 中就注入正确的可用宽度
         # 覆写 option 的 rect.width 为 viewport 的宽度，或者直接在 _create_text_document 内部判断
         
-        doc = self._create_text_document(full_text, option, block_data, is_selected=is_selected)
+        doc = self._create_text_document(full_text, option, index.data(HIGHLIGHT_GROUPS_ROLE), is_selected=is_selected)
         
         padding_v = 5
         # 返回文档计算出的实际高度加上上下边距
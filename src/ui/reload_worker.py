@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from core.config import *
+
+
+class ReloadTaskSignals(QObject):
+    # 渐进加载时按批发出的进度（见 WordManager.prepare_reload）
+    progress = Signal(object)
+    # 构建好的新一代词库数据；构建失败时为 None
+    finished = Signal(object)
+
+
+class ReloadTask(QRunnable):
+    """
+    在后台线程执行 WordManager.prepare_reload（解析、预处理与建索引）。
+    完成后通过 finished 信号把结果交回界面线程，由界面线程调用 apply_reload 一次性替换快照。
+    progressive 为 True 时（启动时的首次加载），每加载完一批文件就通过 progress 信号交给界面线程先行并入。
+    """
+
+    def __init__(self, word_manager, progressive=False):
+        super().__init__()
+        self.word_manager = word_manager
+        self.progressive = progressive
+        self.signals = ReloadTaskSignals()
+
+    def run(self):
+        progress_callback = self.signals.progress.emit if self.progressive else None
+        try:
+            prepared = self.word_manager.prepare_reload(progress_callback)
+        except Exception as e:
+            log(f"CRITICAL: 后台重载词库失败: {e}")
+            prepared = None
+        self.signals.finished.emit(prepared)
@@ -1,44 +1,14 @@
 # -*- coding: utf-8 -*-
-import sys
-import os
-import webbrowser
-import configparser
-import hashlib
-import json
-import subprocess
-import re
-import itertools
-import threading
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit,
-                             QListWidget, QListWidgetItem, QSystemTrayIcon, QMenu, QSizeGrip,
-                             QGraphicsDropShadowEffect, QPushButton,
-                             QInputDialog, QMessageBox, QStyledItemDelegate, QStyle, QFileDialog,
-                             QCheckBox, QWidgetAction, QScrollArea, QLabel, QFrame)
-from PySide6.QtCore import (Qt, Signal, Slot, QObject,
-                          QTimer, QEvent, QRect, QProcess)
-from PySide6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QColor, QPalette, QActionGroup
-import pyperclip
-from pypinyin import pinyin, Style
-from pynput import keyboard
-from fuzzywuzzy import fuzz
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-# --- 拼音库修正 ---
-# 导入 pypinyin-dict 的高质量词典数据，以修正 pypinyin 默认词典中的罕见音问题
-try:
-    from pypinyin_dict.pinyin_data import kxhc1983
-    kxhc1983.load()
-    from pypinyin_dict.phrase_pinyin_data import cc_cedict
-    cc_cedict.load()
-    print("成功加载 pypinyin-dict 修正词典。")
-except ImportError:
-    print("警告: 未找到 pypinyin-dict 库，拼音首字母可能不准确。建议安装: pip install pypinyin-dict")
+from PySide6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QListWidget,
+                               QListWidgetItem, QMenu, QSizeGrip, QGraphicsDropShadowEffect,
+                               QPushButton, QLabel)
+from PySide6.QtCore import Qt, Signal, Slot, QTimer, QEvent, QRect, QThreadPool
+from PySide6.QtGui import QAction, QCursor, QColor
 
 
 from core.config import *
+from core.search_context import SearchContext, CancellationToken
+from ui.search_worker import SearchTask
 from ui.delegates import StyledItemDelegate
 from ui.components import EditDialog, ScrollableMessageBox
 
@@ -52,6 +22,18 @@ class SearchPopup(QWidget):
         self.word_manager = word_manager
         self.settings = settings_manager
         self.controller = None # 用于存储 MainController 的引用
+        self.search_context = SearchContext() # 本次弹窗会话的增量搜索上下文
+        # 后台搜索线程：单线程串行执行，新查询到来时取消仍在运行的旧查询
+        self.search_thread_pool = QThreadPool(self)
+        self.search_thread_pool.setMaxThreadCount(1)
+        self.search_request_id = 0
+        self.search_cancel_token = None
+        # 结果分页：只创建前一页的列表项，滚动到底部时再按需加载下一页
+        self.search_text = ""
+        self.search_limit = None
+        self.search_appending = False
+        self.displayed_results = []
+        self.has_more_results = False
         self.drag_position = None
         self.resizing = False
         self.resize_margin = 8
@@ -118,6 +100,7 @@ class SearchPopup(QWidget):
         self.search_debounce_timer.timeout.connect(self._trigger_update_list)
         self.search_box.textChanged.connect(self.search_debounce_timer.start)
         
+        self.list_widget.verticalScrollBar().valueChanged.connect(self._on_list_scrolled)
         self.list_widget.itemClicked.connect(self.on_item_selected)
         self.list_widget.itemActivated.connect(self.on_item_selected)
         # 【终极修复】连接信号，在选中项改变时强制刷新整个列表，杜绝一切渲染残留
@@ -314,13 +297,13 @@ class SearchPopup(QWidget):
             }}
         """)
         # 设置 QSizeGrip 的样式，使其背景色与窗口背景色一致
-        self.size_grip.setStyleSheet(f"""
-            QSizeGrip {{
+        self.size_grip.setStyleSheet("""
+            QSizeGrip {
                 background-color: transparent; /* 设置为完全透明 */
                 border: none;
                 padding: 8px; /* 增加内边距，使其向内移动 */
                 margin: -8px; /* 负外边距抵消部分 padding，使其不占用额外空间 */
-            }}
+            }
         """)
         self.close_button.setStyleSheet(f"QPushButton {{ background-color: transparent; color: {theme['text_color']}; border: none; font-size: 16px; font-weight: bold; }} QPushButton:hover {{ color: white; background-color: #E81123; border-radius: 4px; }}")
         # self._update_pin_button_style() # 应用主题时更新图钉按钮样式
@@ -362,6 +345,16 @@ class SearchPopup(QWidget):
         self.update_list("")
         self.show() # 只显示，不激活，不设置焦点
     
+    def update_loading_state(self):
+        """词库仍在渐进加载时，在标题栏显示已加载的文件数。"""
+        progress = self.word_manager.loading_progress
+        if progress is None:
+            self.title_label.setText(f"QuickKV v{VERSION}")
+        elif progress[1]:
+            self.title_label.setText(f"QuickKV v{VERSION} · 正在加载词库 {progress[0]}/{progress[1]}")
+        else:
+            self.title_label.setText(f"QuickKV v{VERSION} · 正在加载词库...")
+
     @Slot()
     def _trigger_update_list(self):
         """防抖定时器触发的实际搜索"""
@@ -369,6 +362,79 @@ class SearchPopup(QWidget):
 
     @Slot(str)
     def update_list(self, text):
+        """
+        提交一次搜索。空查询只是展示剪贴板历史，直接在界面线程完成；
+        其余查询交给后台线程，界面线程只负责把最新一次的结果填入列表。
+        """
+        self._start_search(text, self.settings.result_limit or None, appending=False)
+
+    def _start_search(self, text, limit, appending):
+        self.search_request_id += 1
+        if self.search_cancel_token is not None:
+            self.search_cancel_token.cancel()
+            self.search_cancel_token = None
+
+        self.search_text = text
+        self.search_limit = limit
+        self.search_appending = appending
+
+        if not text:
+            results = self.word_manager.find_matches(
+                text, self.settings.multi_word_search, self.settings.pinyin_initial_search,
+                search_context=self.search_context, limit=limit
+            )
+            self._apply_results(results)
+            return
+
+        self.search_cancel_token = CancellationToken()
+        task = SearchTask(
+            self.word_manager, self.search_request_id, text,
+            self.settings.multi_word_search, self.settings.pinyin_initial_search,
+            self.search_context, self.search_cancel_token, limit
+        )
+        task.signals.finished.connect(self._on_search_finished)
+        self.search_thread_pool.start(task)
+
+    @Slot(int, object)
+    def _on_search_finished(self, request_id, results):
+        # 期间又有新的输入，旧结果直接丢弃
+        if request_id != self.search_request_id:
+            return
+        self.search_cancel_token = None
+        self._apply_results(results)
+
+    def _apply_results(self, results):
+        self.has_more_results = self.search_limit is not None and len(results) >= self.search_limit
+        shown_count = len(self.displayed_results)
+        if self.search_appending and len(results) >= shown_count and all(
+            shown['block'] is result['block']
+            for shown, result in zip(self.displayed_results, results)
+        ):
+            # 加载更多：前面的结果未变化，只追加新的一页，保留当前选中项与滚动位置
+            self._append_items(results[shown_count:])
+            self.displayed_results = results
+        else:
+            self._populate_list(results)
+
+    @Slot(int)
+    def _on_list_scrolled(self, value):
+        """滚动到列表底部时加载下一页结果。"""
+        if not self.has_more_results or self.search_cancel_token is not None:
+            return
+        if value < self.list_widget.verticalScrollBar().maximum():
+            return
+        page_size = self.settings.result_limit or len(self.displayed_results)
+        self._start_search(self.search_text, self.search_limit + page_size, appending=True)
+
+    def stop_search_worker(self):
+        """取消正在进行的后台搜索并等待线程退出（程序退出前调用）。"""
+        self.search_request_id += 1
+        if self.search_cancel_token is not None:
+            self.search_cancel_token.cancel()
+            self.search_cancel_token = None
+        self.search_thread_pool.waitForDone(2000)
+
+    def _populate_list(self, results):
         # 根据设置动态调整横向滚动条状态
         if self.settings.word_wrap_enabled:
             self.list_widget.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -376,16 +442,18 @@ class SearchPopup(QWidget):
             self.list_widget.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
 
         self.list_widget.clear()
-        matched_blocks = self.word_manager.find_matches(
-            text, self.settings.multi_word_search, self.settings.pinyin_initial_search
-        )
-        
-        for block in matched_blocks:
-            item = QListWidgetItem(block['full_content'])
-            item.setData(Qt.UserRole, block)
-            self.list_widget.addItem(item)
+        self.displayed_results = results
+        self._append_items(results)
             
         if self.list_widget.count() > 0: self.list_widget.setCurrentRow(0)
+
+    def _append_items(self, results):
+        for result in results:
+            block = result['block']
+            item = QListWidgetItem(self.word_manager.get_full_content(block))
+            item.setData(Qt.UserRole, block)
+            item.setData(HIGHLIGHT_GROUPS_ROLE, result['highlight_groups'])
+            self.list_widget.addItem(item)
     
     @Slot("QListWidgetItem")
     def on_item_selected(self, item):
@@ -441,7 +509,7 @@ class SearchPopup(QWidget):
 
         menu = QMenu(self)
         
-        if selected_block.get('is_clipboard', False):
+        if selected_block.is_clipboard:
             # 剪贴板历史的右键菜单
             add_to_library_menu = QMenu("添加到词库", self)
             writable_targets = self.controller.get_writable_library_targets() if self.controller else []
@@ -465,7 +533,7 @@ class SearchPopup(QWidget):
             menu.addAction(delete_action)
         else:
             # 普通词库的右键菜单
-            favorite_action = QAction("取消收藏" if selected_block.get('is_favorite') else "收藏", self)
+            favorite_action = QAction("取消收藏" if selected_block.is_favorite else "收藏", self)
             favorite_action.triggered.connect(lambda checked=False, b=selected_block: self.controller.toggle_block_favorite(b))
             menu.addAction(favorite_action)
 
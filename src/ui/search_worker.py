@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from core.config import *
+from core.search_context import SearchCancelled
+
+
+class SearchTaskSignals(QObject):
+    # (请求序号, 结果项列表)
+    finished = Signal(int, object)
+
+
+class SearchTask(QRunnable):
+    """
+    在后台线程执行一次 find_matches。
+    查询被更新的输入取代时静默退出；只有正常完成的查询才会发出 finished 信号，
+    由界面线程根据请求序号决定是否采用。
+    """
+
+    def __init__(self, word_manager, request_id, query, multi_word_search_enabled, pinyin_search_enabled,
+                 search_context, cancel_token, limit=None):
+        super().__init__()
+        self.word_manager = word_manager
+        self.request_id = request_id
+        self.query = query
+        self.multi_word_search_enabled = multi_word_search_enabled
+        self.pinyin_search_enabled = pinyin_search_enabled
+        self.search_context = search_context
+        self.cancel_token = cancel_token
+        self.limit = limit
+        self.signals = SearchTaskSignals()
+
+    def run(self):
+        if self.cancel_token.cancelled:
+            return
+        try:
+            results = self.word_manager.find_matches(
+                self.query, self.multi_word_search_enabled, self.pinyin_search_enabled,
+                search_context=self.search_context, cancel_token=self.cancel_token, limit=self.limit
+            )
+        except SearchCancelled:
+            return
+        except Exception as e:
+            log(f"CRITICAL: 后台搜索失败: {e}")
+            return
+        self.signals.finished.emit(self.request_id, results)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""剪贴板定时清除调度的测试：时间戳文件只追加，但大小必须有界。"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.clipboard_expiry import ClipboardExpiry
+
+
+class ClipboardExpiryFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.file_path = os.path.join(self.temp_dir, 'clipboard_timestamps.txt')
+
+    def count_lines(self):
+        with open(self.file_path, encoding='utf-8') as f:
+            return sum(1 for _ in f)
+
+    def test_file_stays_bounded_when_recording_the_same_entries(self):
+        expiry = ClipboardExpiry(self.file_path)
+        for step in range(5000):
+            expiry.record(f"条目 {step % 10}", float(step))
+            self.assertLessEqual(self.count_lines(), ClipboardExpiry.COMPACT_RATIO * len(expiry) + 1)
+        self.assertEqual(len(expiry), 10)
+
+    def test_file_stays_bounded_with_a_sliding_window(self):
+        expiry = ClipboardExpiry(self.file_path)
+        for step in range(3000):
+            expiry.pop_expired(float(step), 50)
+            expiry.record(f"条目 {step}", float(step))
+            self.assertLessEqual(self.count_lines(), ClipboardExpiry.COMPACT_RATIO * len(expiry) + 1)
+
+    def test_compacted_file_keeps_latest_times(self):
+        expiry = ClipboardExpiry(self.file_path)
+        for step in range(1000):
+            expiry.record(f"条目 {step % 7}", float(step))
+
+        reloaded = ClipboardExpiry(self.file_path)
+        contents = [f"条目 {index}" for index in range(7)]
+        reloaded.sync(contents, current_time=99999.0)
+        self.assertEqual(reloaded.times, expiry.times)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""剪贴板历史环形缓冲区的测试。"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.clipboard_history import ClipboardHistory
+
+
+class ClipboardHistoryNewestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.history = ClipboardHistory(os.path.join(self.temp_dir, 'clipboard.md'), 50)
+        self.history.load()
+        for index in range(80):
+            self.history.append(f"- 条目 {index}")
+
+    def test_newest_returns_latest_first(self):
+        newest = self.history.newest(5)
+        self.assertEqual([block.parent for block in newest], [f"条目 {index}" for index in range(79, 74, -1)])
+
+    def test_pages_are_prefixes_of_larger_pages(self):
+        first_page = self.history.newest(20)
+        second_page = self.history.newest(40)
+        self.assertEqual(second_page[:20], first_page)
+
+    def test_limit_none_and_oversized_limit_return_whole_buffer(self):
+        self.assertEqual(len(self.history.newest()), 50)
+        self.assertEqual(self.history.newest(500), self.history.newest())
+
+
+if __name__ == '__main__':
+    unittest.main()
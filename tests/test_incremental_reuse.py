@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""增量更新复用旧词条的测试：只有内容确实相同的词条才能沿用上一版本的预处理结果。"""
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.config import MATCHER_ENGINE_BITPARALLEL
+import core.word_manager as word_manager_module
+
+
+class IncrementalReuseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.library_path = os.path.join(self.temp_dir, 'library.md')
+        self.write_library(['- 标题 ``bm:甲乙``', '- 其他词条', '正文'])
+
+        settings = types.SimpleNamespace(
+            libraries=[{'path': self.library_path, 'enabled': True, 'kind': 'file'}],
+            auto_libraries=[],
+            clipboard_memory_enabled=False,
+            clipboard_memory_count=10,
+            clipboard_blob_threshold_kb=64,
+            clipboard_max_kb=0,
+            matcher_engine=MATCHER_ENGINE_BITPARALLEL,
+            vectorized_search=False,
+            sharded_search=False,
+            shard_workers=0,
+            result_cache_entries=0,
+            cache_json_export=False,
+            lazy_bodies=False,
+            memory_report=False,
+        )
+        patcher = mock.patch.multiple(
+            word_manager_module,
+            CACHE_BIN_FILE=os.path.join(self.temp_dir, 'cache.bin'),
+            PINYIN_TABLE_FILE=os.path.join(self.temp_dir, 'pinyin.bin'),
+            CLIPBOARD_HISTORY_FILE=os.path.join(self.temp_dir, 'clipboard.md'),
+            CLIPBOARD_BLOB_DIR=os.path.join(self.temp_dir, 'blobs'),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.word_manager = word_manager_module.WordManager(settings)
+        self.addCleanup(self.word_manager.shutdown)
+
+    def write_library(self, lines):
+        with open(self.library_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def block_with_parent(self, parent):
+        return next(block for block in self.word_manager.word_blocks if block.parent == parent)
+
+    def test_crc_collision_does_not_reuse_stale_block(self):
+        self.assertEqual(list(self.block_with_parent('标题').aliases), ['甲乙'])
+        # 标题行相同、长度相同，只有别名不同；让所有正文的 CRC32 都相同，模拟碰撞
+        self.write_library(['- 标题 ``bm:丙丁``', '- 其他词条', '正文'])
+        with mock.patch.object(word_manager_module.zlib, 'crc32', return_value=0):
+            self.assertTrue(self.word_manager.update_files([self.library_path]))
+
+        block = self.block_with_parent('标题')
+        self.assertEqual(block.full_content, '- 标题 ``bm:丙丁``')
+        self.assertEqual(list(block.aliases), ['丙丁'])
+        self.assertEqual(self.word_manager.last_reload_stats['rebuilt'], 1)
+        self.assertEqual(self.word_manager.last_reload_stats['reused'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""位并行匹配引擎与经典匹配引擎的等价性测试：两者对任何输入都必须给出相同的得分与命中下标。"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.config import MATCHER_ENGINE_BITPARALLEL, MATCHER_ENGINE_CLASSIC
+from core.matcher import BitParallelMatcher, ClassicMatcher
+from core.word_block import intern_char_info
+import core.word_manager as word_manager_module
+
+
+# (字符, 搜索键)；包含大小写、汉字多音字首字母、小写后变为两个字符的 'İ'，以及多字符拼音键
+CHAR_POOL = [
+    ('a', ['a']), ('b', ['b']), ('c', ['c']), ('A', ['a']), ('B', ['b']), ('1', ['1']), (' ', [' ']),
+    ('中', ['z', '中']), ('文', ['w', '文']), ('和', ['h', '和']), ('长', ['c', 'z', '长']),
+    ('重', ['c', 'z', '重']), ('行', ['h', 'x', '行']),
+]
+MULTI_CHAR_POOL = [('İ', ['i̇']), ('张', ['zh', '张'])]
+KEY_ALPHABET = 'abchzwx1 中文İi'
+
+
+def make_char_map(rng, length, allow_multi_char):
+    pool = CHAR_POOL + (MULTI_CHAR_POOL if allow_multi_char else [])
+    return tuple(intern_char_info(*rng.choice(pool)) for _ in range(length))
+
+
+def make_keyword(rng, char_map):
+    """一半关键词取自映射表中连续位置的键（大概率命中），另一半随机生成。"""
+    if char_map and rng.random() < 0.5:
+        start = rng.randrange(len(char_map))
+        end = min(len(char_map), start + rng.randint(1, 4))
+        return ''.join(
+            rng.choice([char_info.char.lower()] + list(char_info.keys))
+            for char_info in char_map[start:end]
+        )
+    return ''.join(rng.choice(KEY_ALPHABET) for _ in range(rng.randint(1, 3)))
+
+
+class MatcherEquivalenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.classic = ClassicMatcher()
+        self.bitparallel = BitParallelMatcher()
+
+    def assert_same_match(self, keyword, char_map, pinyin_search_enabled, used_indices=None):
+        expected = self.classic.match(
+            keyword, char_map, pinyin_search_enabled=pinyin_search_enabled, used_indices=used_indices,
+        )
+        actual = self.bitparallel.match(
+            keyword, char_map, compiled=self.bitparallel.compile(char_map),
+            pinyin_search_enabled=pinyin_search_enabled, used_indices=used_indices,
+        )
+        self.assertEqual(actual, expected, msg=f"keyword={keyword!r} chars={[c.char for c in char_map]!r}")
+
+    def test_randomized_single_char_maps(self):
+        rng = random.Random(3)
+        for _ in range(3000):
+            char_map = make_char_map(rng, rng.randint(0, 12), allow_multi_char=False)
+            keyword = make_keyword(rng, char_map)
+            for pinyin_search_enabled in (False, True):
+                self.assert_same_match(keyword, char_map, pinyin_search_enabled)
+
+    def test_multi_char_keys_fall_back_to_classic(self):
+        rng = random.Random(5)
+        fallback_count = 0
+        for _ in range(2000):
+            char_map = make_char_map(rng, rng.randint(1, 10), allow_multi_char=True)
+            if self.bitparallel.compile(char_map) is None:
+                fallback_count += 1
+            keyword = make_keyword(rng, char_map)
+            for pinyin_search_enabled in (False, True):
+                self.assert_same_match(keyword, char_map, pinyin_search_enabled)
+        self.assertGreater(fallback_count, 0)
+
+    def test_used_indices(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            char_map = make_char_map(rng, rng.randint(1, 12), allow_multi_char=rng.random() < 0.3)
+            used_indices = {index for index in range(len(char_map)) if rng.random() < 0.3}
+            keyword = make_keyword(rng, char_map)
+            for pinyin_search_enabled in (False, True):
+                self.assert_same_match(keyword, char_map, pinyin_search_enabled, used_indices)
+
+
+LIBRARY_WORDS = ['中文', '输入法', '长行', '重复', '和平', 'Hello', 'world', 'QuickKV', 'abc', '测试', 'zh', '2024']
+
+
+def write_library(path, rng, entry_count):
+    lines = []
+    for index in range(entry_count):
+        parent = ' '.join(rng.choice(LIBRARY_WORDS) for _ in range(rng.randint(1, 4)))
+        meta = ''
+        if rng.random() < 0.2:
+            meta = f" ``bm:{rng.choice(LIBRARY_WORDS)}、{rng.choice(LIBRARY_WORDS)}``"
+        lines.append(f"- {parent}{meta}")
+        if rng.random() < 0.5:
+            lines.append(f"正文 {index}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def make_settings(library_paths, matcher_engine):
+    return types.SimpleNamespace(
+        libraries=[{'path': path, 'enabled': True, 'kind': 'file'} for path in library_paths],
+        auto_libraries=[],
+        clipboard_memory_enabled=False,
+        clipboard_memory_count=10,
+        clipboard_blob_threshold_kb=64,
+        clipboard_max_kb=0,
+        matcher_engine=matcher_engine,
+        vectorized_search=False,
+        sharded_search=False,
+        shard_workers=0,
+        result_cache_entries=0,
+        cache_json_export=False,
+        lazy_bodies=False,
+        memory_report=False,
+    )
+
+
+class FindMatchesEquivalenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        rng = random.Random(11)
+        self.library_paths = []
+        for name in ('a', 'b'):
+            path = os.path.join(self.temp_dir, f"{name}.md")
+            write_library(path, rng, 300)
+            self.library_paths.append(path)
+
+    def make_word_manager(self, matcher_engine):
+        data_dir = os.path.join(self.temp_dir, matcher_engine)
+        os.makedirs(data_dir)
+        with mock.patch.multiple(
+            word_manager_module,
+            CACHE_BIN_FILE=os.path.join(data_dir, 'cache.bin'),
+            PINYIN_TABLE_FILE=os.path.join(data_dir, 'pinyin.bin'),
+            CLIPBOARD_HISTORY_FILE=os.path.join(data_dir, 'clipboard.md'),
+            CLIPBOARD_BLOB_DIR=os.path.join(data_dir, 'blobs'),
+        ):
+            return word_manager_module.WordManager(make_settings(self.library_paths, matcher_engine))
+
+    @staticmethod
+    def summarize(results):
+        return [
+            (item['block'].full_content, round(item['base_score'], 9), item['highlight_groups'])
+            for item in results
+        ]
+
+    def test_find_matches_same_for_both_engines(self):
+        classic = self.make_word_manager(MATCHER_ENGINE_CLASSIC)
+        bitparallel = self.make_word_manager(MATCHER_ENGINE_BITPARALLEL)
+        self.addCleanup(classic.shutdown)
+        self.addCleanup(bitparallel.shutdown)
+
+        queries = ['zw', '中文', 'hello', 'cf', 'srf', 'ab', 'zw cs', 'hp 20', 'quickkv', 'w']
+        for query in queries:
+            for multi_word_search_enabled in (False, True):
+                for pinyin_search_enabled in (False, True):
+                    expected = classic.find_matches(query, multi_word_search_enabled, pinyin_search_enabled)
+                    actual = bitparallel.find_matches(query, multi_word_search_enabled, pinyin_search_enabled)
+                    self.assertEqual(
+                        self.summarize(actual), self.summarize(expected),
+                        msg=f"query={query!r} multi={multi_word_search_enabled} pinyin={pinyin_search_enabled}",
+                    )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""分页查询的测试：较小 limit 的结果必须是较大 limit 结果的前缀，剪贴板命中并入后同样如此。"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.config import MATCHER_ENGINE_BITPARALLEL
+import core.word_manager as word_manager_module
+
+
+LIBRARY_WORDS = ['中文', '输入法', '长行', '重复', '和平', 'Hello', 'world', 'QuickKV', 'abc', '测试', '2024']
+QUERIES = ['a', 'z', 'zw', 'h', 'cf', '中', 'w', 'ab 20']
+
+
+class ResultPagingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        rng = random.Random(17)
+        library_path = os.path.join(self.temp_dir, 'library.md')
+        with open(library_path, 'w', encoding='utf-8') as f:
+            for _ in range(600):
+                f.write("- " + ' '.join(rng.choice(LIBRARY_WORDS) for _ in range(rng.randint(1, 4))) + "\n")
+
+        settings = types.SimpleNamespace(
+            libraries=[{'path': library_path, 'enabled': True, 'kind': 'file'}],
+            auto_libraries=[],
+            clipboard_memory_enabled=True,
+            clipboard_memory_count=300,
+            clipboard_blob_threshold_kb=64,
+            clipboard_max_kb=0,
+            matcher_engine=MATCHER_ENGINE_BITPARALLEL,
+            vectorized_search=False,
+            sharded_search=False,
+            shard_workers=0,
+            result_cache_entries=0,
+            cache_json_export=False,
+            lazy_bodies=False,
+            memory_report=False,
+        )
+        patcher = mock.patch.multiple(
+            word_manager_module,
+            CACHE_BIN_FILE=os.path.join(self.temp_dir, 'cache.bin'),
+            PINYIN_TABLE_FILE=os.path.join(self.temp_dir, 'pinyin.bin'),
+            CLIPBOARD_HISTORY_FILE=os.path.join(self.temp_dir, 'clipboard.md'),
+            CLIPBOARD_BLOB_DIR=os.path.join(self.temp_dir, 'blobs'),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.word_manager = word_manager_module.WordManager(settings)
+        self.addCleanup(self.word_manager.shutdown)
+        for index in range(200):
+            text = ' '.join(rng.choice(LIBRARY_WORDS) for _ in range(rng.randint(1, 3)))
+            self.word_manager.add_to_clipboard_history(f"{text} 剪贴{index}")
+
+    def blocks(self, query, limit):
+        return [
+            item['block']
+            for item in self.word_manager.find_matches(query, True, True, limit=limit)
+        ]
+
+    def test_smaller_pages_are_prefixes(self):
+        for query in QUERIES:
+            full = self.blocks(query, None)
+            self.assertTrue(any(block.is_clipboard for block in full), msg=query)
+            for limit in (5, 20, 60, 150):
+                for page_size in (5, 40):
+                    page = self.blocks(query, limit)
+                    larger = self.blocks(query, limit + page_size)
+                    self.assertEqual(larger[:len(page)], page, msg=f"query={query!r} limit={limit}")
+                    self.assertEqual(full[:len(larger)], larger, msg=f"query={query!r} limit={limit}")
+
+    def test_empty_query_pages_clipboard_history(self):
+        first_page = self.blocks('', 30)
+        self.assertEqual(len(first_page), 30)
+        self.assertEqual(self.blocks('', 60)[:30], first_page)
+        self.assertEqual(len(self.blocks('', None)), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""增量更新时拼接出的向量化索引必须与整体重建的索引给出相同的匹配结果。"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from core.config import MATCHER_ENGINE_BITPARALLEL
+from core.vector_search import VectorIndex, is_vector_search_available
+import core.word_manager as word_manager_module
+
+
+LIBRARY_WORDS = ['中文', '输入法', '长行', '重复', '和平', 'Hello', 'world', 'QuickKV', 'abc', '测试', 'İstanbul', '2024']
+KEYWORDS = ['zw', 'h', 'hello', 'cf', 'srf', 'ab', 'q', '中', 'i', 'wor', '20']
+
+
+def write_library(path, rng, entry_count, tag=''):
+    lines = []
+    for _ in range(entry_count):
+        parent = ' '.join(rng.choice(LIBRARY_WORDS) for _ in range(rng.randint(1, 4)))
+        meta = f" ``bm:{rng.choice(LIBRARY_WORDS)}``" if rng.random() < 0.1 else ''
+        lines.append(f"- {tag}{parent}{meta}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+@unittest.skipUnless(is_vector_search_available(), "需要 NumPy")
+class VectorIndexSpliceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        self.rng = random.Random(13)
+        self.library_paths = []
+        for name in 'abcd':
+            path = os.path.join(self.temp_dir, f"{name}.md")
+            write_library(path, self.rng, 200)
+            self.library_paths.append(path)
+
+        settings = types.SimpleNamespace(
+            libraries=[{'path': path, 'enabled': True, 'kind': 'file'} for path in self.library_paths],
+            auto_libraries=[],
+            clipboard_memory_enabled=False,
+            clipboard_memory_count=10,
+            clipboard_blob_threshold_kb=64,
+            clipboard_max_kb=0,
+            matcher_engine=MATCHER_ENGINE_BITPARALLEL,
+            vectorized_search=True,
+            sharded_search=False,
+            shard_workers=0,
+            result_cache_entries=0,
+            cache_json_export=False,
+            lazy_bodies=False,
+            memory_report=False,
+        )
+        patcher = mock.patch.multiple(
+            word_manager_module,
+            CACHE_BIN_FILE=os.path.join(self.temp_dir, 'cache.bin'),
+            PINYIN_TABLE_FILE=os.path.join(self.temp_dir, 'pinyin.bin'),
+            CLIPBOARD_HISTORY_FILE=os.path.join(self.temp_dir, 'clipboard.md'),
+            CLIPBOARD_BLOB_DIR=os.path.join(self.temp_dir, 'blobs'),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.settings = settings
+        self.word_manager = word_manager_module.WordManager(settings)
+        self.addCleanup(self.word_manager.shutdown)
+
+    def assert_matches_fresh_build(self):
+        spliced = self.word_manager.vector_index
+        fresh = VectorIndex()
+        fresh.build(self.word_manager.word_blocks)
+        self.assertIs(spliced.word_blocks, self.word_manager.word_blocks)
+        self.assertEqual(spliced.python_positions, fresh.python_positions)
+        self.assertEqual(len(spliced.codes), len(fresh.codes))
+        for keyword in KEYWORDS:
+            for pinyin_search_enabled in (False, True):
+                self.assertEqual(
+                    spliced.match_single_keyword(keyword, pinyin_search_enabled),
+                    fresh.match_single_keyword(keyword, pinyin_search_enabled),
+                    msg=f"keyword={keyword!r} pinyin={pinyin_search_enabled}",
+                )
+
+    def test_update_files_splices_vector_index(self):
+        for step in range(6):
+            changed = self.rng.sample(self.library_paths, self.rng.randint(1, 2))
+            for path in changed:
+                write_library(path, self.rng, self.rng.randint(50, 300), tag=f"改{step} ")
+            with mock.patch.object(VectorIndex, 'build', side_effect=AssertionError("不应整体重建")):
+                self.assertTrue(self.word_manager.update_files(changed))
+            self.assert_matches_fresh_build()
+
+    def test_small_update_matches_full_reload(self):
+        # 变化的文件很小时走逐个二分插入的路径，顺序必须与整体重载一致
+        write_library(self.library_paths[2], self.rng, 5, tag="小 ")
+        self.assertTrue(self.word_manager.update_files([self.library_paths[2]]))
+        self.assert_matches_fresh_build()
+
+        reloaded = word_manager_module.WordManager(self.settings)
+        self.addCleanup(reloaded.shutdown)
+        self.assertEqual(
+            [block.full_content for block in self.word_manager.word_blocks],
+            [block.full_content for block in reloaded.word_blocks],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()